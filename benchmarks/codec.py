@@ -0,0 +1,117 @@
+"""Compares the encode and decode cost of the installed JSON codecs on realistic Keap payloads.
+
+The payloads mimic a contact with addresses, phone numbers and custom fields, an order with its items and
+payments, and a page of contacts as returned by the list endpoints.
+
+Usage:
+    python benchmarks/codec.py [--repeat 5] [--page-size 1000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Runs from a checkout
+
+from infusionsoft.codec import CODECS
+
+
+def make_contact(contact_id):
+    return {
+        'id': contact_id,
+        'given_name': 'Jane',
+        'family_name': f'Doe {contact_id}',
+        'middle_name': None,
+        'company': {'id': 42, 'company_name': 'Acme Corporation'},
+        'job_title': 'Head of Operations',
+        'email_addresses': [{'email': f'jane.doe+{contact_id}@example.com', 'field': 'EMAIL1'},
+                            {'email': f'j.doe{contact_id}@example.org', 'field': 'EMAIL2'}],
+        'phone_numbers': [{'number': '+1 555 0100', 'extension': None, 'field': 'PHONE1', 'type': 'Work'},
+                          {'number': '+1 555 0199', 'extension': '12', 'field': 'PHONE2', 'type': 'Mobile'}],
+        'addresses': [{'line1': '1 Infinite Loop', 'line2': 'Suite 200', 'locality': 'Cupertino',
+                       'region': 'California', 'postal_code': '95014', 'zip_code': '95014', 'zip_four': None,
+                       'country_code': 'USA', 'field': 'BILLING'}],
+        'custom_fields': [{'id': field_id, 'content': f'Value of custom field {field_id} – ünïcödé'}
+                          for field_id in range(40)],
+        'tag_ids': list(range(100, 130)),
+        'date_created': '2023-04-01T12:34:56.000+0000',
+        'last_updated': '2024-01-15T08:00:00.000+0000',
+        'opt_in_reason': 'Customer opted-in through webform',
+        'email_status': 'SingleOptIn',
+        'email_opted_in': True,
+        'owner_id': 7,
+        'score_value': '42',
+        'lead_source_id': 3,
+        'source_type': 'WEBFORM',
+        'ScoreValue': None,
+    }
+
+
+def make_order(order_id):
+    return {
+        'id': order_id,
+        'title': f'Order #{order_id}',
+        'status': 'PAID',
+        'total': 1234.56,
+        'total_paid': 1234.56,
+        'total_due': 0.0,
+        'refund_total': 0.0,
+        'creation_date': '2024-02-10T10:20:30.000+0000',
+        'order_date': '2024-02-10T10:20:30.000+0000',
+        'order_type': 'Online',
+        'source_type': 'API',
+        'contact': {'id': 1001, 'email': 'jane.doe@example.com', 'first_name': 'Jane', 'last_name': 'Doe',
+                    'company_name': 'Acme Corporation', 'job_title': 'Head of Operations'},
+        'order_items': [{'id': item_id, 'name': f'Product {item_id}', 'description': 'A fine product ' * 4,
+                         'quantity': item_id % 3 + 1, 'price': 19.99 + item_id, 'cost': 7.5, 'type': 'Product',
+                         'product': {'id': item_id, 'name': f'Product {item_id}', 'sku': f'SKU-{item_id:05d}',
+                                     'shippable': True, 'taxable': False, 'description': 'Product description'},
+                         'discount': None, 'special_id': 0, 'subscription_plan_id': None}
+                        for item_id in range(12)],
+        'payment_plan': {'auto_charge': True, 'credit_card_id': 5, 'days_between_payments': 30,
+                         'initial_payment_amount': 100.0, 'number_of_payments': 12,
+                         'payment_gateway': {'merchant_account_id': 1, 'use_default': False},
+                         'plan_start_date': '2024-02-10'},
+        'shipping_information': {'first_name': 'Jane', 'last_name': 'Doe', 'street1': '1 Infinite Loop',
+                                 'city': 'Cupertino', 'state': 'CA', 'zip': '95014', 'country': 'USA'},
+        'allow_payment': True,
+        'allow_paypal': False,
+    }
+
+
+def _measure(function, number, repeat):
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    payloads = {
+        'contact': (make_contact(1), 2000),
+        'order': (make_order(1), 2000),
+        f'contact page ({args.page_size})': ({'contacts': [make_contact(i) for i in range(args.page_size)],
+                                              'count': args.page_size, 'next': None, 'previous': None}, 5),
+    }
+    codecs = [codec() for codec in CODECS.values() if codec.available()]
+    missing = [name for name, codec in CODECS.items() if not codec.available()]
+
+    print(f'{"payload":<22} {"codec":<8} {"bytes":>9} {"encode µs":>11} {"decode µs":>11} {"vs json":>9}')
+    for name, (payload, number) in payloads.items():
+        results = []
+        for codec in codecs:
+            document = codec.dumps(payload)
+            results.append((codec.name, len(document), _measure(lambda: codec.dumps(payload), number, args.repeat),
+                            _measure(lambda: codec.loads(document), number, args.repeat)))
+        stdlib = next(result for result in results if result[0] == 'json')
+        for codec_name, size, encode, decode in results:
+            speedup = (stdlib[2] + stdlib[3]) / (encode + decode)
+            print(f'{name:<22} {codec_name:<8} {size:>9} {encode:>11.1f} {decode:>11.1f} {speedup:>8.1f}x')
+    if missing:
+        print(f'not installed: {", ".join(missing)}')
+
+
+if __name__ == '__main__':
+    main()
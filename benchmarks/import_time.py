@@ -0,0 +1,85 @@
+"""Measures the import cost of the package in fresh interpreters.
+
+Each scenario runs in its own process, as a short-lived CLI or serverless invocation would. The report shows the
+time spent running the scenario, which is almost only imports, the number of modules it imported and the service
+modules loaded, which should be only the ones the scenario touches. ``python -X importtime`` gives the detail of
+the first scenario, but misses the service modules since they are loaded through importlib.
+
+Every scenario must leave the optional subsystems it does not use unimported, see DEFERRED, and the script fails
+when one of them is loaded, so that an eager import creeping back is caught.
+
+Usage:
+    python benchmarks/import_time.py [--runs 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+SCENARIOS = {
+    'import infusionsoft': 'import infusionsoft',
+    'one service': 'import infusionsoft\n'
+                   'client = infusionsoft.Infusionsoft("id", "secret")\n'
+                   'client.set_token(infusionsoft.Token("x", "y", 9999999999))\n'
+                   'client.contact()',
+    'every service': 'import infusionsoft\n'
+                     'from infusionsoft.infusionsoft import SERVICES\n'
+                     'client = infusionsoft.Infusionsoft("id", "secret")\n'
+                     'client.set_token(infusionsoft.Token("x", "y", 9999999999))\n'
+                     'for service in SERVICES:\n'
+                     '    client.get_api(service)',
+    'asyncio client': 'from infusionsoft import AsyncInfusionsoft',
+}
+
+# Scenario -> modules it must not import
+_OPTIONAL = ('sqlite3', 'pickle', 'ujson', 'aiohttp', 'asyncio', 'concurrent.futures', 'infusionsoft.cache',
+             'infusionsoft.coalesce')
+DEFERRED = {
+    'import infusionsoft': _OPTIONAL + ('orjson', 'infusionsoft.codec', 'infusionsoft.tokenstore',
+                                       'infusionsoft.api.apimodel'),
+    'one service': _OPTIONAL,
+    'every service': _OPTIONAL,
+    'asyncio client': ('sqlite3', 'ujson', 'orjson', 'infusionsoft.tokenstore', 'infusionsoft.api.apimodel'),
+}
+
+TEMPLATE = """
+import sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+services = sorted(m[17:] for m in sys.modules if m.startswith('infusionsoft.api.'))
+deferred = sorted(m for m in {deferred!r} if m in sys.modules)
+print(elapsed * 1000, len(set(sys.modules) - before), ','.join(services) or '-', ','.join(deferred) or '-')
+"""
+
+
+def _run(code, deferred=()):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')]))}
+    result = subprocess.run([sys.executable, '-c', TEMPLATE.format(code=code, deferred=deferred)],
+                            capture_output=True, text=True, check=True, env=environment)
+    elapsed, modules, services, loaded = result.stdout.split()
+    return float(elapsed), int(modules), services, [] if loaded == '-' else loaded.split(',')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"scenario":<18} {"ms":>8} {"modules":>8}  service modules')
+    failures = []
+    for name, code in SCENARIOS.items():
+        runs = [_run(code, DEFERRED.get(name, ())) for _ in range(args.runs)]
+        total = min(run[0] for run in runs)
+        modules, services, loaded = runs[0][1:]
+        print(f'{name:<18} {total:>8.1f} {modules:>8}  {services}')
+        if loaded:
+            failures.append(f'{name} imported {", ".join(loaded)}')
+    if failures:
+        sys.exit('Deferred modules imported eagerly: ' + '; '.join(failures))
+
+
+if __name__ == '__main__':
+    main()
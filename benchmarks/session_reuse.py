@@ -0,0 +1,98 @@
+"""Compares one-off ``requests`` calls with the pooled session of :class:`Infusionsoft`.
+
+Both sides talk to a local HTTPS stand-in, so the numbers show the cost of the TCP and TLS handshake that
+connection reuse saves. Requires the ``openssl`` command line tool to create a throwaway certificate.
+
+Usage:
+    python benchmarks/session_reuse.py [--calls 500]
+"""
+import argparse
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Runs from a checkout
+
+from infusionsoft import Infusionsoft, Token
+from infusionsoft.ratelimit import RateLimiter
+from infusionsoft.tokenstore import MemoryTokenStore
+
+BODY = b'{"contacts": [], "count": 0, "next": null, "previous": null}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _make_certificate(directory):
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj',
+                    '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost', '-keyout', key, '-out', cert],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+def _serve(cert, key):
+    server = ThreadingHTTPServer(('localhost', 0), _Handler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _measure(call, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = _make_certificate(directory)
+        server = _serve(cert, key)
+        url = f'https://localhost:{server.server_address[1]}/crm/rest/v1/contacts'
+        try:
+            before = _measure(lambda: requests.get(url, params={'access_token': 'x'}, verify=cert), args.calls)
+
+            # Unthrottled, the default limiter caps a process at 25 calls/s, and without writing a token file
+            client = Infusionsoft('client-id', 'client-secret', rate_limiter=RateLimiter(rate=None),
+                                  token_store=MemoryTokenStore())
+            client.set_token(Token('x', 'y', int(time.time()) + 3600))
+            client.session.verify = cert
+            client.session.trust_env = False
+            after = _measure(lambda: client.request('get', url), args.calls)
+            client.close()
+        finally:
+            server.shutdown()
+
+    print(f'one-off requests: {before:8.1f} calls/s')
+    print(f'pooled session:   {after:8.1f} calls/s ({after / before:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
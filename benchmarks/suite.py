@@ -0,0 +1,357 @@
+"""Benchmarks the request path and the bulk operations against a local FakeKeapServer.
+
+Scenarios:
+    request        Cost of one Infusionsoft.request call, and its overhead over a bare session call.
+    pagination     Records per second of iter_contact, page by page and streamed, at several concurrencies.
+    bulk_tag       Contacts per second of bulk_apply_tag at several concurrencies.
+    bulk_upsert    Records per second of bulk_upsert_contacts at several concurrencies.
+    token_refresh  Threads finding the token expired at the same time: wall time and refreshes performed.
+    export_memory  Peak Python memory of a large export, page by page and streamed, measured in a child process.
+
+The server runs in a child process with a fixed seed, and a small injected latency stands for the network where the
+concurrency matters. Every measure is the best of --repeat runs. --json writes the results with the environment
+they were measured in, and --compare checks them against a previous file, failing when a metric got worse by more
+than --tolerance, so regressions can be tracked over time.
+
+Usage:
+    python benchmarks/suite.py [--only pagination,bulk_tag] [--repeat 3] [--contacts 20000] [--json results.json]
+                               [--compare baseline.json] [--tolerance 0.15]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # Runs from a checkout
+
+from infusionsoft import Infusionsoft, Token
+from infusionsoft.codec import default_codec
+from infusionsoft.fakeserver import DEFAULT_VOLUMES
+from infusionsoft.ratelimit import RateLimiter
+from infusionsoft.retry import RetryPolicy
+from infusionsoft.tokenstore import MemoryTokenStore
+
+# Metric name suffix -> whether a higher value is better
+DIRECTIONS = {'_per_s': True, '_us': False, '_ms': False, '_mb': False, '_refreshes': False, '_failures': False}
+# Metrics reported for context only, too noisy or not measuring the client to be compared
+CONTEXT_METRICS = {'session_call_us', 'overhead_us'}
+
+EXPORT_TEMPLATE = """
+import time, tracemalloc
+from infusionsoft import Infusionsoft, Token
+from infusionsoft.ratelimit import RateLimiter
+from infusionsoft.tokenstore import MemoryTokenStore
+client = Infusionsoft('id', 'secret', rate_limiter=RateLimiter(rate=None), token_store=MemoryTokenStore(),
+                      base_url={url!r})
+client.set_token(Token({access_token!r}, 'refresh', 9999999999))
+tracemalloc.start()
+start = time.perf_counter()
+count = sum(1 for _ in client.contact().iter_contact(page_size=1000, stream={stream}))
+elapsed = time.perf_counter() - start
+print(count, elapsed, tracemalloc.get_traced_memory()[1])
+"""
+
+
+class ServerProcess:
+    """FakeKeapServer running in a child process, so that it does not compete with the client for the interpreter
+    lock, driven through its control endpoints.
+    """
+
+    def __init__(self, volumes, latency=0.0, seed=0):
+        self.arguments = ['--port', '0', '--seed', str(seed), '--latency', str(latency)]
+        self.arguments += [argument for name, count in volumes.items() for argument in ('--volume', f'{name}={count}')]
+        self.process = None
+        self.url = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen([sys.executable, '-m', 'infusionsoft.fakeserver', *self.arguments],
+                                        stdout=subprocess.PIPE, text=True, env=_environment_variables())
+        self.url = self.process.stdout.readline().split()[-1]
+        self.root = self.url.split('/crm/', 1)[0]
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.process.terminate()
+        self.process.wait()
+
+    def issue_token(self):
+        answer = requests.post(f'{self.root}/_fake/tokens').json()
+        return Token(answer['access_token'], answer['refresh_token'], answer['end_of_life'])
+
+    def stats(self):
+        return requests.get(f'{self.root}/_fake/stats').json()
+
+    def reset_stats(self):
+        requests.post(f'{self.root}/_fake/stats/reset')
+
+    def client(self, **kwargs):
+        client = Infusionsoft('bench-id', 'bench-secret', rate_limiter=RateLimiter(rate=None),
+                              token_store=MemoryTokenStore(), base_url=self.url, token_url=f'{self.root}/token',
+                              **kwargs)
+        client.set_token(self.issue_token())
+        return client
+
+
+def _environment_variables():
+    return {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))}
+
+
+def _best(function, repeat):
+    return min((function() for _ in range(repeat)), key=lambda result: result[0])
+
+
+def bench_request(args):
+    results = []
+    with ServerProcess({'contacts': 10}, seed=args.seed) as server:
+        client = server.client()
+        url = f'{server.url}/contacts/1'
+        params = {'access_token': client.token.access_token}
+        calls = args.calls
+
+        def bare():
+            start = time.perf_counter()
+            for _ in range(calls):
+                client.session.get(url, params=params).json()
+            return (time.perf_counter() - start) / calls, None
+
+        def wrapped():
+            start = time.perf_counter()
+            for _ in range(calls):
+                client.request('get', url)
+            return (time.perf_counter() - start) / calls, None
+
+        wrapped()
+        baseline = _best(bare, args.repeat)[0]
+        per_call = _best(wrapped, args.repeat)[0]
+        client.close()
+    results.append(('request', {'calls': calls}, {'call_us': per_call * 1e6, 'session_call_us': baseline * 1e6,
+                                                  'overhead_us': (per_call - baseline) * 1e6,
+                                                  'calls_per_s': 1 / per_call}))
+    return results
+
+
+def bench_pagination(args):
+    results = []
+    with ServerProcess({'contacts': args.contacts}, args.latency, args.seed) as server:
+        for stream in (False, True):
+            for concurrency in ((1,) if stream else (1, 4, 8)):
+                client = server.client(pool_maxsize=max(10, concurrency))
+
+                def run():
+                    start = time.perf_counter()
+                    count = sum(1 for _ in client.contact().iter_contact(page_size=1000, concurrency=concurrency,
+                                                                         stream=stream))
+                    return time.perf_counter() - start, count
+
+                elapsed, count = _best(run, args.repeat)
+                client.close()
+                results.append(('pagination', {'contacts': count, 'concurrency': concurrency, 'stream': stream},
+                                {'records_per_s': count / elapsed, 'total_ms': elapsed * 1000}))
+    return results
+
+
+def bench_bulk_tag(args):
+    results = []
+    contacts = min(args.contacts, 10000)
+    with ServerProcess({'contacts': contacts}, args.latency, args.seed) as server:
+        tag_ids = iter(range(1, DEFAULT_VOLUMES['tags'] + 1))
+        for concurrency in (1, 4, 16):
+            client = server.client(pool_maxsize=max(10, concurrency))
+
+            def run():
+                start = time.perf_counter()
+                result = client.tags().bulk_apply_tag(next(tag_ids), range(1, contacts + 1), batch_size=100,
+                                                      concurrency=concurrency)
+                return time.perf_counter() - start, len(result.failed)
+
+            elapsed, failures = _best(run, args.repeat)
+            client.close()
+            results.append(('bulk_tag', {'contacts': contacts, 'batch_size': 100, 'concurrency': concurrency},
+                            {'contacts_per_s': contacts / elapsed, 'total_ms': elapsed * 1000,
+                             'bulk_failures': failures}))
+    return results
+
+
+def bench_bulk_upsert(args):
+    results = []
+    runs = iter(range(1_000_000))
+    with ServerProcess({'contacts': 1000}, args.latency, args.seed) as server:
+        for concurrency in (1, 8, 32):
+            client = server.client(pool_maxsize=max(10, concurrency))
+
+            def run():
+                run_id = next(runs)  # New email addresses, so that every run creates its contacts
+                payloads = ({'given_name': 'Bench', 'email_addresses': [{'email': f'bench{run_id}.{index}@example.com',
+                                                                           'field': 'EMAIL1'}]}
+                            for index in range(args.records))
+                report = client.contact().bulk_upsert_contacts(payloads, concurrency=concurrency)
+                return report.elapsed, report.failed
+
+            elapsed, failures = _best(run, args.repeat)
+            client.close()
+            results.append(('bulk_upsert', {'records': args.records, 'concurrency': concurrency},
+                            {'records_per_s': args.records / elapsed, 'total_ms': elapsed * 1000,
+                             'upsert_failures': failures}))
+    return results
+
+
+def bench_token_refresh(args):
+    results = []
+    with ServerProcess({'contacts': 10}, args.latency, args.seed) as server:
+        url = f'{server.url}/contacts/1'
+        for threads in (8, 32):
+            client = server.client(pool_maxsize=threads, retry_policy=RetryPolicy(max_attempts=1))
+
+            def run():
+                client.token.end_of_life = str(int(time.time()) - 1)
+                server.reset_stats()
+                failures = []
+                barrier = threading.Barrier(threads)
+
+                def call():
+                    barrier.wait()
+                    try:
+                        client.request('get', url)
+                    except Exception as e:
+                        failures.append(e)
+
+                workers = [threading.Thread(target=call) for _ in range(threads)]
+                start = time.perf_counter()
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                return time.perf_counter() - start, server.stats()['token_refreshes'], len(failures)
+
+            elapsed, refreshes, failures = _best(run, args.repeat)
+            client.close()
+            results.append(('token_refresh', {'threads': threads},
+                            {'total_ms': elapsed * 1000, 'token_refreshes': refreshes, 'call_failures': failures}))
+    return results
+
+
+def bench_export_memory(args):
+    results = []
+    with ServerProcess({'contacts': args.contacts}, seed=args.seed) as server:
+        access_token = server.issue_token().access_token
+        for stream in (False, True):
+            code = EXPORT_TEMPLATE.format(url=server.url, access_token=access_token, stream=stream)
+
+            def run():
+                output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                        env=_environment_variables())
+                count, elapsed, peak = output.stdout.split()
+                return int(peak), int(count), float(elapsed)
+
+            peak, count, elapsed = _best(run, args.repeat)
+            results.append(('export_memory', {'contacts': count, 'stream': stream},
+                            {'peak_mb': peak / 2 ** 20, 'records_per_s': count / elapsed}))
+    return results
+
+
+SCENARIOS = {
+    'request': bench_request,
+    'pagination': bench_pagination,
+    'bulk_tag': bench_bulk_tag,
+    'bulk_upsert': bench_bulk_upsert,
+    'token_refresh': bench_token_refresh,
+    'export_memory': bench_export_memory,
+}
+
+
+def _environment(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'commit': commit, 'python': platform.python_version(),
+            'implementation': platform.python_implementation(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'codec': default_codec().name,
+            'arguments': {name: value for name, value in vars(args).items() if name not in ('json', 'compare')}}
+
+
+def _key(result):
+    return f'{result["scenario"]} ' + ' '.join(f'{name}={value}' for name, value in sorted(result['params'].items()))
+
+
+def _higher_is_better(metric):
+    if metric in CONTEXT_METRICS:
+        return None
+    for suffix, higher in DIRECTIONS.items():
+        if metric.endswith(suffix):
+            return higher
+    return None
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints the change of every metric since a baseline file.
+
+    Returns:
+        The number of metrics that got worse by more than the tolerance.
+    """
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = {_key(result): result['metrics'] for result in json.load(file)['results']}
+    regressions = 0
+    print(f'\ncompared with {baseline_path} (tolerance {tolerance:.0%})')
+    for result in results:
+        previous = baseline.get(_key(result))
+        if previous is None:
+            continue
+        for metric, value in result['metrics'].items():
+            higher = _higher_is_better(metric)
+            before = previous.get(metric)
+            if higher is None or not before:
+                continue
+            change = value / before - 1
+            worse = -change if higher else change
+            flag = 'REGRESSION' if worse > tolerance else ''
+            regressions += bool(flag)
+            print(f'{_key(result):<58} {metric:<18} {before:>12.1f} -> {value:>12.1f} {change:>+8.1%} {flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', help='comma separated scenarios, defaults to all of them')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--calls', type=int, default=1000, help='calls of the request scenario')
+    parser.add_argument('--contacts', type=int, default=20000, help='contacts of the export scenarios')
+    parser.add_argument('--records', type=int, default=2000, help='records of the upsert scenario')
+    parser.add_argument('--latency', type=float, default=0.005, help='injected server latency in seconds')
+    parser.add_argument('--json', help='file where the results are written')
+    parser.add_argument('--compare', help='results file of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(unknown)}')
+
+    results = []
+    for name in names:
+        for scenario, params, metrics in SCENARIOS[name](args):
+            result = {'scenario': scenario, 'params': params, 'metrics': metrics}
+            results.append(result)
+            measures = '  '.join(f'{metric}={value:.1f}' if isinstance(value, float) else f'{metric}={value}'
+                                 for metric, value in metrics.items())
+            print(f'{_key(result):<58} {measures}', flush=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'environment': _environment(args), 'results': results}, file, indent=2)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
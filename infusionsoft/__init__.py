@@ -1,2 +1,10 @@
 from infusionsoft.infusionsoft import Infusionsoft, InfusionsoftException, ApiException
 from infusionsoft.token import Token, TokenExpiredException
+
+
+def __getattr__(name):
+    # The asyncio client is imported on first use, so that synchronous users do not pay for importing aiohttp
+    if name == 'AsyncInfusionsoft':
+        from infusionsoft.asyncinfusionsoft import AsyncInfusionsoft
+        return AsyncInfusionsoft
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -27,6 +27,27 @@ class Affiliate(ApiModel):
         """
         return self.infusionsoft.request('get', self.service_url, params=params)
 
+    def iter_affiliate(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all affiliates, requesting the next page only when the current one is consumed.
+        See :meth:`list_affiliate` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one affiliate at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'affiliates', params, page_size, concurrency, stream)
+
     def create_affiliate(self, json):
         """Create a single affiliate.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/Affiliate/createAffiliateUsingPOST>`.
@@ -58,6 +79,31 @@ class Affiliate(ApiModel):
         url = f'{self.service_url}/{affiliate_id}/clawbacks'
         return self.infusionsoft.request('get', url, affiliate_id, params)
 
+    def iter_affiliate_clawbacks(self, affiliate_id, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all the clawbacks of an affiliate,
+        requesting the next page only when the current one is consumed.
+        See :meth:`list_affiliate_clawbacks` for the accepted parameters.
+
+        Args:
+            affiliate_id:
+                The ID of the affiliate.
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one clawback at a time.
+        """
+        url = f'{self.service_url}/{affiliate_id}/clawbacks'
+        return self.infusionsoft.paginate(url, 'clawbacks', params, page_size, concurrency, stream)
+
     def list_affiliate_payments(self, affiliate_id, json, params):
         """Retrieves a list of all affiliate payments.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/Affiliate/listPaymentsUsingGET>`.
@@ -78,6 +124,31 @@ class Affiliate(ApiModel):
         url = f'{self.service_url}/{affiliate_id}/payments'
         return self.infusionsoft.request('get', url, affiliate_id, params=params, json=json)
 
+    def iter_affiliate_payments(self, affiliate_id, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all the payments of an affiliate,
+        requesting the next page only when the current one is consumed.
+        See :meth:`list_affiliate_payments` for the accepted parameters.
+
+        Args:
+            affiliate_id:
+                The ID of the affiliate.
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one payment at a time.
+        """
+        url = f'{self.service_url}/{affiliate_id}/payments'
+        return self.infusionsoft.paginate(url, 'payments', params, page_size, concurrency, stream)
+
     def retrieve_affiliate(self, affiliate_id):
         """Retrieve a single affiliate.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/Affiliate/getAffiliateUsingGET>`.
@@ -107,6 +178,28 @@ class Affiliate(ApiModel):
         url = f'{self.service_url}/commissions'
         return self.infusionsoft.request('get', url, params=params)
 
+    def iter_commissions(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all commissions, requesting the next page only when the current one is consumed.
+        See :meth:`list_commissions` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one commission at a time.
+        """
+        url = f'{self.service_url}/commissions'
+        return self.infusionsoft.paginate(url, 'commissions', params, page_size, concurrency, stream)
+
     def retrieve_affiliate_model(self):
         """Get the custom fields for the Affiliate object.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/Affiliate/retrieveAffiliateModelUsingGET>`.
@@ -132,6 +225,28 @@ class Affiliate(ApiModel):
         url = f'{self.service_url}/programs'
         return self.infusionsoft.request('get', url, params=params)
 
+    def iter_commission_programs(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all commission programs, requesting the next page only when the current one is consumed.
+        See :meth:`list_commission_programs` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one commission program at a time.
+        """
+        url = f'{self.service_url}/programs'
+        return self.infusionsoft.paginate(url, 'programs', params, page_size, concurrency, stream)
+
     def list_affiliate_redirects(self, params=None):
         """Retrieves a list of all affiliate redirects.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/Affiliate/listAffiliateRedirectLinksUsingGET>`.
@@ -147,6 +262,28 @@ class Affiliate(ApiModel):
         url = f'{self.service_url}/redirectlinks'
         return self.infusionsoft.request('get', url, params=params)
 
+    def iter_affiliate_redirects(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all affiliate redirects, requesting the next page only when the current one is consumed.
+        See :meth:`list_affiliate_redirects` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one redirect at a time.
+        """
+        url = f'{self.service_url}/redirectlinks'
+        return self.infusionsoft.paginate(url, 'redirects', params, page_size, concurrency, stream)
+
     def list_affiliate_summaries(self, params=None):
         """Retrieves a list of all affiliate redirects.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/Affiliate/listSummariesUsingGET>`.
@@ -161,3 +298,25 @@ class Affiliate(ApiModel):
         """
         url = f'{self.service_url}/summaries'
         return self.infusionsoft.request('get', url, params=params)
+
+    def iter_affiliate_summaries(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all affiliate summaries, requesting the next page only when the current one is consumed.
+        See :meth:`list_affiliate_summaries` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one summary at a time.
+        """
+        url = f'{self.service_url}/summaries'
+        return self.infusionsoft.paginate(url, 'summaries', params, page_size, concurrency, stream)
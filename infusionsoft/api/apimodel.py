@@ -1,10 +1,25 @@
+import functools
+import inspect
 from abc import ABCMeta
 
+from infusionsoft.hooks import in_operation
+
 
 class ApiModel(metaclass=ABCMeta):
-    """Abstract class for defining a new API object"""
+    """Abstract class for defining a new API object.
+
+    The public methods of the subclasses are wrapped so that the requests they perform are attributed to an
+    operation named after the module and the method, e.g. 'contact.list_contact', in hooks and metrics.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        service = cls.__module__.rsplit('.', 1)[-1]
+        for name, method in list(vars(cls).items()):
+            if not name.startswith('_') and inspect.isfunction(method):
+                setattr(cls, name, functools.wraps(method)(in_operation(f'{service}.{name}', method)))
 
     def __init__(self, infusionsoft):
         self.infusionsoft = infusionsoft
         self.base_payload = {'access_token': self.infusionsoft.token.access_token}
-        self.base_url = "https://api.infusionsoft.com/crm/rest/v1"
+        self.base_url = self.infusionsoft.base_url
@@ -26,7 +26,28 @@ class Contact(ApiModel):
         Returns:
             The JSON response of the request.
         """
-        return self.infusionsoft.request('get', self.service_url, json=params)
+        return self.infusionsoft.request('get', self.service_url, params=params)
+
+    def iter_contact(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all contacts, requesting the next page only when the current one is consumed.
+        See :meth:`list_contact` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one contact at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'contacts', params, page_size, concurrency, stream)
 
     def create_contact(self, json):
         """Creates a new contact in Infusionsoft.
@@ -54,6 +75,34 @@ class Contact(ApiModel):
         """
         return self.infusionsoft.request('put', self.service_url, json=json)
 
+    def bulk_upsert_contacts(self, records, concurrency=8, reject_file=None, progress=None, progress_every=1000,
+                             duplicate_option='Email'):
+        """Creates or updates any number of contacts, streaming the records through a pool of workers that share the
+        rate limiter of the client. See :meth:`create_update_contact`.
+
+        Args:
+            records:
+                Iterable of contact payloads, consumed lazily, e.g. a generator parsing a CSV or NDJSON feed.
+            concurrency:
+                Maximum number of upserts in flight. Defaults to 8.
+            reject_file:
+                Path or text file where every failed record is written as a JSON line with its error.
+                Defaults to None.
+            progress:
+                Callable receiving the UpsertReport every progress_every records and at the end. Defaults to None.
+            progress_every:
+                Number of records between two progress calls. Defaults to 1000.
+            duplicate_option:
+                The duplicate_option sent with the records that do not set one. Defaults to 'Email'.
+
+        Returns:
+            The final UpsertReport with the processed, succeeded and failed counts and the throughput, or a coroutine
+            returning it with the asyncio client.
+        """
+        from infusionsoft.bulk import bulk_upsert_contacts  # Imported on first use, with its thread pool
+        return bulk_upsert_contacts(self, records, concurrency, reject_file, progress, progress_every,
+                                    duplicate_option)
+
     def delete_contact(self, contact_id):
         """Deletes a contact in Infusionsoft.
         `API reference <https://developer.infusionsoft.com/docs/rest/#!/Contact/deleteContactUsingDELETE>`.
@@ -134,6 +183,31 @@ class Contact(ApiModel):
         url = f"{self.service_url}/{contact_id}/emails"
         return self.infusionsoft.request('get', url, params=params)
 
+    def iter_emails(self, contact_id, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over the emails sent to a contact,
+        requesting the next page only when the current one is consumed.
+        See :meth:`list_emails` for the accepted parameters.
+
+        Args:
+            contact_id:
+                The ID of the contact.
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one email at a time.
+        """
+        url = f"{self.service_url}/{contact_id}/emails"
+        return self.infusionsoft.paginate(url, 'emails', params, page_size, concurrency, stream)
+
     def create_email_record(self, contact_id, json):
         """Creates a record of an email sent to a contact.
         `API reference <https://developer.infusionsoft.com/docs/rest/#!/Contact/createEmailForContactUsingPOST>`.
@@ -185,7 +259,32 @@ class Contact(ApiModel):
             The JSON result of the request.
         """
         url = f"{self.service_url}/{contact_id}/tags"
-        return self.infusionsoft.request('get', url, json=params)
+        return self.infusionsoft.request('get', url, params=params)
+
+    def iter_applied_tags(self, contact_id, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over the tags applied to a contact,
+        requesting the next page only when the current one is consumed.
+        See :meth:`list_applied_tags` for the accepted parameters.
+
+        Args:
+            contact_id:
+                The ID of the contact.
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one applied tag at a time.
+        """
+        url = f"{self.service_url}/{contact_id}/tags"
+        return self.infusionsoft.paginate(url, 'tags', params, page_size, concurrency, stream)
 
     def apply_tags(self, contact_id, params):
         """Applies a list of tags to a given contact.
@@ -235,7 +334,7 @@ class Contact(ApiModel):
             The JSON result of the request.
         """
         url = f"{self.service_url}/{contact_id}"
-        return self.infusionsoft.request('delete', url, params=params)
+        return self.infusionsoft.request('get', url, params=params)
 
     def retrieve_contact_model(self):
         """Gets the custom fields and optional properties for the Contact object
@@ -244,7 +343,7 @@ class Contact(ApiModel):
             The JSON result of the request.
         """
         url = f"{self.service_url}/model"
-        return self.infusionsoft.request('delete', url)
+        return self.infusionsoft.request('get', url)
 
     def create_custom_field(self, params):
         """Adds a custom field of the specified type and options to the Contact object.
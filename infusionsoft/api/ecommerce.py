@@ -30,6 +30,27 @@ class Ecommerce(ApiModel):
          """
         return self.infusionsoft.request('get', self.service_url, params=params)
 
+    def iter_orders(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all orders, requesting the next page only when the current one is consumed.
+        See :meth:`list_orders` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one order at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'orders', params, page_size, concurrency, stream)
+
     def create_order(self, json):
         """Create a one time order with order items.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/E-Commerce/createOrderUsingPOST>`.
@@ -194,6 +215,28 @@ class Ecommerce(ApiModel):
         """
         return self.infusionsoft.request('get', self.subscription_url)
 
+    def iter_subscriptions(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all subscriptions, requesting the next page only when the current one is consumed.
+        See :meth:`list_subscriptions` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one subscription at a time.
+        """
+        return self.infusionsoft.paginate(self.subscription_url, 'subscriptions', params, page_size, concurrency,
+                                          stream)
+
     def create_subscriptions(self, json):
         """Creates a subscription with the specified product and product subscription id.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/E-Commerce/createSubscriptionUsingPOST>`.
@@ -232,6 +275,27 @@ class Ecommerce(ApiModel):
         """
         return self.infusionsoft.request('get', self.transactions_url, params)
 
+    def iter_transactions(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all transactions, requesting the next page only when the current one is consumed.
+        See :meth:`list_transactions` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one transaction at a time.
+        """
+        return self.infusionsoft.paginate(self.transactions_url, 'transactions', params, page_size, concurrency, stream)
+
     def retrieve_transaction(self, transaction_id):
         """Retrieves a single transaction.
         `API Reference <https://developer.infusionsoft.com/docs/rest/#!/E-Commerce/getTransactionUsingGET>`.
@@ -29,6 +29,27 @@ class File(ApiModel):
         """
         return self.infusionsoft.request('get', self.service_url, params)
 
+    def iter_files(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all files, requesting the next page only when the current one is consumed.
+        See :meth:`list_files` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one file at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'files', params, page_size, concurrency, stream)
+
     def upload_files(self, json):
         """Upload a base64 encoded file. contact_id is required only when file_association is CONTACT.
         `API reference <https://developer.infusionsoft.com/docs/rest/#!/File/createFileUsingPOST>`.
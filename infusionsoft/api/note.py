@@ -14,13 +14,39 @@ class Note(ApiModel):
         super(Note, self).__init__(infusionsoft)
         self.service_url = f'{self.base_url}/notes'
 
-    def list_notes(self):
+    def list_notes(self, params=None):
         """Retrieves a list of all notes
 
+        Args:
+            params:
+                Dictionary, list of tuples or bytes to send in the query string for the Request.
+                See the API reference for more information.
+
         Returns:
             The JSON result of the request.
         """
-        return self.infusionsoft.request('get', self.service_url)
+        return self.infusionsoft.request('get', self.service_url, params=params)
+
+    def iter_notes(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all notes, requesting the next page only when the current one is consumed.
+        See :meth:`list_notes` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one note at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'notes', params, page_size, concurrency, stream)
 
     def create_note(self, json):
         """Creates a new note as the authenticated user. Either a "title" or "body" is required
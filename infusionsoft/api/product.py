@@ -28,6 +28,27 @@ class Product(ApiModel):
         """
         return self.infusionsoft.request('get', self.service_url, params=params)
 
+    def iter_product(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all products, requesting the next page only when the current one is consumed.
+        See :meth:`list_product` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one product at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'products', params, page_size, concurrency, stream)
+
     def create_product(self, json):
         """Creates a new product.
         `API reference <https://developer.infusionsoft.com/docs/rest/#!/Product/createProductUsingPOST>`.
@@ -28,6 +28,27 @@ class Tags(ApiModel):
         """
         return self.infusionsoft.request('get', self.service_url, params=params)
 
+    def iter_tags(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all tags, requesting the next page only when the current one is consumed.
+        See :meth:`list_tags` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one tag at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'tags', params, page_size, concurrency, stream)
+
     def create_tag(self, json):
         """Create a new tag. `API reference <https://developer.infusionsoft.com/docs/rest/#!/Tags/createTagUsingPOST>`
 
@@ -63,9 +84,34 @@ class Tags(ApiModel):
         Returns:
             The JSON response of the request.
         """
-        url = f'{self.service_url}/{tag_id}'
+        url = f'{self.service_url}/{tag_id}/companies'
         return self.infusionsoft.request('get', url, params)
 
+    def iter_tagged_companies(self, tag_id, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over the companies that have the given tag applied,
+        requesting the next page only when the current one is consumed.
+        See :meth:`list_tagged_companies` for the accepted parameters.
+
+        Args:
+            tag_id:
+                The ID of the tag.
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one company at a time.
+        """
+        url = f'{self.service_url}/{tag_id}/companies'
+        return self.infusionsoft.paginate(url, 'companies', params, page_size, concurrency, stream)
+
     def remove_tag_contacts(self, tag_id, params):
         """Remove a tag from a list of contacts.
         `API reference <https://developer.infusionsoft.com/docs/rest/#!/Tags/removeTagFromContactIdsUsingDELETE>`
@@ -100,6 +146,31 @@ class Tags(ApiModel):
         url = f'{self.service_url}/{tag_id}/contacts'
         return self.infusionsoft.request('get', url, params)
 
+    def iter_tagged_contacts(self, tag_id, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over the contacts that have the given tag applied,
+        requesting the next page only when the current one is consumed.
+        See :meth:`list_tagged_contacts` for the accepted parameters.
+
+        Args:
+            tag_id:
+                The ID of the tag.
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one tagged contact at a time.
+        """
+        url = f'{self.service_url}/{tag_id}/contacts'
+        return self.infusionsoft.paginate(url, 'contacts', params, page_size, concurrency, stream)
+
     def apply_tag_contact(self, tag_id, json):
         """Apply a tag to a list of contacts.
         `API reference <https://developer.infusionsoft.com/docs/rest/#!/Tags/applyTagToContactIdsUsingPOST>`
@@ -117,6 +188,48 @@ class Tags(ApiModel):
         url = f'{self.service_url}/{tag_id}/contacts'
         return self.infusionsoft.request('get', url, json)
 
+    def bulk_apply_tag(self, tag_id, contact_ids, batch_size=1000, concurrency=4):
+        """Apply a tag to any number of contacts. The IDs are split in batches sent in parallel, sharing the rate
+        limiter of the client. See :meth:`apply_tag_contact`.
+
+        Args:
+            tag_id:
+                The ID of the tag.
+            contact_ids:
+                Iterable of contact IDs, consumed lazily.
+            batch_size:
+                Number of contacts per request. Defaults to 1000.
+            concurrency:
+                Maximum number of requests in flight. Defaults to 4.
+
+        Returns:
+            The BulkResult listing the contacts tagged or already tagged, and the reason of every failure, or a
+            coroutine returning it with the asyncio client.
+        """
+        from infusionsoft.bulk import bulk_apply_tag  # Imported on first use, with its thread pool
+        return bulk_apply_tag(self, tag_id, contact_ids, batch_size, concurrency)
+
+    def bulk_remove_tag(self, tag_id, contact_ids, batch_size=100, concurrency=4):
+        """Remove a tag from any number of contacts. The IDs are split in batches sent in parallel, sharing the rate
+        limiter of the client. See :meth:`remove_tag_contacts`.
+
+        Args:
+            tag_id:
+                The ID of the tag.
+            contact_ids:
+                Iterable of contact IDs, consumed lazily.
+            batch_size:
+                Number of contacts per request. Defaults to 100.
+            concurrency:
+                Maximum number of requests in flight. Defaults to 4.
+
+        Returns:
+            The BulkResult listing the contacts the tag was removed from, and the reason of every failure, or a
+            coroutine returning it with the asyncio client.
+        """
+        from infusionsoft.bulk import bulk_remove_tag
+        return bulk_remove_tag(self, tag_id, contact_ids, batch_size, concurrency)
+
     def remove_tag_contact(self, tag_id, contact_id):
         """Remove a tag from a Contact.
         `API reference <https://developer.infusionsoft.com/docs/rest/#!/Tags/removeTagFromContactIdUsingDELETE>`
@@ -28,6 +28,27 @@ class Tasks(ApiModel):
         """
         return self.infusionsoft.request('get', self.service_url, params=params)
 
+    def iter_tasks(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all tasks, requesting the next page only when the current one is consumed.
+        See :meth:`list_tasks` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one task at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'tasks', params, page_size, concurrency, stream)
+
     def create_task(self, json):
         """Creates a new task as the authenticated user. NB: Contact must contain at least one item in the fields
         title and due_date. All other attributes are optional. `API reference
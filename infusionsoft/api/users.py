@@ -27,6 +27,27 @@ class Users(ApiModel):
         """
         return self.infusionsoft.request('get', self.service_url, params)
 
+    def iter_users(self, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over all users, requesting the next page only when the current one is consumed.
+        See :meth:`list_users` for the accepted parameters.
+
+        Args:
+            params:
+                Dictionary to send in the query string for the Request. limit and offset are used as page size
+                and starting offset.
+            page_size:
+                Number of records requested per page. Defaults to the limit in params, or 1000.
+            concurrency:
+                Number of pages requested in parallel once the total count is known. Defaults to 1.
+            stream:
+                Whether to decode every page while it is received, holding no whole page in memory.
+                Defaults to False.
+
+        Returns:
+            A generator yielding one user at a time.
+        """
+        return self.infusionsoft.paginate(self.service_url, 'users', params, page_size, concurrency, stream)
+
     def create_user(self, json):
         """Creates a new user record. NB: Users will be invited to the application and remain in the "Invited" status
         until the user accepts the invite. "Inactive" users will not take up a user license. `API reference
@@ -0,0 +1,462 @@
+import asyncio
+import base64
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is an optional dependency, only needed by the asyncio client
+    aiohttp = None
+
+from infusionsoft.coalesce import AsyncRequestCoalescer
+from infusionsoft.hooks import RequestEvent, content_length, current_operation, endpoint_name, in_operation
+from infusionsoft.infusionsoft import BASE_URL, TOKEN_URL, Infusionsoft, InfusionsoftException, ApiException
+from infusionsoft.pagination import aiter_records, aiter_streamed_records, atraced_pages
+from infusionsoft.ratelimit import retry_after_seconds
+from infusionsoft.streaming import JsonArrayParser
+from infusionsoft.token import Token
+from infusionsoft.tracing import start_span
+
+
+class AsyncInfusionsoft(Infusionsoft):
+    """Asyncio flavour of the Infusionsoft object, backed by `aiohttp <https://docs.aiohttp.org>`.
+
+    Every service object returned by the getters (``contact()``, ``tags()``, ...) works unchanged: their methods
+    return awaitables, so ``await client.contact().list_contact()`` performs the call without blocking the loop.
+    All the calls share one non-blocking connection pool and at most ``max_concurrency`` of them are in flight at
+    the same time.
+
+    The pool, the concurrency limit and the token lock are created in the event loop of the first call. The object
+    can be used again from a new loop once that one is closed, e.g. by successive ``asyncio.run()`` calls, but not
+    from two loops running at the same time. The token is refreshed by the first request finding it close to its end
+    of life, there is no background refresh thread.
+    """
+
+    def __init__(self, client_id, client_secret, pool_maxsize=100, pool_maxsize_per_host=0, keepalive_timeout=30,
+                 max_concurrency=100, timeout=None, rate_limiter=None, retry_policy=None, refresh_margin=300,
+                 token_store=None, cache=None, coalesce=False, codec=None, hooks=None, metrics=None,
+                 tracer=None, base_url=BASE_URL, token_url=TOKEN_URL):
+        """Creates a new AsyncInfusionsoft object.
+
+        Args:
+            client_id: The application client id.
+            client_secret: The application client secret.
+            pool_maxsize: Maximum number of connections kept by the pool, 0 for no limit. Defaults to 100.
+            pool_maxsize_per_host: Maximum number of connections to the same host, 0 for no limit. Defaults to 0.
+            keepalive_timeout: Seconds an idle connection is kept open for reuse. Defaults to 30.
+            max_concurrency: Maximum number of requests in flight at the same time. Defaults to 100.
+            timeout: Total timeout in seconds for every request. Defaults to None.
+            rate_limiter: The RateLimiter throttling the requests. Defaults to the limiter shared by every client of
+                the same application in this process.
+            retry_policy: The RetryPolicy applied to failed requests. Defaults to RetryPolicy().
+            refresh_margin: Number of seconds before the end of life of the token when it is refreshed.
+                Defaults to 300.
+            token_store: The TokenStore persisting the token. Defaults to a FileTokenStore writing 'token.json',
+                which imports the 'token.dat' pickle of older versions once.
+            cache: The ResponseCache serving read-mostly GET endpoints. Defaults to None, which disables caching.
+            coalesce: Whether identical GET requests in flight at the same time share one call. Defaults to False.
+            codec: The JsonCodec of the request bodies and answers, or its name. Defaults to the fastest installed.
+            hooks: The Hooks called around every request. Defaults to new Hooks with no callback.
+            metrics: The Metrics registry recording the requests of this object. Defaults to None.
+            tracer: The Tracer creating spans for the calls and pages of this object, including DNS resolution and
+                connection setup. Defaults to None.
+            base_url: Root URL of the REST API. Defaults to BASE_URL.
+            token_url: URL of the OAuth token endpoint. Defaults to TOKEN_URL.
+
+        Raises:
+            InfusionsoftException: If aiohttp or the requested codec is not installed.
+        """
+        if aiohttp is None:
+            raise InfusionsoftException('The asyncio client requires aiohttp, install it with "pip install aiohttp".')
+        self.pool_maxsize_per_host = pool_maxsize_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.max_concurrency = max_concurrency
+        super().__init__(client_id, client_secret, pool_maxsize=pool_maxsize, timeout=timeout,
+                         rate_limiter=rate_limiter, retry_policy=retry_policy, refresh_margin=refresh_margin,
+                         auto_refresh=False, token_store=token_store, cache=cache, coalesce=coalesce, codec=codec,
+                         hooks=hooks, metrics=metrics, tracer=tracer, base_url=base_url, token_url=token_url)
+        self.loop = None
+        self.semaphore = None
+        self.token_lock = None
+        self.token_store_executor = None
+
+    def create_session(self):
+        """The aiohttp session must be created inside a running event loop, see :meth:`get_session`.
+        """
+        return None
+
+    def create_coalescer(self):
+        """Creates the object sharing identical GET requests in flight on the event loop.
+
+        Returns:
+            The request coalescer.
+        """
+        return AsyncRequestCoalescer()
+
+    def bind_loop(self):
+        """Creates the concurrency limit and the token lock in the running event loop, unless already done. The
+        objects of a previous loop that is closed are replaced, including the session.
+
+        Raises:
+            InfusionsoftException: If the object is in use by another event loop that is not closed.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is self.loop:
+            return
+        if self.loop is not None and not self.loop.is_closed():
+            raise InfusionsoftException('The AsyncInfusionsoft object is in use by another event loop, create one '
+                                        'object per event loop.')
+        self.loop = loop
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.token_lock = asyncio.Lock()
+        self.session = None  # Bound to the closed loop, it can no longer be closed nor used
+
+    async def get_session(self):
+        """Getter for the shared aiohttp session, created on first use in the running event loop.
+
+        Returns:
+            The aiohttp client session.
+
+        Raises:
+            InfusionsoftException: If the object is in use by another event loop that is not closed.
+        """
+        self.bind_loop()
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, limit_per_host=self.pool_maxsize_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            trace_configs = [_trace_config(self.tracer)] if self.tracer is not None else None
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs)
+        return self.session
+
+    async def close(self):
+        """Closes the aiohttp session and every connection it keeps open.
+        """
+        self.bind_loop()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.token_store_executor is not None:
+            self.token_store_executor.shutdown(wait=False)
+            self.token_store_executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def refresh_token(self):
+        """Refreshes an expired token.
+        Concurrent callers wait for the refresh in flight instead of starting their own.
+
+        Raises:
+            InfusionsoftException: If an error occurs while refreshing the token.
+        """
+        await self.refresh_token_once(self.token.access_token)
+
+    async def refresh_token_once(self, stale_access_token):
+        """Refreshes the token unless it has already been refreshed since the given access token was read.
+        Only one refresh is in flight at a time, the other callers wait for it and reuse its result. The refresh
+        holds the lock of the token store, so a token refreshed by another process sharing the store is reused too.
+        The store is locked, read and written from a dedicated thread, since file and database stores block.
+
+        Args:
+            stale_access_token: The access token the caller found expired or rejected.
+
+        Raises:
+            InfusionsoftException: If an error occurs while refreshing the token.
+        """
+        self.bind_loop()
+        async with self.token_lock:
+            lock = self.token_store.lock()
+            await self._in_token_store_thread(lock.__enter__)
+            try:
+                await self._refresh_token_locked(stale_access_token)
+            except BaseException as e:
+                await self._in_token_store_thread(lock.__exit__, type(e), e, e.__traceback__)
+                raise
+            await self._in_token_store_thread(lock.__exit__, None, None, None)
+
+    def _in_token_store_thread(self, function, *args):
+        # Always the same thread: the stores keep their lock state in the thread holding it
+        if self.token_store_executor is None:
+            self.token_store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='infusionsoft-token')
+        return asyncio.get_running_loop().run_in_executor(self.token_store_executor, function, *args)
+
+    async def _refresh_token_locked(self, stale_access_token):
+        if self.token.access_token != stale_access_token:
+            return
+        stored = await self._in_token_store_thread(self.token_store.load)
+        if stored is not None and stored.access_token != stale_access_token \
+                and not stored.expires_within(self.refresh_margin):
+            self.token = stored
+            return
+        string = f'{self.client_id}:{self.client_secret}'
+        base64_string = base64.b64encode(string.encode('ascii')).decode('ascii')
+        headers = {'Authorization': f'Basic {base64_string}', 'Content-type': 'application/x-www-form-urlencoded'}
+        data = {'grant_type': 'refresh_token', 'refresh_token': self.token.refresh_token}
+        session = await self.get_session()
+        async with session.post(self.token_url, data=data, headers=headers) as r:
+            json_res = await r.json(content_type=None)
+            status_code = r.status
+        if status_code == 200:
+            end_of_life = str(int(time.time()) + int(json_res.get('expires_in')))
+            self.token = Token(json_res.get('access_token'), json_res.get('refresh_token'), end_of_life,
+                               self.token.extra_info)
+            await self._in_token_store_thread(self.serialize_token, self.token)
+        else:
+            raise InfusionsoftException(f'An error occurred while refreshing the token: {json_res}')
+
+    async def request(self, method, url, params=None, data=None, json=None, headers=None):
+        """Performs a request to the REST endpoint without blocking the event loop.
+        Throttled requests, server errors and connection failures are retried according to the retry policy.
+        The token is refreshed when it is about to expire, and a request rejected with 401 is replayed once after
+        refreshing it. GET answers are served from the response cache when one is configured, and identical GET
+        requests in flight at the same time share one call when coalescing is enabled.
+
+        Args:
+            method: The HTTP method.
+            url: URL of the REST endpoint.
+            params: Parameters of the request. Defaults to None.
+            data: Data of the request. Defaults to None.
+            json: JSON of the request. Defaults to None.
+            headers: Headers of the request. Defaults to None.
+
+        Returns:
+            The JSON of the answer, or None if the answer has no content.
+
+        Raises:
+            ApiException: If the answer is not successful or not valid JSON.
+        """
+        if method.lower() != 'get' or data is not None or json is not None:
+            json_response = await self._request(method, url, params, data, json, headers)
+            if method.lower() != 'get':
+                self.invalidate_cache(url)
+            return json_response
+        if self.cache is None and self.coalescer is None:
+            return await self._request(method, url, params, data, json, headers)
+        from infusionsoft.cache import ResponseCache  # Imported by the users of the cache or coalescing only
+        key = ResponseCache.key(method, url, params)
+        ttl = self.cache.ttl_for(url) if self.cache is not None else 0
+        if ttl:
+            found, json_response = self.cache.get(key)
+            if found:
+                return json_response
+        if self.coalescer is not None:
+            json_response = await self.coalescer.do(key, lambda: self._request(method, url, params, data, json,
+                                                                                headers))
+        else:
+            json_response = await self._request(method, url, params, data, json, headers)
+        if ttl:
+            self.cache.set(key, json_response, ttl)
+        return json_response
+
+    def stream(self, url, key, params=None, chunk_size=65536):
+        """Performs a GET request and decodes the array of the answer incrementally, while the body is received.
+        Neither the whole body nor the whole list is held in memory. The request is retried like :meth:`request`,
+        but its answer is never cached nor shared.
+
+        Args:
+            url: URL of the REST endpoint.
+            key: Key of the JSON answer holding the array, e.g. 'contacts'.
+            params: Parameters of the request. Defaults to None.
+            chunk_size: Number of bytes read from the connection at a time. Defaults to 65536.
+
+        Returns:
+            An asynchronous generator yielding one element of the array at a time.
+
+        Raises:
+            ApiException: If the answer is an error.
+        """
+        return self._stream(current_operation.get(), url, key, params, chunk_size)
+
+    async def _stream(self, operation, url, key, params, chunk_size):
+        token = current_operation.set(operation)
+        try:
+            with start_span(self.tracer, 'request', method='GET', endpoint=endpoint_name(url), operation=operation,
+                            offset=(params or {}).get('offset'), stream=True) as span:
+                status_code, body = await self._perform('get', url, params, None, None, stream=True)
+                if span is not None:
+                    span.set(status=status_code)
+        finally:
+            current_operation.reset(token)
+        if status_code != 200:
+            self._decode_response(status_code, body)
+            return
+        try:
+            parser = JsonArrayParser(key)
+            async for chunk in body.content.iter_chunked(chunk_size):
+                for record in parser.feed(chunk):
+                    yield record
+                if parser.done:
+                    return
+            for record in parser.close():
+                yield record
+        finally:
+            body.release()
+
+    async def _request(self, method, url, params, data, json, headers):
+        if json is not None:
+            data = self.codec.dumps(json)
+            headers = {'Content-Type': 'application/json', **(headers or {})}
+        if self.tracer is None:
+            return self._decode_response(*await self._perform(method, url, params, data, headers))
+        with self.tracer.span('request', method=method.upper(), endpoint=endpoint_name(url),
+                              operation=current_operation.get(),
+                              bytes_out=len(data) if isinstance(data, (bytes, str)) else None) as span:
+            status_code, body = await self._perform(method, url, params, data, headers)
+            span.set(status=status_code, bytes_in=len(body))
+            with self.tracer.span('decode', bytes=len(body)):
+                return self._decode_response(status_code, body)
+
+    async def _perform(self, method, url, params, data, headers, stream=False):
+        if not self.hooks and self.debug_hooks is None:
+            return await self._perform_with_retries(method, url, params, data, headers, stream)
+        event = RequestEvent(method, url, data)
+        self.emit_hook('before_request', event)
+        try:
+            status_code, body = await self._perform_with_retries(method, url, params, data, headers, stream, event)
+        except Exception as e:
+            event.finish(error=e)
+            self.emit_hook('on_error', event)
+            raise
+        event.finish(status_code, len(body) if isinstance(body, bytes) else content_length(body.headers))
+        self.emit_hook('after_response', event)
+        if status_code >= 400:
+            self.emit_hook('on_error', event)
+        return status_code, body
+
+    async def _perform_with_retries(self, method, url, params, data, headers, stream, event=None):
+        if self.token.expires_within(self.refresh_margin):
+            await self.refresh_token_once(self.token.access_token)
+        payload = {'access_token': self.token.access_token}
+        if params:
+            payload.update(params)
+        session = await self.get_session()
+        attempt = 1
+        replayed = False
+        while True:
+            try:
+                status_code, body, response_headers = await self._send(session, method, url, payload, data, headers,
+                                                                        stream, event, attempt)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not self.retry_policy.should_retry(method, attempt):
+                    if attempt > 1:
+                        self.retry_stats.record_exhausted()
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+            else:
+                self.rate_limiter.update(response_headers)
+                retry_after = retry_after_seconds(response_headers)
+                if status_code == 429:
+                    self.rate_limiter.pause(1 if retry_after is None else retry_after)
+                if status_code == 401 and not replayed:
+                    replayed = True
+                    await self.refresh_token_once(payload['access_token'])
+                    payload['access_token'] = self.token.access_token
+                    continue
+                if status_code in (200, 201, 204) or not self.retry_policy.should_retry(method, attempt, status_code):
+                    break
+                delay = self.retry_policy.backoff(attempt, retry_after)
+            self.retry_stats.record_retry(attempt, delay)
+            if event is not None:
+                event.retries += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+        if attempt > 1 and status_code not in (200, 201, 204):
+            self.retry_stats.record_exhausted()
+        return status_code, body
+
+    async def _send(self, session, method, url, payload, data, headers, stream=False, event=None, attempt=1):
+        async with self.semaphore:
+            wait = self.rate_limiter.reserve()
+            if wait > 0:
+                if event is not None:
+                    event.rate_limit_wait += wait
+                await asyncio.sleep(wait)
+                if self.tracer is not None:
+                    self.tracer.record('rate_limit_wait', wait)
+            with start_span(self.tracer, 'send', attempt=attempt) as span:
+                r = await session.request(method, url, params=_query_params(payload), data=data, headers=headers)
+                if span is not None:
+                    span.set(status=r.status)
+            if stream and r.status == 200:
+                return r.status, r, r.headers  # The caller reads the body and releases the connection
+            try:
+                return r.status, await r.read(), r.headers
+            finally:
+                r.release()
+
+    def _decode_response(self, status_code, body):
+        if status_code == 204:
+            return None
+        try:
+            json_response = self.codec.loads(body)
+        except ValueError:
+            raise ApiException(status_code, body.decode('utf-8', 'replace'), None)
+        if status_code != 200 and status_code != 201:
+            raise ApiException(status_code, body.decode('utf-8', 'replace'), json_response)
+        return json_response
+
+    def paginate(self, url, key, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over every record of a paginated list endpoint, one page at a time.
+        The ``iter_*`` methods of the service objects return the result, so use them with ``async for``.
+
+        Args:
+            url: URL of the list endpoint.
+            key: Key of the JSON response holding the records, e.g. 'contacts'.
+            params: Parameters of the request. limit and offset are used as page size and starting offset.
+                Defaults to None.
+            page_size: Number of records per request. Defaults to the limit in params, or 1000.
+            concurrency: Number of pages requested in parallel once the first page returned the total count.
+                Records are still yielded in order. Defaults to 1.
+            stream: Whether to decode every page while it is received instead of loading it whole, see
+                :meth:`stream`. Pages are then requested one at a time. Defaults to False.
+
+        Returns:
+            An asynchronous generator yielding one record at a time.
+        """
+        operation = current_operation.get()  # Kept for the pages requested later, as tasks of the event loop
+        if stream:
+            return aiter_streamed_records(in_operation(operation, self.stream), url, key, params, page_size)
+        return aiter_records(atraced_pages(self.tracer, in_operation(operation, self.request), key), url, key, params,
+                             page_size, concurrency)
+
+
+def _query_params(params):
+    """Converts the parameters to the types aiohttp accepts in a query string, dropping None values like requests.
+    """
+    items = params.items() if isinstance(params, dict) else params
+    query = []
+    for key, value in items:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        query.append((key, value))
+    return query
+
+
+def _trace_config(tracer):
+    """Builds the aiohttp trace configuration recording DNS resolutions and new connections as spans.
+    """
+    config = aiohttp.TraceConfig()
+
+    async def on_dns_resolvehost_start(session, context, params):
+        context.dns_started = time.perf_counter()
+
+    async def on_dns_resolvehost_end(session, context, params):
+        tracer.record('dns', time.perf_counter() - context.dns_started, host=params.host)
+
+    async def on_connection_create_start(session, context, params):
+        context.connect_started = time.perf_counter()
+
+    async def on_connection_create_end(session, context, params):
+        tracer.record('connect', time.perf_counter() - context.connect_started)
+
+    config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    config.on_connection_create_start.append(on_connection_create_start)
+    config.on_connection_create_end.append(on_connection_create_end)
+    return config
@@ -0,0 +1,372 @@
+import contextvars
+import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+from infusionsoft.infusionsoft import ApiException
+from infusionsoft.tracing import start_span
+
+APPLIED_STATUSES = ('SUCCESS', 'DUPLICATE')
+
+
+class BulkResult:
+    """Per-ID report of a bulk operation: succeeded lists the IDs that succeeded and failed maps every other ID to
+    the reason of its failure.
+    """
+
+    def __init__(self):
+        self.succeeded = []
+        self.failed = {}
+
+    def add_success(self, item_id):
+        self.succeeded.append(item_id)
+
+    def add_failure(self, item_id, reason):
+        self.failed[item_id] = reason
+
+    @property
+    def ok(self):
+        """True if every ID succeeded, false otherwise.
+        """
+        return not self.failed
+
+    def __str__(self):
+        return f'Succeeded: {len(self.succeeded)}\nFailed: {len(self.failed)}'
+
+
+class UpsertReport:
+    """Counters of a streaming upsert, updated while it runs and passed to the progress callback.
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        """Records processed per second.
+        """
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f'Processed: {self.processed}\nSucceeded: {self.succeeded}\nFailed: {self.failed}\n' \
+               f'Rate: {self.rate:.1f} records/s'
+
+
+def chunks(iterable, size):
+    """Lazily splits an iterable into lists of at most the given size.
+
+    Args:
+        iterable: The items to split.
+        size: The maximum size of each list.
+
+    Returns:
+        A generator yielding one list at a time.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batches(function, batches, concurrency):
+    """Calls the function on every batch from a bounded thread pool.
+    Batches are pulled from the iterable only when a worker is free, so at most concurrency batches are in memory.
+    Every call runs in a copy of the caller context, so the requests are attributed to the caller's operation.
+
+    Args:
+        function: The callable receiving a batch.
+        batches: Iterable of batches.
+        concurrency: Maximum number of calls in flight.
+
+    Returns:
+        A generator yielding a (batch, result, exception) tuple for every batch, in completion order.
+    """
+    batches = iter(batches)
+    pending = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for batch in islice(batches, concurrency):
+                pending[executor.submit(contextvars.copy_context().run, function, batch)] = batch
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = pending.pop(future)
+                    for next_batch in islice(batches, 1):
+                        pending[executor.submit(contextvars.copy_context().run, function, next_batch)] = next_batch
+                    error = future.exception()
+                    yield batch, None if error else future.result(), error
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def arun_batches(function, batches, concurrency):
+    """Asynchronous counterpart of :func:`run_batches`, for clients whose request method is a coroutine.
+    Every call runs as a task of the running event loop, and batches are pulled from the iterable only when fewer
+    than concurrency calls are in flight.
+
+    Args:
+        function: The coroutine function receiving a batch.
+        batches: Iterable of batches.
+        concurrency: Maximum number of calls in flight.
+
+    Returns:
+        An asynchronous generator yielding a (batch, result, exception) tuple for every batch, in completion order.
+    """
+    import asyncio  # Imported here so that synchronous clients do not pay for importing asyncio
+    batches = iter(batches)
+    pending = {}
+    try:
+        for batch in islice(batches, concurrency):
+            pending[asyncio.ensure_future(function(batch))] = batch
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                batch = pending.pop(future)
+                for next_batch in islice(batches, 1):
+                    pending[asyncio.ensure_future(function(next_batch))] = next_batch
+                error = future.exception()
+                yield batch, None if error else future.result(), error
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def is_async(infusionsoft):
+    """Checks whether a client is asynchronous, e.g. an AsyncInfusionsoft, whose request method is a coroutine.
+
+    Args:
+        infusionsoft: The client.
+
+    Returns:
+        True if the requests of the client must be awaited, false otherwise.
+    """
+    return inspect.iscoroutinefunction(infusionsoft.request)
+
+
+def _failure_reason(error):
+    if isinstance(error, ApiException):
+        return f'{error.status_code}: {error.message}'
+    return repr(error)
+
+
+def bulk_apply_tag(tags, tag_id, contact_ids, batch_size=1000, concurrency=4):
+    """Applies a tag to any number of contacts, in batches sent in parallel.
+
+    Args:
+        tags:
+            The Tags object of the client, whose rate limiter and retry policy apply to every batch.
+        tag_id:
+            The ID of the tag.
+        contact_ids:
+            Iterable of contact IDs, consumed lazily.
+        batch_size:
+            Number of contacts per request. Defaults to 1000.
+        concurrency:
+            Maximum number of requests in flight. Defaults to 4.
+
+    Returns:
+        The BulkResult listing the contacts tagged or already tagged, and the reason of every failure. With an
+        asynchronous client, a coroutine returning it, the batches being sent as tasks of the event loop.
+    """
+    url = f'{tags.service_url}/{tag_id}/contacts'
+    tracer = tags.infusionsoft.tracer
+    if is_async(tags.infusionsoft):
+        async def apply_async(batch):
+            with start_span(tracer, 'batch', size=len(batch)):
+                return await tags.infusionsoft.request('post', url, json={'ids': batch})
+
+        return _abulk_tag('bulk_apply_tag', apply_async, _add_applied, tracer, tag_id, contact_ids, batch_size,
+                          concurrency)
+
+    def apply(batch):
+        with start_span(tracer, 'batch', size=len(batch)):
+            return tags.infusionsoft.request('post', url, json={'ids': batch})
+
+    result = BulkResult()
+    with start_span(tracer, 'bulk_apply_tag', tag_id=tag_id, batch_size=batch_size, concurrency=concurrency) as job:
+        for batch, statuses, error in run_batches(apply, chunks(contact_ids, batch_size), concurrency):
+            _add_applied(result, batch, statuses, error)
+        if job is not None:
+            job.set(succeeded=len(result.succeeded), failed=len(result.failed))
+    return result
+
+
+def _add_applied(result, batch, statuses, error):
+    for contact_id in batch:
+        if error is not None:
+            result.add_failure(contact_id, _failure_reason(error))
+            continue
+        status = (statuses or {}).get(str(contact_id), 'SUCCESS')
+        if status in APPLIED_STATUSES:
+            result.add_success(contact_id)
+        else:
+            result.add_failure(contact_id, status)
+
+
+def _add_removed(result, batch, answer, error):
+    for contact_id in batch:
+        if error is not None:
+            result.add_failure(contact_id, _failure_reason(error))
+        else:
+            result.add_success(contact_id)
+
+
+async def _abulk_tag(name, send, add, tracer, tag_id, contact_ids, batch_size, concurrency):
+    result = BulkResult()
+    with start_span(tracer, name, tag_id=tag_id, batch_size=batch_size, concurrency=concurrency) as job:
+        async for batch, answer, error in arun_batches(send, chunks(contact_ids, batch_size), concurrency):
+            add(result, batch, answer, error)
+        if job is not None:
+            job.set(succeeded=len(result.succeeded), failed=len(result.failed))
+    return result
+
+
+def bulk_remove_tag(tags, tag_id, contact_ids, batch_size=100, concurrency=4):
+    """Removes a tag from any number of contacts, in batches sent in parallel.
+
+    Args:
+        tags:
+            The Tags object of the client, whose rate limiter and retry policy apply to every batch.
+        tag_id:
+            The ID of the tag.
+        contact_ids:
+            Iterable of contact IDs, consumed lazily.
+        batch_size:
+            Number of contacts per request, kept small since the IDs are sent in the query string. Defaults to 100.
+        concurrency:
+            Maximum number of requests in flight. Defaults to 4.
+
+    Returns:
+        The BulkResult listing the contacts the tag was removed from, and the reason of every failure. With an
+        asynchronous client, a coroutine returning it, the batches being sent as tasks of the event loop.
+    """
+    url = f'{tags.service_url}/{tag_id}/contacts'
+    tracer = tags.infusionsoft.tracer
+    if is_async(tags.infusionsoft):
+        async def remove_async(batch):
+            with start_span(tracer, 'batch', size=len(batch)):
+                return await tags.infusionsoft.request('delete', url, params={'ids': _joined(batch)})
+
+        return _abulk_tag('bulk_remove_tag', remove_async, _add_removed, tracer, tag_id, contact_ids, batch_size,
+                          concurrency)
+
+    def remove(batch):
+        with start_span(tracer, 'batch', size=len(batch)):
+            return tags.infusionsoft.request('delete', url, params={'ids': _joined(batch)})
+
+    result = BulkResult()
+    with start_span(tracer, 'bulk_remove_tag', tag_id=tag_id, batch_size=batch_size, concurrency=concurrency) as job:
+        for batch, answer, error in run_batches(remove, chunks(contact_ids, batch_size), concurrency):
+            _add_removed(result, batch, answer, error)
+        if job is not None:
+            job.set(succeeded=len(result.succeeded), failed=len(result.failed))
+    return result
+
+
+def _joined(contact_ids):
+    return ','.join(str(contact_id) for contact_id in contact_ids)
+
+
+def bulk_upsert_contacts(contact, records, concurrency=8, reject_file=None, progress=None, progress_every=1000,
+                         duplicate_option='Email'):
+    """Creates or updates any number of contacts, streaming the records through a bounded pool of workers.
+    Records are read from the iterable only when a worker is free and nothing is kept once they are sent, so the
+    memory used does not depend on the number of records.
+
+    Args:
+        contact:
+            The Contact object of the client, whose rate limiter and retry policy apply to every upsert.
+        records:
+            Iterable of contact payloads, e.g. a generator parsing a CSV or NDJSON feed.
+        concurrency:
+            Maximum number of upserts in flight. Defaults to 8.
+        reject_file:
+            Path or text file where every failed record is written as a JSON line with its error. Values that are
+            not JSON serializable are written as strings. Defaults to None.
+        progress:
+            Callable receiving the UpsertReport every progress_every records and at the end. Defaults to None.
+        progress_every:
+            Number of records between two progress calls. Defaults to 1000.
+        duplicate_option:
+            The duplicate_option sent with the records that do not set one. Defaults to 'Email'.
+
+    Returns:
+        The final UpsertReport. With an asynchronous client, a coroutine returning it, the upserts being sent as
+        tasks of the event loop.
+    """
+    payloads = ({'duplicate_option': duplicate_option, **record} for record in records)
+    if is_async(contact.infusionsoft):
+        return _abulk_upsert_contacts(contact, payloads, concurrency, reject_file, progress, progress_every)
+    run = _UpsertRun(reject_file, progress, progress_every)
+    try:
+        with start_span(contact.infusionsoft.tracer, 'bulk_upsert_contacts', concurrency=concurrency) as job:
+            for batch, _, error in run_batches(lambda batch: contact.create_update_contact(batch[0]),
+                                               chunks(payloads, 1), concurrency):
+                run.add(batch[0], error)
+            if job is not None:
+                job.set(processed=run.report.processed, succeeded=run.report.succeeded, failed=run.report.failed)
+    finally:
+        run.close()
+    return run.finish()
+
+
+async def _abulk_upsert_contacts(contact, payloads, concurrency, reject_file, progress, progress_every):
+    async def upsert(batch):
+        return await contact.create_update_contact(batch[0])
+
+    run = _UpsertRun(reject_file, progress, progress_every)
+    try:
+        with start_span(contact.infusionsoft.tracer, 'bulk_upsert_contacts', concurrency=concurrency) as job:
+            async for batch, _, error in arun_batches(upsert, chunks(payloads, 1), concurrency):
+                run.add(batch[0], error)
+            if job is not None:
+                job.set(processed=run.report.processed, succeeded=run.report.succeeded, failed=run.report.failed)
+    finally:
+        run.close()
+    return run.finish()
+
+
+class _UpsertRun:
+    """Report, reject file and progress calls of a streaming upsert, shared by the synchronous and asyncio paths.
+    """
+
+    def __init__(self, reject_file, progress, progress_every):
+        self.report = UpsertReport()
+        self.reject_file = reject_file
+        self.rejects = open(reject_file, 'a', encoding='utf-8') if isinstance(reject_file, str) else reject_file
+        self.progress = progress
+        self.progress_every = progress_every
+
+    def add(self, record, error):
+        report = self.report
+        report.processed += 1
+        if error is None:
+            report.succeeded += 1
+        else:
+            report.failed += 1
+            if self.rejects is not None:
+                self.rejects.write(json.dumps({'record': record, 'error': _failure_reason(error)}, default=str)
+                                   + '\n')
+        report.elapsed = time.monotonic() - report.started
+        if self.progress is not None and report.processed % self.progress_every == 0:
+            self.progress(report)
+
+    def close(self):
+        if self.rejects is not None and self.rejects is not self.reject_file:
+            self.rejects.close()
+
+    def finish(self):
+        report = self.report
+        report.elapsed = time.monotonic() - report.started
+        if self.progress is not None and (report.processed % self.progress_every or not report.processed):
+            self.progress(report)
+        return report
@@ -0,0 +1,147 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+READ_MOSTLY_TTLS = {
+    r'/model$': 3600,
+    r'/locales/countries(/[^/]+/provinces)?$': 86400,
+    r'/setting/': 3600,
+    r'(^|/[^/]*[^/\d][^/]*)/tags(/\d+)?$': 600,  # The tags and a tag, not the tags of a contact
+    r'/opportunity/stage_pipeline$': 3600,
+    r'/merchants$': 3600,
+}
+
+
+class ResponseCache:
+    """Bounded LRU cache of the JSON answers of GET requests, with a time to live for each endpoint.
+
+    Entries are keyed by method, URL and query parameters, the access token excluded. An endpoint is cached only if
+    one of the TTL patterns matches its URL path, or if a default TTL is set. Writes performed through the client
+    invalidate the cached entries of the written resource and of its collection.
+    """
+
+    def __init__(self, maxsize=1024, ttls=None, default_ttl=0):
+        """Creates a new ResponseCache object.
+
+        Args:
+            maxsize: Maximum number of cached answers, the least recently used ones are evicted first.
+                Defaults to 1024.
+            ttls: Dictionary mapping a regular expression searched in the URL path to the seconds its answers are
+                kept. The first matching pattern wins. Defaults to READ_MOSTLY_TTLS, covering the models, locales,
+                settings, tags, opportunity stage pipeline and merchants.
+            default_ttl: Seconds the answers of the other endpoints are kept, 0 to not cache them. Defaults to 0.
+        """
+        self.maxsize = maxsize
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls if ttls is not None
+                                                                     else READ_MOSTLY_TTLS).items()]
+        self.default_ttl = default_ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(method, url, params=None):
+        """Builds the cache key of a request.
+
+        Args:
+            method: The HTTP method.
+            url: URL of the REST endpoint.
+            params: Parameters of the request. Defaults to None.
+
+        Returns:
+            A hashable key.
+        """
+        items = params.items() if isinstance(params, dict) else (params or ())
+        query = tuple(sorted((str(name), repr(value)) for name, value in items if name != 'access_token'))
+        return method.lower(), url, query
+
+    def ttl_for(self, url):
+        """Finds the time to live of the answers of an endpoint.
+
+        Args:
+            url: URL of the REST endpoint.
+
+        Returns:
+            The number of seconds the answers are kept, 0 if they are not cached.
+        """
+        path = urlsplit(url).path
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+        return self.default_ttl
+
+    def get(self, key):
+        """Looks up a cached answer.
+
+        Args:
+            key: The key built by :meth:`key`.
+
+        Returns:
+            A (found, value) tuple.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, ttl):
+        """Caches an answer.
+
+        Args:
+            key: The key built by :meth:`key`.
+            value: The parsed JSON answer. It is shared by every later hit, so it should not be modified.
+            ttl: The number of seconds the answer is kept.
+        """
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, url=None, subtree=True):
+        """Removes cached answers.
+
+        Args:
+            url: URL whose answers are removed, whatever their parameters. Defaults to None, which clears the cache.
+            subtree: Whether to also remove the answers of the URLs below it, e.g. /contacts/1/tags for /contacts/1.
+                Defaults to True.
+
+        Returns:
+            The number of removed answers.
+        """
+        with self.lock:
+            if url is None:
+                removed = len(self.entries)
+                self.entries.clear()
+                return removed
+            url = url.rstrip('/')
+            prefix = f'{url}/'
+            keys = [key for key in self.entries if key[1] == url or (subtree and key[1].startswith(prefix))]
+            for key in keys:
+                del self.entries[key]
+            return len(keys)
+
+    def clear(self):
+        """Removes every cached answer.
+        """
+        self.invalidate()
+
+    def snapshot(self):
+        """Returns the current counters.
+
+        Returns:
+            A dictionary with the number of hits, misses, evictions and cached answers.
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self.entries)}
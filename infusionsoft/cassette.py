@@ -0,0 +1,320 @@
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from infusionsoft.infusionsoft import InfusionsoftException
+
+CASSETTE_VERSION = 1
+
+# Names of the query string parameters, form fields and JSON fields replaced before anything is written
+SCRUBBED_FIELDS = ('access_token', 'refresh_token', 'client_secret', 'code')
+SCRUBBED_VALUE = 'REDACTED'
+
+# Answer headers kept in the cassette, the ones the client reads
+RECORDED_HEADERS = ('content-type', 'retry-after')
+RECORDED_HEADER_PREFIX = 'x-keap-'
+
+
+class CassetteMissException(InfusionsoftException):
+    """Exception raised when a replayed cassette holds no answer for a request.
+    """
+
+
+class Cassette:
+    """Request and answer pairs of a client, recorded from Keap and replayed without network access.
+
+    In record mode every call goes to Keap as usual and is appended to the cassette file, one JSON object per line,
+    compressed with gzip when the path ends with '.gz'. Tokens, refresh tokens and client secrets are replaced in
+    the URLs and bodies before they are written, and only the answer headers read by the client are kept.
+
+    In replay mode the calls are answered from the file. A request is matched on its method, its URL without the
+    access token and its body, so concurrent calls get their own answer whatever the order they are sent in, and
+    identical requests get their answers in the recorded order. Every answer is delayed by its recorded duration
+    multiplied by the timing factor, and held until its recorded time since the first call, multiplied by the same
+    factor, so the gaps of the recorded traffic are reproduced too. A job can be replayed with the timing of
+    production, faster, or without any wait to measure the overhead of the client alone.
+
+    Example::
+
+        with Cassette('sync.jsonl.gz', mode='record') as cassette:
+            client = Infusionsoft(client_id, client_secret, cassette=cassette)
+            ...
+        client = Infusionsoft(client_id, client_secret, cassette=Cassette('sync.jsonl.gz', timing=0))
+    """
+
+    def __init__(self, path, mode='replay', timing=1.0, match_body=True, repeat=False, schedule=True):
+        """Creates a new Cassette object. In replay mode the whole file is loaded.
+
+        Args:
+            path: Path of the cassette file.
+            mode: 'record' to append the calls to the file, or 'replay' to answer them from it. Defaults to 'replay'.
+            timing: Factor applied to the recorded durations when replaying, 1 for the original timing and 0 for no
+                wait. Defaults to 1.
+            match_body: Whether the request body must match when replaying. Defaults to True.
+            repeat: Whether the answers of a request are replayed again once all of them were used, instead of
+                raising CassetteMissException. Defaults to False.
+            schedule: Whether an answer is held until its recorded offset from the first call, scaled by timing,
+                when the client asks for it earlier. False only applies the recorded durations. Defaults to True.
+
+        Raises:
+            ValueError: If the mode is unknown or the file is not a cassette.
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f'Unknown cassette mode "{mode}", expected "record" or "replay".')
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self.match_body = match_body
+        self.repeat = repeat
+        self.schedule = schedule
+        self.lock = threading.Lock()
+        self.file = None
+        self.started = None
+        self.interactions = {}
+        self.recorded = 0
+        self.replayed = 0
+        if mode == 'replay':
+            self.load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.recorded if self.mode == 'record' else sum(map(len, self.interactions.values()))
+
+    def _open(self, file_mode):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, file_mode + 't', encoding='utf-8')
+        return open(self.path, file_mode, encoding='utf-8')
+
+    def load(self):
+        """Reads the file, replacing the answers not replayed yet.
+
+        Raises:
+            ValueError: If the file is not a cassette or was written by a newer version.
+        """
+        interactions = {}
+        with self._open('r') as file:
+            header = json.loads(file.readline() or '{}')
+            if header.get('cassette') != CASSETTE_VERSION:
+                raise ValueError(f'{self.path} is not a version {CASSETTE_VERSION} cassette.')
+            for line in file:
+                if line.strip():
+                    interaction = json.loads(line)
+                    interactions.setdefault(self._key(interaction['method'], interaction['url'],
+                                                      interaction.get('body')), deque()).append(interaction)
+        with self.lock:
+            self.interactions = interactions
+            self.started = None
+
+    def close(self):
+        """Flushes and closes the file in record mode.
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def adapter(self, inner):
+        """Wraps the transport adapter of a session.
+
+        Args:
+            inner: The HTTPAdapter sending the requests to Keap, used in record mode only.
+
+        Returns:
+            The adapter to mount on the session.
+        """
+        return CassetteAdapter(self, inner)
+
+    def _key(self, method, url, body):
+        return method.upper(), url, body if self.match_body else None
+
+    def record(self, request, response, started, elapsed):
+        """Appends a call to the file.
+
+        Args:
+            request: The PreparedRequest.
+            response: The Response, whose body is read.
+            started: time.monotonic() when the request was sent.
+            elapsed: Seconds until the whole answer was received.
+        """
+        content = response.content
+        try:
+            body, encoding = scrub_body(content.decode('utf-8'), response.headers.get('Content-Type')), None
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() in RECORDED_HEADERS or name.lower().startswith(RECORDED_HEADER_PREFIX)}
+        interaction = {'method': request.method.upper(), 'url': scrub_url(request.url),
+                       'body': _request_body(request), 'status': response.status_code, 'headers': headers,
+                       'response': body, 'elapsed': round(elapsed, 6)}
+        if encoding is not None:
+            interaction['encoding'] = encoding
+        with self.lock:
+            if self.file is None:
+                new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                self.file = self._open('a')
+                if new:
+                    self.file.write(json.dumps({'cassette': CASSETTE_VERSION}) + '\n')
+                self.started = started
+            interaction['offset'] = round(started - self.started, 6)
+            self.file.write(json.dumps(interaction, separators=(',', ':'), ensure_ascii=False) + '\n')
+            self.recorded += 1
+
+    def replay(self, request):
+        """Finds the recorded answer of a request.
+
+        Args:
+            request: The PreparedRequest.
+
+        Returns:
+            The recorded interaction.
+
+        Raises:
+            CassetteMissException: If no answer was recorded for the request, or all of them were used.
+        """
+        key = self._key(request.method, scrub_url(request.url), _request_body(request))
+        with self.lock:
+            answers = self.interactions.get(key)
+            if not answers:
+                raise CassetteMissException(f'No recorded answer for {request.method} {scrub_url(request.url)}')
+            interaction = answers.popleft()
+            if self.repeat:
+                answers.append(interaction)
+            self.replayed += 1
+        return interaction
+
+    def delay(self, interaction):
+        """Computes how long the answer of a replayed call is held, the first replayed call setting the origin of
+        the recorded offsets.
+
+        Args:
+            interaction: The interaction returned by :meth:`replay`.
+
+        Returns:
+            The number of seconds to wait before answering.
+        """
+        now = time.monotonic()
+        delay = interaction['elapsed'] * self.timing
+        offset = interaction.get('offset')
+        if not self.schedule or offset is None or self.timing <= 0:
+            return delay
+        with self.lock:
+            if self.started is None:
+                self.started = now - offset * self.timing
+            ready = self.started + (offset + interaction['elapsed']) * self.timing
+        return max(delay, ready - now)
+
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter recording the calls of a session into a Cassette, or answering them from it.
+    """
+
+    def __init__(self, cassette, inner):
+        super().__init__()
+        self.cassette = cassette
+        self.inner = inner
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.cassette.mode == 'record':
+            started = time.monotonic()
+            response = self.inner.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert,
+                                       proxies=proxies)
+            response.content  # Read before recording, streamed answers included
+            self.cassette.record(request, response, started, time.monotonic() - started)
+            return response
+        interaction = self.cassette.replay(request)
+        delay = self.cassette.delay(interaction)
+        if delay > 0:
+            time.sleep(delay)
+        return _build_response(request, interaction)
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
+        self.cassette.close()
+
+
+def scrub_url(url):
+    """Removes the access token and the other secrets from the query string of a URL, and sorts it.
+
+    Args:
+        url: The URL.
+
+    Returns:
+        The scrubbed URL.
+    """
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name != 'access_token')
+    query = [(name, SCRUBBED_VALUE if name in SCRUBBED_FIELDS else value) for name, value in query]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def scrub_body(body, content_type=None):
+    """Replaces the secrets of a form or JSON body.
+
+    Args:
+        body: The body, as text.
+        content_type: The Content-Type header of the body. Defaults to None.
+
+    Returns:
+        The scrubbed body.
+    """
+    if not body:
+        return body
+    if content_type and 'form-urlencoded' in content_type:
+        fields = [(name, SCRUBBED_VALUE if name in SCRUBBED_FIELDS else value)
+                  for name, value in parse_qsl(body, keep_blank_values=True)]
+        return urlencode(fields)
+    if not any(field in body for field in SCRUBBED_FIELDS):
+        return body
+    try:
+        document = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(document, dict):
+        return body
+    return json.dumps({name: SCRUBBED_VALUE if name in SCRUBBED_FIELDS else value
+                       for name, value in document.items()}, separators=(',', ':'), ensure_ascii=False)
+
+
+def _request_body(request):
+    body = request.body
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    return scrub_body(body, request.headers.get('Content-Type'))
+
+
+def _build_response(request, interaction):
+    response = Response()
+    response.status_code = interaction['status']
+    response.headers = CaseInsensitiveDict(interaction.get('headers') or {})
+    if interaction.get('encoding') == 'base64':
+        response._content = base64.b64decode(interaction['response'])
+    else:
+        response._content = (interaction.get('response') or '').encode('utf-8')
+    response._content_consumed = True
+    response.headers.setdefault('Content-Length', str(len(response._content)))
+    response.encoding = 'utf-8'
+    response.url = request.url
+    response.request = request
+    response.reason = 'Replayed'
+    response.elapsed = timedelta(seconds=interaction['elapsed'])
+    return response
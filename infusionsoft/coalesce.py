@@ -0,0 +1,119 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestCoalescer:
+    """Makes concurrent identical requests share one network call.
+
+    The first caller of a key performs the call, the callers arriving while it is in flight wait for it and receive
+    the same parsed answer, or the same exception. The answer is shared, so it should not be modified.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.calls_made = 0
+        self.calls_saved = 0
+
+    def do(self, key, function):
+        """Calls the function, unless a call with the same key is in flight, in which case its result is reused.
+
+        Args:
+            key: The hashable key identifying identical requests.
+            function: The callable performing the request.
+
+        Returns:
+            The result of the function.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+                self.calls_made += 1
+            else:
+                self.calls_saved += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+
+    def snapshot(self):
+        """Returns the current counters.
+
+        Returns:
+            A dictionary with the number of calls performed and of calls saved by sharing an in-flight one.
+        """
+        with self.lock:
+            return {'calls_made': self.calls_made, 'calls_saved': self.calls_saved}
+
+
+class AsyncRequestCoalescer:
+    """Asyncio counterpart of :class:`RequestCoalescer`, sharing in-flight coroutines of the same event loop.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.calls_made = 0
+        self.calls_saved = 0
+
+    async def do(self, key, function):
+        """Awaits the coroutine function, unless a call with the same key is in flight, in which case its result is
+        reused. The call runs as its own task, so a cancelled caller does not cancel the others waiting for it, and
+        it is cancelled only when every caller waiting for it was.
+
+        Args:
+            key: The hashable key identifying identical requests.
+            function: The coroutine function performing the request.
+
+        Returns:
+            The result of the coroutine.
+        """
+        import asyncio  # Imported here so that synchronous clients do not pay for importing asyncio
+        call = self.calls.get(key)
+        if call is None:
+            call = self.calls[key] = _AsyncCall(asyncio.ensure_future(function()))
+            call.task.add_done_callback(lambda task: self.calls.pop(key) if self.calls.get(key) is call else None)
+            self.calls_made += 1
+        else:
+            self.calls_saved += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1:
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def snapshot(self):
+        """Returns the current counters.
+
+        Returns:
+            A dictionary with the number of calls performed and of calls saved by sharing an in-flight one.
+        """
+        return {'calls_made': self.calls_made, 'calls_saved': self.calls_saved}
+
+
+class _AsyncCall:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
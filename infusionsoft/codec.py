@@ -0,0 +1,107 @@
+import importlib
+import importlib.util
+import json
+from abc import ABCMeta, abstractmethod
+
+
+class JsonCodec(metaclass=ABCMeta):
+    """Abstract class for the JSON encoder and decoder of the request bodies and of the answers.
+
+    Codecs backed by an optional library name it in ``module``, which is imported when the codec is created, so that
+    only the library of the selected codec is loaded.
+    """
+    name = None
+    module = None
+
+    def __init__(self):
+        self.library = importlib.import_module(self.module) if self.module is not None else None
+
+    @abstractmethod
+    def dumps(self, obj):
+        """Serializes an object.
+
+        Args:
+            obj: The JSON serializable Python object.
+
+        Returns:
+            The UTF-8 encoded JSON document.
+        """
+
+    @abstractmethod
+    def loads(self, data):
+        """Parses a JSON document.
+
+        Args:
+            data: The document, as bytes or str.
+
+        Returns:
+            The Python object.
+
+        Raises:
+            ValueError: If the document is not valid JSON.
+        """
+
+    @classmethod
+    def available(cls):
+        """Checks whether the library backing the codec is installed.
+
+        Returns:
+            True if the codec can be used, false otherwise.
+        """
+        return cls.module is None or importlib.util.find_spec(cls.module) is not None
+
+
+class StdlibCodec(JsonCodec):
+    """Codec backed by the :mod:`json` module of the standard library, always available.
+    """
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by `orjson <https://github.com/ijl/orjson>`.
+    """
+    name = 'orjson'
+    module = 'orjson'
+
+    def __init__(self):
+        super().__init__()
+        self.option = self.library.OPT_NON_STR_KEYS
+
+    def dumps(self, obj):
+        return self.library.dumps(obj, option=self.option)
+
+    def loads(self, data):
+        return self.library.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    """Codec backed by `ujson <https://github.com/ultrajson/ultrajson>`.
+    """
+    name = 'ujson'
+    module = 'ujson'
+
+    def dumps(self, obj):
+        return self.library.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return self.library.loads(data)
+
+
+CODECS = {codec.name: codec for codec in (OrjsonCodec, UjsonCodec, StdlibCodec)}
+
+
+def default_codec():
+    """Picks the fastest installed codec: orjson, then ujson, then the standard library.
+
+    Returns:
+        A new codec object.
+    """
+    for codec in CODECS.values():
+        if codec.available():
+            return codec()
@@ -0,0 +1,855 @@
+import argparse
+import itertools
+import random
+import re
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from infusionsoft.codec import default_codec
+from infusionsoft.sync import parse_time
+from infusionsoft.token import Token
+
+API_PATH = '/crm/rest/v1'
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.000+0000'
+MAX_PAGE_SIZE = 1000
+
+# Stored collection -> number of records seeded by default
+DEFAULT_VOLUMES = {
+    'contacts': 1000, 'companies': 100, 'tags': 100, 'affiliates': 20, 'appointments': 50, 'campaigns': 10,
+    'emails': 200, 'files': 20, 'notes': 100, 'opportunities': 50, 'orders': 200, 'products': 50,
+    'subscriptions': 50, 'transactions': 200, 'tasks': 100, 'users': 10, 'hooks': 5, 'clawbacks': 20,
+    'affiliate_payments': 20, 'commissions': 50, 'programs': 5, 'redirects': 10, 'summaries': 20,
+}
+
+# Field linking the records of a stored collection to their parent, and the parent collection
+PARENTS = {
+    'emails': ('contact_id', 'contacts'), 'notes': ('contact_id', 'contacts'), 'tasks': ('contact_id', 'contacts'),
+    'opportunities': ('contact_id', 'contacts'), 'appointments': ('contact_id', 'contacts'),
+    'orders': ('contact_id', 'contacts'), 'subscriptions': ('contact_id', 'contacts'),
+    'transactions': ('order_id', 'orders'), 'clawbacks': ('affiliate_id', 'affiliates'),
+    'affiliate_payments': ('affiliate_id', 'affiliates'), 'commissions': ('affiliate_id', 'affiliates'),
+    'summaries': ('affiliate_id', 'affiliates'),
+}
+
+# List endpoint -> (stored collection, key of the records in the answer, field matching the ID in the path)
+LIST_ENDPOINTS = {
+    'affiliates': ('affiliates', 'affiliates', None),
+    'affiliates/{id}/clawbacks': ('clawbacks', 'clawbacks', 'affiliate_id'),
+    'affiliates/{id}/payments': ('affiliate_payments', 'payments', 'affiliate_id'),
+    'affiliates/commissions': ('commissions', 'commissions', None),
+    'affiliates/programs': ('programs', 'programs', None),
+    'affiliates/redirectlinks': ('redirects', 'redirects', None),
+    'affiliates/summaries': ('summaries', 'summaries', None),
+    'appointments': ('appointments', 'appointments', None),
+    'campaigns': ('campaigns', 'campaigns', None),
+    'companies': ('companies', 'companies', None),
+    'contacts': ('contacts', 'contacts', None),
+    'contacts/{id}/emails': ('emails', 'emails', 'contact_id'),
+    'emails': ('emails', 'emails', None),
+    'files': ('files', 'files', None),
+    'notes': ('notes', 'notes', None),
+    'opportunities': ('opportunities', 'opportunities', None),
+    'orders': ('orders', 'orders', None),
+    'orders/{id}/transactions': ('transactions', 'transactions', 'order_id'),
+    'products': ('products', 'products', None),
+    'subscriptions': ('subscriptions', 'subscriptions', None),
+    'tags': ('tags', 'tags', None),
+    'tasks': ('tasks', 'tasks', None),
+    'tasks/search': ('tasks', 'tasks', None),
+    'transactions': ('transactions', 'transactions', None),
+    'users': ('users', 'users', None),
+}
+
+# Endpoint -> stored collection of the records created, read, updated and deleted by ID
+RESOURCE_ENDPOINTS = {
+    'affiliates': 'affiliates', 'appointments': 'appointments', 'campaigns': 'campaigns', 'companies': 'companies',
+    'contacts': 'contacts', 'emails': 'emails', 'files': 'files', 'hooks': 'hooks', 'notes': 'notes',
+    'opportunities': 'opportunities', 'orders': 'orders', 'products': 'products', 'tags': 'tags', 'tasks': 'tasks',
+    'transactions': 'transactions', 'users': 'users',
+}
+
+# (method, endpoint) -> constant answer of the read-only endpoints
+STATIC_ANSWERS = {
+    ('GET', 'setting/application/configuration'): {'application': {'time_zone': 'America/Phoenix'},
+                                                    'contact': {'default_country': 'USA'}},
+    ('GET', 'setting/application/enabled'): {'value': 'yes'},
+    ('GET', 'setting/contact/optionTypes'): {'value': 'Lead,Customer,Partner'},
+    ('GET', 'locales/countries'): {'countries': {'USA': 'United States', 'CAN': 'Canada', 'FRA': 'France'}},
+    ('GET', 'locales/countries/{key}/provinces'): {'provinces': {'CA': 'California', 'NY': 'New York'}},
+    ('GET', 'merchants'): {'merchant_accounts': [{'id': 1, 'name': 'Test merchant', 'type': 'Test'}]},
+    ('GET', 'opportunity/stage_pipeline'): [{'id': 1, 'name': 'Default pipeline',
+                                             'stages': [{'id': 1, 'name': 'New'}, {'id': 2, 'name': 'Won'}]}],
+    ('GET', 'hooks/event_keys'): ['contact.add', 'contact.delete', 'contact.edit', 'contactGroup.applied',
+                                  'contactGroup.removed', 'order.add', 'order.edit'],
+    ('GET', 'oauth/connect/userinfo'): {'email': 'owner@example.com', 'family_name': 'Owner', 'given_name': 'App',
+                                        'global_user_id': 1, 'sub': '1'},
+    ('GET', 'products/sync'): {'product_statuses': [], 'sync_token': 'fake'},
+}
+
+# (method, endpoint) of the actions answered with an empty body
+ACTIONS = {
+    ('POST', 'campaigns/{id}/sequences/{id}/contacts'), ('DELETE', 'campaigns/{id}/sequences/{id}/contacts'),
+    ('POST', 'campaigns/{id}/sequences/{id}/contacts/{id}'),
+    ('DELETE', 'campaigns/{id}/sequences/{id}/contacts/{id}'), ('POST', 'campaigns/goals/{key}/{key}'),
+    ('POST', 'emails/queue'), ('POST', 'emails/unsync'), ('PUT', 'emailAddresses/{key}'),
+    ('DELETE', 'orders/{id}/items/{id}'), ('DELETE', 'products/{id}/image'), ('POST', 'products/{id}/image'),
+    ('DELETE', 'products/{id}/subscriptions/{id}'), ('POST', 'hooks/{id}/verify'),
+    ('POST', 'hooks/{id}/delayedVerify'), ('POST', 'users/{id}/signature'), ('GET', 'users/{id}/signature'),
+}
+
+# Attributes of the injected faults, changed by PATCH /_fake/faults
+FAULTS = ('latency', 'jitter', 'throttle_rate', 'error_rate', 'retry_after', 'rate_limit')
+
+_SEGMENTS = {'{id}': r'(\d+)', '{key}': r'([^/]+)'}
+_ID_SEGMENT = re.compile(r'(?<=/)\d+(?=/|$)|^\d+(?=/|$)')
+
+
+def _pattern(endpoint):
+    return re.compile('^' + re.sub(r'\{id\}|\{key\}', lambda m: _SEGMENTS[m.group(0)], endpoint) + '$')
+
+
+def _timestamp(moment):
+    return moment.strftime(TIME_FORMAT)
+
+
+class FakeKeapServer:
+    """In-process stand-in for the Keap REST API, to load test and benchmark the clients without network access
+    and without spending the quota of a real application.
+
+    The server answers the endpoints used by the service objects of ``infusionsoft.api`` from an in-memory data set
+    seeded deterministically, so two servers created with the same seed and volumes hold the same records. The list
+    endpoints paginate with limit and offset and filter on since and until like Keap, the bulk tag endpoints follow
+    the answers of Keap, and the token endpoint issues single-use refresh tokens. Latency, throttling (429) and
+    server errors (5xx) can be injected, also while the server is running.
+
+    The server can also run in its own process, so that it does not share the interpreter lock with the client
+    under test: ``python -m infusionsoft.fakeserver --volume contacts=100000 --latency 0.02``. It is then driven
+    through control endpoints, which need no token: ``POST /_fake/tokens`` issues a token, ``GET /_fake/stats``
+    returns :meth:`stats`, ``POST /_fake/stats/reset`` clears them and ``PATCH /_fake/faults`` changes the injected
+    faults, e.g. ``{"latency": 0.05, "error_rate": 0.01}``.
+
+    Example::
+
+        with FakeKeapServer(volumes={'contacts': 100000}, latency=0.02) as server:
+            client = server.client()
+            contacts = list(client.contact().iter_contact(concurrency=8))
+    """
+
+    def __init__(self, seed=0, volumes=None, latency=0.0, jitter=0.0, throttle_rate=0.0, error_rate=0.0,
+                 retry_after=1, rate_limit=None, token_lifetime=86400, host='127.0.0.1', port=0):
+        """Creates a new FakeKeapServer object, seeding its data. The server is started by :meth:`start`.
+
+        Args:
+            seed: Seed of the generated records and of the injected faults. Defaults to 0.
+            volumes: Dictionary overriding the number of records of some collections of DEFAULT_VOLUMES, e.g.
+                {'contacts': 100000}. Defaults to None.
+            latency: Seconds every answer is delayed by. Defaults to 0.
+            jitter: Maximum number of seconds randomly added to the latency. Defaults to 0.
+            throttle_rate: Probability of answering a request with 429 Too Many Requests. Defaults to 0.
+            error_rate: Probability of answering a request with 500, 502 or 503. Defaults to 0.
+            retry_after: Retry-After header of the 429 answers, in seconds. Defaults to 1.
+            rate_limit: Requests per second allowed, beyond which the server answers 429, and reported in the
+                x-keap-product-throttle-* headers. Defaults to None, which sets no limit.
+            token_lifetime: Seconds the issued access tokens are valid. Defaults to 86400.
+            host: Address to listen on. Defaults to '127.0.0.1'.
+            port: Port to listen on, 0 for a free one. Defaults to 0.
+        """
+        self.seed = seed
+        self.volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.token_lifetime = token_lifetime
+        self.address = (host, port)
+        self.codec = default_codec()
+        self.faults = random.Random(seed)
+        self.lock = threading.Lock()
+        self.records = {}
+        self.ids = {}
+        self.tagged = {}
+        self.emails = {}
+        self.access_tokens = {}
+        self.refresh_tokens = set()
+        self.requests = {}
+        self.statuses = {}
+        self.token_refreshes = 0
+        self.throttle_tokens = float(rate_limit or 0)
+        self.throttle_last = time.monotonic()
+        self.httpd = None
+        self.thread = None
+        self.routes = self._routes()
+        self._seed_records()
+
+    @property
+    def url(self):
+        """Root URL of the REST API, to pass as base_url to the clients.
+        """
+        return f'http://{self.address[0]}:{self.address[1]}{API_PATH}'
+
+    @property
+    def token_url(self):
+        """URL of the token endpoint, to pass as token_url to the clients.
+        """
+        return f'http://{self.address[0]}:{self.address[1]}/token'
+
+    def start(self):
+        """Starts serving from a daemon thread.
+
+        Returns:
+            The server itself.
+        """
+        if self.httpd is None:
+            self.httpd = _HTTPServer(self.address, _Handler, self)
+            self.address = self.httpd.server_address[:2]
+            self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-keap-server', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the listening socket.
+        """
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.thread.join()
+            self.httpd = None
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def issue_token(self, lifetime=None):
+        """Issues a valid token, e.g. for a client created by the caller.
+
+        Args:
+            lifetime: Seconds the access token is valid. Defaults to the token_lifetime of the server.
+
+        Returns:
+            The Token.
+        """
+        lifetime = self.token_lifetime if lifetime is None else lifetime
+        access_token = secrets.token_urlsafe(24)
+        refresh_token = secrets.token_urlsafe(24)
+        end_of_life = time.time() + lifetime
+        with self.lock:
+            self.access_tokens[access_token] = end_of_life
+            self.refresh_tokens.add(refresh_token)
+        return Token(access_token, refresh_token, str(int(end_of_life)))
+
+    def client(self, client_class=None, **kwargs):
+        """Creates a client of this server holding a valid token.
+
+        Args:
+            client_class: Infusionsoft or one of its subclasses, e.g. AsyncInfusionsoft. Defaults to Infusionsoft.
+            **kwargs: Arguments of the client. rate_limiter defaults to a RateLimiter following only the throttle
+                headers, and token_store to a MemoryTokenStore.
+
+        Returns:
+            The client.
+        """
+        from infusionsoft.infusionsoft import Infusionsoft
+        from infusionsoft.ratelimit import RateLimiter
+        from infusionsoft.tokenstore import MemoryTokenStore
+
+        client_class = client_class or Infusionsoft
+        kwargs.setdefault('rate_limiter', RateLimiter(rate=None))
+        kwargs.setdefault('token_store', MemoryTokenStore())
+        client = client_class('fake-client-id', 'fake-client-secret', base_url=self.url, token_url=self.token_url,
+                              **kwargs)
+        client.set_token(self.issue_token())
+        return client
+
+    def stats(self):
+        """Returns the requests received since the server was created or :meth:`reset_stats` was called.
+
+        Returns:
+            A dictionary with the number of requests by method and endpoint, e.g. 'GET contacts/{id}', the number
+            of answers by status code, and the number of token refreshes.
+        """
+        with self.lock:
+            return {'requests': dict(self.requests), 'statuses': dict(self.statuses),
+                    'token_refreshes': self.token_refreshes}
+
+    def reset_stats(self):
+        """Clears the request counters.
+        """
+        with self.lock:
+            self.requests.clear()
+            self.statuses.clear()
+            self.token_refreshes = 0
+
+    def handle(self, method, path, query, body, headers):
+        """Answers one request.
+
+        Args:
+            method: The HTTP method, in upper case.
+            path: Path of the URL.
+            query: Dictionary of the query string parameters, mapping names to lists of values.
+            body: The request body, as bytes.
+            headers: The request headers.
+
+        Returns:
+            A (status code, JSON serializable answer or None, dictionary of headers) tuple.
+        """
+        delay = self.latency + (self.faults.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if path.startswith('/_fake/'):
+            return self._control(method, path, body)
+        if path == '/token' and method == 'POST':
+            return self._count('POST token', *self._refresh(body))
+        if not path.startswith(API_PATH + '/'):
+            return self._count(f'{method} {path}', 404, {'message': f'No API at {path}'}, {})
+        endpoint = path[len(API_PATH) + 1:].strip('/')
+        name, handler, args = self._route(method, endpoint)
+        status, answer, headers_out = self._fault()
+        if status is None:
+            status, answer = self._authorize(query, headers)
+        if status is None:
+            try:
+                request = _Request(endpoint, args, _flatten(query), self.codec.loads(body) if body else None)
+            except ValueError:
+                status, answer = 400, {'message': 'Invalid JSON body'}
+            else:
+                if handler is None:
+                    status, answer = 404, {'message': f'No endpoint for {method} {endpoint}'}
+                else:
+                    try:
+                        status, answer = handler(request)
+                    except (AttributeError, KeyError, TypeError, ValueError) as e:
+                        status, answer = 400, {'message': f'Invalid request: {e}'}
+        return self._count(name, status, answer, {**self._throttle_headers(), **headers_out})
+
+    def _control(self, method, path, body):
+        try:
+            options = self.codec.loads(body) if body else {}
+        except ValueError:
+            return 400, {'message': 'Invalid JSON body'}, {}
+        if (method, path) == ('GET', '/_fake/stats'):
+            return 200, self.stats(), {}
+        if (method, path) == ('POST', '/_fake/stats/reset'):
+            self.reset_stats()
+            return 204, None, {}
+        if (method, path) == ('POST', '/_fake/tokens'):
+            token = self.issue_token(options.get('lifetime'))
+            return 201, {'access_token': token.access_token, 'refresh_token': token.refresh_token,
+                         'end_of_life': token.end_of_life}, {}
+        if (method, path) == ('PATCH', '/_fake/faults'):
+            for name in FAULTS:
+                if name in options:
+                    setattr(self, name, options[name])
+            return 200, {name: getattr(self, name) for name in FAULTS}, {}
+        return 404, {'message': f'No control endpoint for {method} {path}'}, {}
+
+    def _count(self, name, status, answer, headers):
+        with self.lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        return status, answer, headers
+
+    def _fault(self):
+        if self.rate_limit:
+            with self.lock:
+                now = time.monotonic()
+                self.throttle_tokens = min(self.rate_limit,
+                                           self.throttle_tokens + (now - self.throttle_last) * self.rate_limit)
+                self.throttle_last = now
+                throttled = self.throttle_tokens < 1
+                if not throttled:
+                    self.throttle_tokens -= 1
+            if throttled:
+                return 429, {'message': 'Quota exceeded'}, {'Retry-After': str(self.retry_after)}
+        draw = self.faults.random() if self.throttle_rate or self.error_rate else 1.0
+        if draw < self.throttle_rate:
+            return 429, {'message': 'Quota exceeded'}, {'Retry-After': str(self.retry_after)}
+        if draw < self.throttle_rate + self.error_rate:
+            return self.faults.choice((500, 502, 503)), {'message': 'Internal server error'}, {}
+        return None, None, {}
+
+    def _throttle_headers(self):
+        if not self.rate_limit:
+            return {}
+        return {'x-keap-product-throttle-limit': str(int(self.rate_limit * 60)),
+                'x-keap-product-throttle-interval': '1', 'x-keap-product-throttle-time-unit': 'minute',
+                'x-keap-product-throttle-available': str(max(0, int(self.throttle_tokens)))}
+
+    def _authorize(self, query, headers):
+        access_token = (query.get('access_token') or [None])[0]
+        authorization = headers.get('Authorization') or ''
+        if access_token is None and authorization.startswith('Bearer '):
+            access_token = authorization[7:]
+        with self.lock:
+            end_of_life = self.access_tokens.get(access_token)
+        if end_of_life is None or end_of_life < time.time():
+            return 401, {'message': 'Invalid Access Token'}
+        return None, None
+
+    def _refresh(self, body):
+        form = _flatten(parse_qs((body or b'').decode('utf-8')))
+        if form.get('grant_type') != 'refresh_token':
+            return 400, {'error': 'unsupported_grant_type'}, {}
+        with self.lock:
+            if form.get('refresh_token') not in self.refresh_tokens:
+                return 400, {'error': 'invalid_grant', 'error_description': 'Invalid refresh token'}, {}
+            self.refresh_tokens.discard(form['refresh_token'])
+            self.token_refreshes += 1
+        token = self.issue_token()
+        return 200, {'access_token': token.access_token, 'refresh_token': token.refresh_token,
+                     'expires_in': self.token_lifetime, 'token_type': 'bearer', 'scope': 'full'}, {}
+
+    # Routing
+
+    def _routes(self):
+        routes = []
+        for endpoint, (collection, key, field) in LIST_ENDPOINTS.items():
+            routes.append(('GET', endpoint, lambda request, c=collection, k=key, f=field: self._list(c, k, f, request)))
+        routes += [
+            ('GET', 'account/profile', lambda request: (200, self.profile)),
+            ('PUT', 'account/profile', self._update_profile),
+            ('PUT', 'contacts', self._upsert_contact),
+            ('PUT', 'opportunities', self._upsert_opportunity),
+            ('GET', 'hooks', lambda request: (200, self._all('hooks'))),
+            ('GET', 'contacts/{id}/tags', self._contact_tags),
+            ('POST', 'contacts/{id}/tags', self._apply_contact_tags),
+            ('DELETE', 'contacts/{id}/tags', lambda request: self._remove_contact_tags(request.id, _ids(request))),
+            ('DELETE', 'contacts/{id}/tags/{id}', lambda request:
+                self._remove_contact_tags(request.id, [int(request.args[1])])),
+            ('GET', 'contacts/{id}/creditCards', lambda request: (200, [])),
+            ('POST', 'contacts/{id}/creditCards', self._echo),
+            ('POST', 'contacts/{id}/emails', lambda request:
+                self._create('emails', {**(request.body or {}), 'contact_id': request.id})),
+            ('GET', 'tags/{id}/contacts', self._tag_contacts),
+            ('POST', 'tags/{id}/contacts', self._apply_tag),
+            ('DELETE', 'tags/{id}/contacts', lambda request: self._remove_tag(request.id, _ids(request))),
+            ('DELETE', 'tags/{id}/contacts/{id}', lambda request: self._remove_tag(request.id,
+                                                                                    [int(request.args[1])])),
+            ('GET', 'tags/{id}/companies', lambda request: self._page('companies', [], request)),
+            ('POST', 'tags/categories', self._echo),
+            ('GET', 'orders/{id}/payments', lambda request: (200, [])),
+            ('POST', 'orders/{id}/payments', self._echo),
+            ('POST', 'orders/{id}/items', self._echo),
+            ('PUT', 'orders/{id}/paymentPlan', lambda request: (200, request.body or {})),
+            ('GET', 'subscriptions/model', lambda request: (200, _model())),
+            ('POST', 'products/{id}/subscriptions', self._echo),
+            ('GET', 'products/{id}/subscriptions/{id}', lambda request:
+                (200, {'id': int(request.args[1]), 'product_id': request.id, 'cycle_type': 'MONTH', 'frequency': 1})),
+        ]
+        for (method, endpoint), answer in STATIC_ANSWERS.items():
+            routes.append((method, endpoint, lambda request, a=answer: (200, a)))
+        for method, endpoint in ACTIONS:
+            routes.append((method, endpoint, lambda request: (204, None)))
+        for endpoint, collection in RESOURCE_ENDPOINTS.items():
+            routes += [
+                ('POST', endpoint, lambda request, c=collection: self._create(c, request.body)),
+                ('GET', f'{endpoint}/model', lambda request: (200, _model())),
+                ('POST', f'{endpoint}/model/customFields', self._echo),
+                ('GET', f'{endpoint}/{{id}}', lambda request, c=collection: self._get(c, request)),
+                ('PATCH', f'{endpoint}/{{id}}', lambda request, c=collection: self._update(c, request.id,
+                                                                                          request.body)),
+                ('PUT', f'{endpoint}/{{id}}', lambda request, c=collection: self._update(c, request.id, request.body)),
+                ('DELETE', f'{endpoint}/{{id}}', lambda request, c=collection: self._delete(c, request.id)),
+            ]
+        exact = {}
+        patterns = []
+        for method, endpoint, handler in routes:
+            if '{key}' in endpoint:
+                patterns.append((method, _pattern(endpoint), endpoint, handler))
+            else:
+                exact.setdefault((method, endpoint), handler)
+        return exact, patterns
+
+    def _route(self, method, endpoint):
+        exact, patterns = self.routes
+        name = _ID_SEGMENT.sub('{id}', endpoint)
+        handler = exact.get((method, name))
+        if handler is not None:
+            return f'{method} {name}', handler, tuple(_ID_SEGMENT.findall(endpoint))
+        for pattern_method, pattern, pattern_name, handler in patterns:
+            match = pattern.match(endpoint) if pattern_method == method else None
+            if match:
+                return f'{method} {pattern_name}', handler, match.groups()
+        return f'{method} {name}', None, ()
+
+    # Data
+
+    def _seed_records(self):
+        rng = random.Random(self.seed)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.profile = {'name': 'Fake Keap', 'email': 'owner@example.com', 'phone': '+1 555 0100',
+                        'time_zone': 'America/Phoenix', 'currency_code': 'USD'}
+        for collection, count in self.volumes.items():
+            self.records[collection] = {}
+            self.ids[collection] = itertools.count(1)
+            parent = PARENTS.get(collection)
+            for _ in range(count):
+                record_id = next(self.ids[collection])
+                created = now - timedelta(days=rng.randint(30, 1500), seconds=rng.randint(0, 86400))
+                # Spread up to a day before now, so that every seeded record falls in a window ending at now - lag
+                updated = created + (now - timedelta(days=1) - created) * rng.random()
+                record = _make_record(collection, record_id, rng)
+                record.update(id=record_id, date_created=_timestamp(created), last_updated=_timestamp(updated))
+                if parent is not None and self.volumes.get(parent[1]):
+                    record[parent[0]] = rng.randint(1, self.volumes[parent[1]])
+                self.records[collection][record_id] = record
+        for contact_id, contact in self.records.get('contacts', {}).items():
+            self.emails.setdefault(_first_email(contact), contact_id)
+        tags = self.volumes.get('tags', 0)
+        for contact_id, contact in self.records.get('contacts', {}).items():
+            for tag_id in rng.sample(range(1, tags + 1), min(tags, rng.randint(0, 3))):
+                self.tagged.setdefault(tag_id, {})[contact_id] = contact['date_created']
+
+    def _all(self, collection):
+        with self.lock:
+            return list(self.records.get(collection, {}).values())
+
+    def _list(self, collection, key, field, request):
+        records = self._all(collection)
+        if field is not None:
+            records = [record for record in records if record.get(field) == request.id]
+        status, answer = self._page(key, records, request)
+        if collection == 'contacts' and status == 200:
+            answer[key] = self._with_tag_ids(answer[key], request)
+        return status, answer
+
+    def _with_tag_ids(self, contacts, request):
+        # Adds the IDs of the applied tags, when asked with optional_properties like Keap
+        if 'tag_ids' not in str(request.query.get('optional_properties') or '').split(','):
+            return contacts
+        with self.lock:
+            return [dict(contact, tag_ids=[tag_id for tag_id, tagged in sorted(self.tagged.items())
+                                           if contact['id'] in tagged]) for contact in contacts]
+
+    def _page(self, key, records, request):
+        query = request.query
+        since = parse_time(query['since']) if query.get('since') else None
+        until = parse_time(query['until']) if query.get('until') else None
+        if since is not None or until is not None:
+            records = [record for record in records if _in_window(record, since, until)]
+        if query.get('order') in ('date_created', 'last_updated'):
+            records.sort(key=lambda record: (parse_time(record[query['order']]), record['id']),
+                         reverse=(query.get('order_direction') or '').upper() == 'DESCENDING')
+        try:
+            limit = min(MAX_PAGE_SIZE, max(1, int(query.get('limit') or MAX_PAGE_SIZE)))
+            offset = max(0, int(query.get('offset') or 0))
+        except ValueError:
+            return 400, {'message': 'limit and offset must be integers'}
+        url = f'{self.url}/{request.endpoint}'
+        return 200, {key: records[offset:offset + limit], 'count': len(records),
+                     'next': f'{url}?limit={limit}&offset={offset + limit}' if offset + limit < len(records) else None,
+                     'previous': f'{url}?limit={limit}&offset={max(0, offset - limit)}' if offset else None}
+
+    def _get(self, collection, request):
+        with self.lock:
+            record = self.records[collection].get(request.id)
+        if record is None:
+            return 404, {'message': f'Record {request.id} of {collection} not found'}
+        if collection == 'contacts':
+            record = self._with_tag_ids([record], request)[0]
+        return 200, record
+
+    def _create(self, collection, body):
+        if not isinstance(body, dict):
+            return 400, {'message': 'The body must be a JSON object'}
+        now = _timestamp(datetime.now(timezone.utc))
+        with self.lock:
+            record_id = next(self.ids[collection])
+            record = {**body, 'id': record_id, 'date_created': now, 'last_updated': now}
+            self.records[collection][record_id] = record
+            if collection == 'contacts':
+                self.emails.setdefault(_first_email(record), record_id)
+        return 201, record
+
+    def _update(self, collection, record_id, body):
+        if not isinstance(body, dict):
+            return 400, {'message': 'The body must be a JSON object'}
+        with self.lock:
+            record = self.records[collection].get(record_id)
+            if record is None:
+                return 404, {'message': f'Record {record_id} of {collection} not found'}
+            if collection == 'contacts' and self.emails.get(_first_email(record)) == record_id:
+                del self.emails[_first_email(record)]
+            record.update(body, id=record_id, last_updated=_timestamp(datetime.now(timezone.utc)))
+            if collection == 'contacts':
+                self.emails.setdefault(_first_email(record), record_id)
+            return 200, dict(record)
+
+    def _delete(self, collection, record_id):
+        with self.lock:
+            record = self.records[collection].pop(record_id, None)
+            if record is None:
+                return 404, {'message': f'Record {record_id} of {collection} not found'}
+            if collection == 'contacts':
+                if self.emails.get(_first_email(record)) == record_id:
+                    del self.emails[_first_email(record)]
+                for contacts in self.tagged.values():
+                    contacts.pop(record_id, None)
+        return 204, None
+
+    @staticmethod
+    def _echo(request):
+        if not isinstance(request.body, dict):
+            return 400, {'message': 'The body must be a JSON object'}
+        return 201, {'id': 1, **request.body}
+
+    def _update_profile(self, request):
+        if not isinstance(request.body, dict):
+            return 400, {'message': 'The body must be a JSON object'}
+        self.profile = {**self.profile, **request.body}
+        return 200, self.profile
+
+    def _upsert_opportunity(self, request):
+        record_id = (request.body or {}).get('id')
+        if record_id is not None:
+            return self._update('opportunities', int(record_id), request.body)
+        return self._create('opportunities', request.body)
+
+    def _upsert_contact(self, request):
+        body = request.body
+        if not isinstance(body, dict):
+            return 400, {'message': 'The body must be a JSON object'}
+        if not body.get('email_addresses') and not body.get('phone_numbers'):
+            return 400, {'message': 'A contact requires an email address or a phone number'}
+        duplicate_option = body.get('duplicate_option', 'Email')
+        fields = {key: value for key, value in body.items() if key != 'duplicate_option'}
+        email = _first_email(fields)
+        match = None
+        if duplicate_option in ('Email', 'EmailAndName') and email is not None:
+            with self.lock:
+                match = self.records['contacts'].get(self.emails.get(email))
+            if match is not None and duplicate_option == 'EmailAndName' \
+                    and match.get('given_name') != fields.get('given_name'):
+                match = None
+        if match is not None:
+            return self._update('contacts', match['id'], fields)
+        return self._create('contacts', fields)
+
+    def _contact_tags(self, request):
+        with self.lock:
+            if request.id not in self.records['contacts']:
+                return 404, {'message': f'Contact {request.id} not found'}
+            applied = [{'tag': _tag_summary(self.records['tags'].get(tag_id, {'id': tag_id})),
+                        'date_applied': contacts[request.id]}
+                       for tag_id, contacts in sorted(self.tagged.items()) if request.id in contacts]
+        return self._page('tags', applied, request)
+
+    def _apply_contact_tags(self, request):
+        tag_ids = (request.body or {}).get('tagIds') or []
+        now = _timestamp(datetime.now(timezone.utc))
+        with self.lock:
+            if request.id not in self.records['contacts']:
+                return 404, {'message': f'Contact {request.id} not found'}
+            for tag_id in map(int, tag_ids):
+                if tag_id in self.records['tags']:
+                    self.tagged.setdefault(tag_id, {}).setdefault(request.id, now)
+        return 204, None
+
+    def _remove_contact_tags(self, contact_id, tag_ids):
+        with self.lock:
+            for tag_id in tag_ids:
+                self.tagged.get(tag_id, {}).pop(contact_id, None)
+        return 204, None
+
+    def _tag_contacts(self, request):
+        with self.lock:
+            if request.id not in self.records['tags']:
+                return 404, {'message': f'Tag {request.id} not found'}
+            contacts = [{'contact': _contact_summary(self.records['contacts'][contact_id]), 'date_applied': applied}
+                        for contact_id, applied in sorted(self.tagged.get(request.id, {}).items())]
+        return self._page('contacts', contacts, request)
+
+    def _apply_tag(self, request):
+        ids = (request.body or {}).get('ids')
+        if not isinstance(ids, list) or len(ids) > 1000:
+            return 400, {'message': 'ids must be a list of at most 1000 contact IDs'}
+        now = _timestamp(datetime.now(timezone.utc))
+        statuses = {}
+        with self.lock:
+            if request.id not in self.records['tags']:
+                return 404, {'message': f'Tag {request.id} not found'}
+            tagged = self.tagged.setdefault(request.id, {})
+            for contact_id in map(int, ids):
+                if contact_id not in self.records['contacts']:
+                    statuses[str(contact_id)] = 'FAILURE'
+                elif contact_id in tagged:
+                    statuses[str(contact_id)] = 'DUPLICATE'
+                else:
+                    tagged[contact_id] = now
+                    statuses[str(contact_id)] = 'SUCCESS'
+        return 200, statuses
+
+    def _remove_tag(self, tag_id, contact_ids):
+        with self.lock:
+            if tag_id not in self.records['tags']:
+                return 404, {'message': f'Tag {tag_id} not found'}
+            tagged = self.tagged.get(tag_id, {})
+            for contact_id in contact_ids:
+                tagged.pop(contact_id, None)
+        return 204, None
+
+
+class _Request:
+    """Parsed request passed to the route handlers.
+    """
+
+    def __init__(self, endpoint, args, query, body):
+        self.endpoint = endpoint
+        self.args = args
+        self.id = int(args[0]) if args and args[0].isdigit() else None
+        self.query = query
+        self.body = body
+
+
+def _flatten(query):
+    return {name: values[-1] for name, values in query.items()}
+
+
+def _ids(request):
+    return [int(value) for value in str(request.query.get('ids') or '').split(',') if value.strip().isdigit()]
+
+
+def _in_window(record, since, until):
+    updated = parse_time(record.get('last_updated') or record.get('date_created') or '')
+    if updated is None:
+        return False
+    return (since is None or updated >= since) and (until is None or updated < until)
+
+
+def _first_email(record):
+    emails = record.get('email_addresses') or []
+    return emails[0].get('email', '').lower() if emails and isinstance(emails[0], dict) else None
+
+
+def _tag_summary(tag):
+    return {'id': tag['id'], 'name': tag.get('name'), 'category': tag.get('category')}
+
+
+def _contact_summary(contact):
+    return {'id': contact['id'], 'email': _first_email(contact), 'first_name': contact.get('given_name'),
+            'last_name': contact.get('family_name')}
+
+
+def _model():
+    return {'custom_fields': [{'id': field_id, 'label': f'Custom field {field_id}', 'field_type': 'Text'}
+                              for field_id in range(1, 6)],
+            'optional_properties': ['custom_fields', 'job_title', 'website']}
+
+
+_FIRST_NAMES = ('Jane', 'John', 'Ada', 'Alan', 'Grace', 'Linus', 'Margaret', 'Dennis', 'Barbara', 'Ken')
+_LAST_NAMES = ('Doe', 'Lovelace', 'Turing', 'Hopper', 'Torvalds', 'Hamilton', 'Ritchie', 'Liskov', 'Thompson')
+
+
+def _make_record(collection, record_id, rng):
+    if collection == 'contacts':
+        given_name = rng.choice(_FIRST_NAMES)
+        family_name = rng.choice(_LAST_NAMES)
+        return {'given_name': given_name, 'family_name': family_name,
+                'email_addresses': [{'email': f'{given_name}.{family_name}.{record_id}@example.com'.lower(),
+                                     'field': 'EMAIL1'}],
+                'phone_numbers': [{'number': f'+1 555 {rng.randint(0, 9999):04d}', 'field': 'PHONE1',
+                                   'type': 'Work'}],
+                'addresses': [{'line1': f'{rng.randint(1, 999)} Main Street', 'locality': 'Springfield',
+                               'region': 'Illinois', 'postal_code': f'{rng.randint(10000, 99999)}',
+                               'country_code': 'USA', 'field': 'BILLING'}],
+                'company': {'id': rng.randint(1, 100)}, 'job_title': rng.choice(('CEO', 'CTO', 'Buyer', None)),
+                'owner_id': rng.randint(1, 10), 'email_status': 'SingleOptIn', 'email_opted_in': True,
+                'custom_fields': [{'id': field_id, 'content': f'value {rng.randint(0, 999)}'}
+                                  for field_id in range(1, 6)]}
+    if collection == 'companies':
+        return {'company_name': f'Company {record_id}', 'email_address': f'contact@company{record_id}.example.com',
+                'phone_number': {'number': f'+1 555 {rng.randint(0, 9999):04d}', 'type': 'Work'},
+                'address': {'line1': f'{rng.randint(1, 999)} Market Street', 'locality': 'Springfield',
+                            'country_code': 'USA'}}
+    if collection == 'tags':
+        category = rng.randint(1, 5)
+        return {'name': f'Tag {record_id}', 'description': f'Seeded tag {record_id}',
+                'category': {'id': category, 'name': f'Category {category}'}}
+    if collection == 'orders':
+        items = [{'id': item_id, 'name': f'Product {rng.randint(1, 50)}', 'quantity': rng.randint(1, 3),
+                  'price': round(rng.uniform(5, 500), 2)} for item_id in range(1, rng.randint(2, 6))]
+        total = round(sum(item['price'] * item['quantity'] for item in items), 2)
+        return {'title': f'Order #{record_id}', 'status': rng.choice(('PAID', 'UNPAID', 'DRAFT')), 'total': total,
+                'order_items': items}
+    if collection in ('transactions', 'affiliate_payments', 'commissions', 'clawbacks'):
+        return {'amount': round(rng.uniform(5, 500), 2), 'currency': 'USD',
+                'status': rng.choice(('Approved', 'Pending'))}
+    if collection == 'hooks':
+        return {'key': str(record_id), 'eventKey': 'contact.add', 'hookUrl': f'https://example.com/hooks/{record_id}',
+                'status': 'Verified'}
+    singular = collection.rstrip('s')
+    return {'name': f'{singular.capitalize()} {record_id}', 'title': f'{singular.capitalize()} {record_id}'}
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, handler, fake):
+        self.fake = fake
+        super().__init__(address, handler)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _answer(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        fake = self.server.fake
+        status, answer, headers = fake.handle(self.command, url.path, parse_qs(url.query), body, self.headers)
+        payload = b'' if answer is None or status == 204 else fake.codec.dumps(answer)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves a fake Keap REST API until interrupted.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on, 0 for a free one')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--volume', action='append', default=[], metavar='COLLECTION=COUNT',
+                        help='number of records of a collection, e.g. contacts=100000, repeatable')
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=None)
+    args = parser.parse_args()
+    try:
+        volumes = {name: int(count) for name, count in (volume.split('=', 1) for volume in args.volume)}
+    except ValueError:
+        parser.error('--volume expects COLLECTION=COUNT')
+    server = FakeKeapServer(args.seed, volumes, args.latency, args.jitter, args.throttle_rate, args.error_rate,
+                            rate_limit=args.rate_limit, host=args.host, port=args.port).start()
+    print(f'Serving the fake Keap API at {server.url}', flush=True)
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
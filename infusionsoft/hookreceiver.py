@@ -0,0 +1,542 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from fnmatch import fnmatchcase
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+logger = logging.getLogger(__name__)
+
+# Largest delivery accepted, Keap sends the keys of the changed objects only
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class HookEvent:
+    """A delivery of a REST hook: the event key, e.g. 'contact.edit', the type of the objects and their keys, each
+    with its ID, its API URL and the time of the change.
+    """
+
+    def __init__(self, event_key, object_type=None, object_keys=None, received=None):
+        """Creates a new HookEvent object.
+
+        Args:
+            event_key: The key of the event, e.g. 'contact.add'.
+            object_type: The type of the objects, e.g. 'contact'. Defaults to None.
+            object_keys: List of dictionaries with the id, apiUrl and timestamp of every object. Defaults to None.
+            received: Time the delivery was received, in seconds since the epoch. Defaults to now.
+        """
+        self.event_key = event_key
+        self.object_type = object_type
+        self.object_keys = object_keys or []
+        self.received = received if received is not None else time.time()
+
+    @property
+    def ids(self):
+        """IDs of the objects.
+        """
+        return [key['id'] for key in self.object_keys if key.get('id') is not None]
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds an event from a delivery, or from :meth:`to_dict`.
+
+        Args:
+            data: The dictionary.
+
+        Returns:
+            The HookEvent.
+
+        Raises:
+            ValueError: If the dictionary has no event key.
+        """
+        if not isinstance(data, dict) or not data.get('event_key'):
+            raise ValueError('The delivery has no event_key.')
+        return cls(data['event_key'], data.get('object_type'), data.get('object_keys'), data.get('received'))
+
+    def to_dict(self):
+        """Builds a dictionary representation of the event.
+
+        Returns:
+            A JSON serializable dictionary.
+        """
+        return {'event_key': self.event_key, 'object_type': self.object_type, 'object_keys': self.object_keys,
+                'received': self.received}
+
+    def __str__(self):
+        return f'{self.event_key} {self.ids}'
+
+
+class QueuedEvent:
+    """An event taken from an EventQueue, with the number of times it was attempted before.
+    """
+
+    def __init__(self, item_id, event, attempts=0):
+        self.item_id = item_id
+        self.event = event
+        self.attempts = attempts
+
+
+class EventQueue(metaclass=ABCMeta):
+    """Abstract class for defining where the received events wait for the workers of a HookReceiver.
+    """
+
+    @abstractmethod
+    def put(self, event):
+        """Adds an event.
+
+        Args:
+            event: The HookEvent.
+        """
+
+    @abstractmethod
+    def get(self, timeout=None):
+        """Takes the oldest available event. It stays in the queue until :meth:`done`, :meth:`retry` or
+        :meth:`dead` is called with it.
+
+        Args:
+            timeout: Seconds to wait for an event. Defaults to None, to wait until one is available.
+
+        Returns:
+            The QueuedEvent, or None if no event became available in time.
+        """
+
+    @abstractmethod
+    def done(self, item):
+        """Removes a processed event.
+
+        Args:
+            item: The QueuedEvent.
+        """
+
+    @abstractmethod
+    def retry(self, item, delay):
+        """Makes a failed event available again later.
+
+        Args:
+            item: The QueuedEvent.
+            delay: Seconds before the event is available.
+        """
+
+    @abstractmethod
+    def dead(self, item, error):
+        """Sets an event that failed too many times aside.
+
+        Args:
+            item: The QueuedEvent.
+            error: Description of the last failure.
+        """
+
+    @abstractmethod
+    def dead_letters(self):
+        """Returns the events set aside.
+
+        Returns:
+            A list of (HookEvent, error) tuples, oldest first.
+        """
+
+
+class MemoryEventQueue(EventQueue):
+    """Event queue in memory, lost when the process stops.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.dead_events = []
+
+    def __len__(self):
+        with self.condition:
+            return len(self.heap)
+
+    def put(self, event):
+        self._push(QueuedEvent(next(self.counter), event), time.monotonic())
+
+    def _push(self, item, available):
+        with self.condition:
+            heapq.heappush(self.heap, (available, item.item_id, item))
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if self.heap and self.heap[0][0] <= now:
+                    return heapq.heappop(self.heap)[2]
+                wait = self.heap[0][0] - now if self.heap else None
+                if deadline is not None:
+                    if now >= deadline:
+                        return None
+                    wait = min(wait, deadline - now) if wait is not None else deadline - now
+                self.condition.wait(wait)
+
+    def done(self, item):
+        pass
+
+    def retry(self, item, delay):
+        item.attempts += 1
+        self._push(item, time.monotonic() + delay)
+
+    def dead(self, item, error):
+        with self.condition:
+            self.dead_events.append((item.event, error))
+
+    def dead_letters(self):
+        with self.condition:
+            return list(self.dead_events)
+
+
+class SQLiteEventQueue(EventQueue):
+    """Event queue in a SQLite database, so that the events received survive a restart of the process.
+
+    An event taken by a worker is hidden from the others until it is processed. If the process stops before, it is
+    available again once the visibility timeout elapsed, so every event is processed at least once.
+    """
+
+    def __init__(self, path='hooks.db', visibility_timeout=300.0, poll_interval=0.5, timeout=30.0):
+        """Creates a new SQLiteEventQueue object, and its tables if needed.
+
+        Args:
+            path: Path of the database. Defaults to 'hooks.db' in the current working directory.
+            visibility_timeout: Seconds an event taken by a worker is hidden from the others. Defaults to 300.
+            poll_interval: Seconds between two looks for the events added by other processes. Defaults to 0.5.
+            timeout: Seconds to wait for another connection writing to the database. Defaults to 30.
+        """
+        self.path = os.path.abspath(path)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.local = threading.local()
+        self.condition = threading.Condition()
+        connection = self.connection
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                           'event TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, '
+                           'available REAL NOT NULL, error TEXT, dead INTEGER NOT NULL DEFAULT 0)')
+        connection.execute('CREATE INDEX IF NOT EXISTS events_available ON events (dead, available)')
+
+    @property
+    def connection(self):
+        """The connection of the current thread.
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                                                 isolation_level=None)
+            connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM events WHERE dead = 0').fetchone()[0]
+
+    def put(self, event):
+        self.connection.execute('INSERT INTO events (event, available) VALUES (?, ?)',
+                                (json.dumps(event.to_dict()), time.time()))
+        with self.condition:
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            now = time.time()
+            row = self.connection.execute(
+                'UPDATE events SET available = ? WHERE id = (SELECT id FROM events WHERE dead = 0 AND available <= ? '
+                'ORDER BY available, id LIMIT 1) RETURNING id, event, attempts',
+                (now + self.visibility_timeout, now)).fetchone()
+            if row is not None:
+                return QueuedEvent(row[0], HookEvent.from_dict(json.loads(row[1])), row[2])
+            wait = self.poll_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+            with self.condition:
+                self.condition.wait(wait)
+
+    def done(self, item):
+        self.connection.execute('DELETE FROM events WHERE id = ?', (item.item_id,))
+
+    def retry(self, item, delay):
+        item.attempts += 1
+        self.connection.execute('UPDATE events SET attempts = ?, available = ? WHERE id = ?',
+                                (item.attempts, time.time() + delay, item.item_id))
+        with self.condition:
+            self.condition.notify()
+
+    def dead(self, item, error):
+        self.connection.execute('UPDATE events SET dead = 1, error = ? WHERE id = ?', (error, item.item_id))
+
+    def dead_letters(self):
+        return [(HookEvent.from_dict(json.loads(event)), error) for event, error in self.connection.execute(
+            'SELECT event, error FROM events WHERE dead = 1 ORDER BY id')]
+
+
+class HookReceiver:
+    """WSGI and ASGI application receiving the REST hooks of Keap and dispatching them to handlers in the background.
+
+    A request holding an X-Hook-Secret header is the verification of a new subscription, answered with the same
+    header to confirm it immediately, or handed to the on_verify callback to confirm it later with
+    ``RestHook.verify_hook_subscription_delayed``. Any other request is a delivery, added to the queue and
+    acknowledged before any handler runs, so a slow handler never makes Keap time out. A pool of worker threads takes
+    the events from the queue and calls the handlers registered for their key. A handler raising an exception is
+    retried with an exponential backoff, then the event is set aside in the dead letters of the queue.
+
+    Keap does not sign the deliveries, mount the receiver on a path that is hard to guess.
+
+    Example::
+
+        receiver = HookReceiver(SQLiteEventQueue('hooks.db'), path='/hooks/3f9a1c')
+        receiver.on('contact.*', lambda event: print(event))
+        receiver.start()
+        receiver.serve(port=8080)
+    """
+
+    def __init__(self, queue=None, workers=4, path=None, on_verify=None, immediate=True, max_attempts=5,
+                 retry_delay=1.0):
+        """Creates a new HookReceiver object. The workers are started by :meth:`start`.
+
+        Args:
+            queue: The EventQueue. Defaults to a new MemoryEventQueue.
+            workers: Number of worker threads. Defaults to 4.
+            path: Path the deliveries are posted to, the other paths are answered 404. Defaults to None, to accept
+                any path.
+            on_verify: Function called with the secret of every subscription verification. Defaults to None.
+            immediate: Whether the secret is sent back to confirm the subscription immediately. Defaults to True.
+            max_attempts: Number of times an event is handed to a failing handler before being set aside.
+                Defaults to 5.
+            retry_delay: Seconds before the second attempt, doubled for each of the next ones. Defaults to 1.
+        """
+        self.queue = queue if queue is not None else MemoryEventQueue()
+        self.workers = workers
+        self.path = path
+        self.on_verify = on_verify
+        self.immediate = immediate
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.handlers = []
+        self.threads = []
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.received = 0
+        self.processed = 0
+        self.failed = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def on(self, event_key, handler=None):
+        """Registers a handler for the events whose key matches a pattern. Can be used as a decorator.
+
+        Args:
+            event_key: The event key, or a shell-style pattern, e.g. 'contact.*' or '*' for every event.
+            handler: Function called with the HookEvent, from a worker thread. Defaults to None, to return a
+                decorator.
+
+        Returns:
+            The handler, or the decorator registering it.
+        """
+        if handler is None:
+            return lambda function: self.on(event_key, function)
+        with self.lock:
+            self.handlers = [*self.handlers, (event_key, handler)]  # Copied, so dispatch needs no lock
+        return handler
+
+    def dispatch(self, event):
+        """Calls the handlers matching an event, in the order they were registered.
+
+        Args:
+            event: The HookEvent.
+
+        Returns:
+            The number of handlers called.
+        """
+        handlers = [handler for pattern, handler in self.handlers if fnmatchcase(event.event_key, pattern)]
+        for handler in handlers:
+            handler(event)
+        return len(handlers)
+
+    def start(self):
+        """Starts the worker threads.
+        """
+        if self.threads:
+            return
+        self.stopping.clear()
+        self.threads = [threading.Thread(target=self._work, name=f'hook-worker-{number}', daemon=True)
+                        for number in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """Stops the worker threads once they finished their current event. The queued events are left in the queue.
+
+        Args:
+            timeout: Seconds to wait for every thread. Defaults to None, to wait as long as needed.
+        """
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def drain(self, timeout=None):
+        """Waits until the queue is empty and the workers are idle, e.g. in tests.
+
+        Args:
+            timeout: Seconds to wait. Defaults to None, to wait as long as needed.
+
+        Returns:
+            True if the queue was drained, false if the timeout elapsed.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while len(self.queue) or self.processed + self.failed < self.received:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _work(self):
+        while not self.stopping.is_set():
+            item = self.queue.get(timeout=0.5)
+            if item is None:
+                continue
+            try:
+                self.dispatch(item.event)
+            except Exception as e:
+                if item.attempts + 1 >= self.max_attempts:
+                    logger.exception('The handler of %s failed %d times, the event is set aside', item.event,
+                                     item.attempts + 1)
+                    self.queue.dead(item, repr(e))
+                    with self.lock:
+                        self.failed += 1
+                else:
+                    logger.warning('The handler of %s failed, retrying: %r', item.event, e)
+                    self.queue.retry(item, self.retry_delay * 2 ** item.attempts)
+                continue
+            self.queue.done(item)
+            with self.lock:
+                self.processed += 1
+
+    def receive(self, path, headers, body):
+        """Handles a request, independently of the server interface.
+
+        Args:
+            path: Path of the request.
+            headers: Dictionary of the request headers, with lowercase names.
+            body: The body, as bytes.
+
+        Returns:
+            A (status, headers, body) tuple, with a list of (name, value) header tuples and the body as bytes.
+        """
+        if self.path is not None and path.rstrip('/') != self.path.rstrip('/'):
+            return '404 Not Found', [], b''
+        secret = headers.get('x-hook-secret')
+        if secret:
+            if self.on_verify is not None:
+                self.on_verify(secret)
+            return '200 OK', [('X-Hook-Secret', secret)] if self.immediate else [], b''
+        try:
+            event = HookEvent.from_dict(json.loads(body or b'null'))
+        except ValueError as e:
+            return '400 Bad Request', [('Content-Type', 'text/plain')], str(e).encode('utf-8')
+        self.queue.put(event)
+        with self.lock:
+            self.received += 1
+        return '200 OK', [], b''
+
+    def __call__(self, environ, start_response):
+        # WSGI application
+        headers = {key[5:].replace('_', '-').lower(): value for key, value in environ.items()
+                   if key.startswith('HTTP_')}
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if environ.get('REQUEST_METHOD') != 'POST':
+            status, response_headers, body = '405 Method Not Allowed', [('Allow', 'POST')], b''
+        elif length > MAX_BODY_SIZE:
+            status, response_headers, body = '413 Payload Too Large', [], b''
+        else:
+            status, response_headers, body = self.receive(environ.get('PATH_INFO') or '/', headers,
+                                                          environ['wsgi.input'].read(length) if length else b'')
+        start_response(status, [*response_headers, ('Content-Length', str(len(body)))])
+        return [body]
+
+    async def asgi(self, scope, receive, send):
+        """ASGI application, starting the workers on the lifespan startup event and stopping them on shutdown.
+        """
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    self.start()
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    self.stop()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size <= MAX_BODY_SIZE:
+                chunks.append(chunk)
+            more_body = message.get('more_body', False)
+        if scope['method'] != 'POST':
+            status, response_headers, body = '405 Method Not Allowed', [('Allow', 'POST')], b''
+        elif size > MAX_BODY_SIZE:
+            status, response_headers, body = '413 Payload Too Large', [], b''
+        else:
+            status, response_headers, body = self.receive(scope['path'], headers, b''.join(chunks))
+        await send({'type': 'http.response.start', 'status': int(status.split()[0]),
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                for name, value in [*response_headers, ('Content-Length', str(len(body)))]]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def make_server(self, host='', port=8000):
+        """Creates a threaded WSGI server of the standard library serving the receiver, for the deployments
+        without an application server.
+
+        Args:
+            host: Interface to listen on. Defaults to '', for every interface.
+            port: Port to listen on, 0 for a free port. Defaults to 8000.
+
+        Returns:
+            The server, whose serve_forever method serves the requests until shutdown is called.
+        """
+        return make_server(host, port, self, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+
+    def serve(self, host='', port=8000):
+        """Serves the receiver with :meth:`make_server` until interrupted.
+
+        Args:
+            host: Interface to listen on. Defaults to '', for every interface.
+            port: Port to listen on. Defaults to 8000.
+        """
+        with self.make_server(host, port) as server:
+            server.serve_forever()
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
@@ -0,0 +1,229 @@
+import logging
+import re
+import threading
+import time
+import types
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+HOOK_EVENTS = ('before_request', 'after_response', 'on_error')
+
+_API_PREFIX = re.compile(r'^.*?/rest/(v\d+/)?')
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+logger = logging.getLogger(__name__)
+
+# Number of clients logging their calls and level of the logger before the first of them, see enable_debug_logging
+debug_lock = threading.Lock()
+debug_clients = 0
+debug_previous_level = logging.NOTSET
+
+# Name of the service method performing the current request, e.g. 'contact.list_contact'
+current_operation = ContextVar('infusionsoft_operation', default=None)
+
+
+def endpoint_name(url):
+    """Builds the name grouping the requests of the same endpoint, the path below the API root with IDs replaced.
+
+    Args:
+        url: URL of the request, e.g. 'https://api.infusionsoft.com/crm/rest/v1/contacts/42/tags'.
+
+    Returns:
+        The endpoint name, e.g. 'contacts/{id}/tags'.
+    """
+    path = _ID_SEGMENT.sub('/{id}', urlsplit(url).path)
+    return _API_PREFIX.sub('', path).strip('/')
+
+
+def in_operation(name, function):
+    """Wraps a callable so that the requests it performs are attributed to an operation.
+    The name is set for the duration of the call and, when the callable returns a coroutine, while it is awaited,
+    so it also applies to the requests of the asyncio client and to calls made from other threads or tasks.
+
+    Args:
+        name: The operation name, e.g. 'contact.list_contact'. None returns the callable unchanged.
+        function: The callable.
+
+    Returns:
+        The wrapped callable.
+    """
+    if name is None:
+        return function
+
+    def call(*args, **kwargs):
+        token = current_operation.set(name)
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+        if isinstance(result, types.CoroutineType):
+            return _await_in_operation(name, result)
+        return result
+
+    return call
+
+
+async def _await_in_operation(name, coroutine):
+    token = current_operation.set(name)
+    try:
+        return await coroutine
+    finally:
+        current_operation.reset(token)
+
+
+def content_length(headers):
+    """Reads the size of a body from the Content-Length header.
+
+    Args:
+        headers: The headers of the answer.
+
+    Returns:
+        The size in bytes, or None if the header is missing.
+    """
+    value = headers.get('Content-Length')
+    return int(value) if value and value.isdigit() else None
+
+
+class RequestEvent:
+    """Describes one call of the client, from the first attempt to the last one, to the hooks.
+
+    Attributes:
+        operation: Name of the service method performing the request, e.g. 'contact.list_contact', or None for a
+            request made directly through the client.
+        endpoint: The endpoint name, see :func:`endpoint_name`.
+        method: The HTTP method, in upper case.
+        url: URL of the request.
+        status: Status code of the last answer, None before the answer or if none was received.
+        bytes_out: Size of the request body, None if unknown.
+        bytes_in: Size of the answer body, None if unknown, e.g. for a streamed answer without Content-Length.
+        duration: Seconds from the call to the answer of the last attempt, waits and retries included.
+        retries: Number of attempts after the first one.
+        rate_limit_wait: Seconds spent waiting for the rate limiter.
+        error: The exception raised when no answer could be received, None otherwise.
+    """
+
+    def __init__(self, method, url, data=None):
+        self.operation = current_operation.get()
+        self.endpoint = endpoint_name(url)
+        self.method = method.upper()
+        self.url = url
+        self.status = None
+        self.bytes_out = len(data) if isinstance(data, (bytes, str)) else (0 if data is None else None)
+        self.bytes_in = None
+        self.duration = None
+        self.retries = 0
+        self.rate_limit_wait = 0.0
+        self.error = None
+        self.started = time.perf_counter()
+
+    def finish(self, status=None, bytes_in=None, error=None):
+        """Records the outcome of the call.
+
+        Args:
+            status: Status code of the last answer. Defaults to None.
+            bytes_in: Size of the answer body. Defaults to None.
+            error: The exception raised when no answer could be received. Defaults to None.
+        """
+        self.duration = time.perf_counter() - self.started
+        self.status = status
+        self.bytes_in = bytes_in
+        self.error = error
+
+    def __str__(self):
+        outcome = self.status if self.error is None else f'failed ({self.error!r})'
+        duration = f'{self.duration * 1000:.1f} ms' if self.duration is not None else 'pending'
+        name = f'{self.endpoint} ({self.operation})' if self.operation else self.endpoint
+        return f'{self.method} {name} {outcome} in {duration}, {self.bytes_out} B out, ' \
+               f'{self.bytes_in} B in, {self.retries} retries'
+
+
+class Hooks:
+    """Callbacks receiving a :class:`RequestEvent` around every call of a client.
+
+    before_request is called before the first attempt, after_response once the last answer is received and on_error
+    when the call fails, either with an error status or without an answer. When no callback is registered, the
+    client skips building the events, so the hooks cost nothing. An exception raised by a callback is logged and
+    does not affect the request.
+    """
+
+    def __init__(self):
+        self.callbacks = {event: [] for event in HOOK_EVENTS}
+
+    def add(self, event, callback):
+        """Registers a callback.
+
+        Args:
+            event: One of 'before_request', 'after_response' and 'on_error'.
+            callback: Callable receiving the RequestEvent.
+
+        Returns:
+            The callback.
+
+        Raises:
+            ValueError: If the event is unknown.
+        """
+        if event not in self.callbacks:
+            raise ValueError(f'Unknown hook event "{event}", expected one of {", ".join(HOOK_EVENTS)}.')
+        self.callbacks[event] = [*self.callbacks[event], callback]  # Copied, so emit needs no lock
+        return callback
+
+    def remove(self, event, callback):
+        """Unregisters a callback, if registered.
+
+        Args:
+            event: One of 'before_request', 'after_response' and 'on_error'.
+            callback: The registered callable.
+        """
+        self.callbacks[event] = [registered for registered in self.callbacks[event] if registered != callback]
+
+    def emit(self, event, request_event):
+        """Calls the callbacks of an event.
+
+        Args:
+            event: One of 'before_request', 'after_response' and 'on_error'.
+            request_event: The RequestEvent passed to the callbacks.
+        """
+        for callback in self.callbacks[event]:
+            try:
+                callback(request_event)
+            except Exception:
+                logger.exception('The %s hook %r failed', event, callback)
+
+    def __bool__(self):
+        return any(self.callbacks.values())
+
+
+def log_request(event):
+    """after_response hook logging every call at DEBUG level, installed by :meth:`Infusionsoft.set_debug`.
+    """
+    logger.debug('%s', event)
+
+
+def log_failure(event):
+    """on_error hook logging the calls that received no answer at DEBUG level, installed by
+    :meth:`Infusionsoft.set_debug`.
+    """
+    if event.status is None:
+        logger.debug('%s', event)
+
+
+def enable_debug_logging():
+    """Sets the level of the 'infusionsoft.hooks' logger to DEBUG, for a client starting to log its calls.
+    """
+    global debug_clients, debug_previous_level
+    with debug_lock:
+        if debug_clients == 0:
+            debug_previous_level = logger.level
+        debug_clients += 1
+        logger.setLevel(logging.DEBUG)
+
+
+def disable_debug_logging():
+    """Restores the level the 'infusionsoft.hooks' logger had before :func:`enable_debug_logging`, once no client
+    logs its calls anymore.
+    """
+    global debug_clients
+    with debug_lock:
+        debug_clients = max(0, debug_clients - 1)
+        if debug_clients == 0:
+            logger.setLevel(debug_previous_level)
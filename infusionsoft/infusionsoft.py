@@ -1,56 +1,255 @@
 import http
 import json
-import pickle
 import time
-from os.path import exists
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 import base64
 import logging
-import http.client as http_client
+import threading
 import importlib
+import weakref
+from infusionsoft.hooks import Hooks, RequestEvent, content_length, current_operation, disable_debug_logging, \
+    enable_debug_logging, endpoint_name, in_operation, log_failure, log_request
+from infusionsoft.pagination import iter_records, iter_streamed_records, traced_pages
+from infusionsoft.ratelimit import RateLimiter, retry_after_seconds
+from infusionsoft.retry import RetryPolicy, RetryStats
+from infusionsoft.streaming import iter_json_array
 from infusionsoft.token import Token
+from infusionsoft.tracing import TracedHTTPAdapter, start_span
+
+BASE_URL = 'https://api.infusionsoft.com/crm/rest/v1'
+TOKEN_URL = 'https://api.infusionsoft.com/token'
+AUTO_REFRESH_RETRY_DELAY = 30
+
+# Accessor key -> (module, class) of every service object. Modules are imported on first use only.
+SERVICES = {
+    'account': ('infusionsoft.api.account', 'AccountInfo'),
+    'affiliate': ('infusionsoft.api.affiliate', 'Affiliate'),
+    'appointment': ('infusionsoft.api.appointment', 'Appointment'),
+    'campaign': ('infusionsoft.api.campaign', 'Campaign'),
+    'company': ('infusionsoft.api.company', 'Company'),
+    'contact': ('infusionsoft.api.contact', 'Contact'),
+    'ecommerce': ('infusionsoft.api.ecommerce', 'Ecommerce'),
+    'email': ('infusionsoft.api.email', 'Email'),
+    'emailaddress': ('infusionsoft.api.emailaddress', 'EmailAddress'),
+    'file': ('infusionsoft.api.file', 'File'),
+    'locale': ('infusionsoft.api.locale', 'Locale'),
+    'merchant': ('infusionsoft.api.merchant', 'Merchant'),
+    'note': ('infusionsoft.api.note', 'Note'),
+    'opportunity': ('infusionsoft.api.opportunity', 'Opportunity'),
+    'product': ('infusionsoft.api.product', 'Product'),
+    'resthook': ('infusionsoft.api.resthook', 'RestHook'),
+    'setting': ('infusionsoft.api.setting', 'Setting'),
+    'tags': ('infusionsoft.api.tags', 'Tags'),
+    'tasks': ('infusionsoft.api.task', 'Tasks'),
+    'userinfo': ('infusionsoft.api.userinfo', 'UserInfo'),
+    'users': ('infusionsoft.api.users', 'Users'),
+}
+
+logger = logging.getLogger(__name__)
 
 
 class Infusionsoft:
     """Infusionsoft object for using their `REST API <https://developer.infusionsoft.com/docs/rest/#!>`.
     """
 
-    def __init__(self, client_id, client_secret):
+    def __init__(self, client_id, client_secret, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 timeout=None, rate_limiter=None, retry_policy=None, refresh_margin=300, auto_refresh=True,
+                 token_store=None, cache=None, coalesce=False, codec=None, hooks=None, metrics=None,
+                 tracer=None, base_url=BASE_URL, token_url=TOKEN_URL, cassette=None):
         """Creates a new Infusionsoft object.
 
         Args: client_id: The application client id which can be found `here
         <https://keys.developer.keap.com/my-apps>`. client_secret: The application client secret which can be found
         `here <https://keys.developer.keap.com/my-apps>`.
+            pool_connections: Number of per-host connection pools to keep. Defaults to 10.
+            pool_maxsize: Maximum number of keep-alive connections kept open for each host. Defaults to 10.
+            pool_block: Whether to block when all the connections of a host are in use instead of opening a
+                throwaway one. Defaults to False.
+            timeout: Default timeout in seconds for every request, either a number or a (connect, read) tuple.
+                Defaults to None.
+            rate_limiter: The RateLimiter throttling the requests. Defaults to the limiter shared by every client of
+                the same application in this process.
+            retry_policy: The RetryPolicy applied to failed requests. Defaults to RetryPolicy().
+            refresh_margin: Number of seconds before the end of life of the token when it is refreshed.
+                Defaults to 300.
+            auto_refresh: Whether to refresh the token from a background thread before it expires, so that no
+                request waits for the refresh. The thread sleeps until refresh_margin seconds before the end of
+                life and stops with :meth:`close`, or once the object is garbage collected. When disabled, the token
+                is still refreshed by the first request finding it within refresh_margin of its end of life.
+                Defaults to True.
+            token_store: The TokenStore persisting the token, which may be shared by several processes.
+                Defaults to a FileTokenStore writing 'token.json' in the current working directory, which imports the
+                'token.dat' pickle of older versions once.
+            cache: The ResponseCache serving read-mostly GET endpoints. Defaults to None, which disables caching.
+            coalesce: Whether identical GET requests in flight at the same time share one network call and its
+                parsed answer, which must then not be modified. Defaults to False.
+            codec: The JsonCodec encoding the request bodies and decoding the answers, or the name of one of
+                CODECS. Defaults to the fastest installed one: orjson, then ujson, then the standard library.
+            hooks: The Hooks called around every request, which may be shared by several clients.
+                Defaults to new Hooks with no callback.
+            metrics: The Metrics registry recording the requests of this object. Defaults to None.
+            tracer: The Tracer creating spans for the calls, pages and bulk jobs of this object. Defaults to None,
+                which disables tracing.
+            base_url: Root URL of the REST API, e.g. the url of a FakeKeapServer. Defaults to BASE_URL.
+            token_url: URL of the OAuth token endpoint. Defaults to TOKEN_URL.
+            cassette: The Cassette recording the calls of this object, or answering them without network access.
+                Defaults to None.
+
+        Raises:
+            InfusionsoftException: If the requested codec is unknown or its library is not installed.
         """
         self.client_id = client_id
         self.client_secret = client_secret
         self.token = None
         self.api = {}
         self.cached_objects = dict()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter.shared(client_id)
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.refresh_margin = refresh_margin
+        self.auto_refresh = auto_refresh
+        if token_store is None:
+            from infusionsoft.tokenstore import FileTokenStore  # Not imported by clients given their own store
+            token_store = FileTokenStore(legacy_path='token.dat')
+        self.token_store = token_store
+        self.base_url = base_url.rstrip('/')
+        self.token_url = token_url
+        self.cache = cache
+        self.coalescer = self.create_coalescer() if coalesce else None
+        self.codec = self.create_codec(codec)
+        self.hooks = hooks if hooks is not None else Hooks()
+        self.debug_hooks = None
+        if metrics is not None:
+            metrics.attach(self.hooks)
+        self.token_lock = threading.Lock()
+        self.refresher = None
+        self.refresher_stop = threading.Event()
+        self.tracer = tracer
+        self.cassette = cassette
+        self.session = self.create_session()
+
+    def create_session(self):
+        """Creates the pooled HTTP session shared by every request of this object.
+        Connections are kept alive and reused, so only the first call to a host pays for the TCP and TLS handshake.
+
+        Returns:
+            The configured session.
+        """
+        session = requests.Session()
+        adapter_class = TracedHTTPAdapter if self.tracer is not None else HTTPAdapter
+        adapter = adapter_class(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        if self.cassette is not None:
+            adapter = self.cassette.adapter(adapter)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Connection': 'keep-alive'})
+        return session
+
+    @staticmethod
+    def create_codec(codec=None):
+        """Resolves the JSON codec of this object.
+
+        Args:
+            codec: A JsonCodec object, the name of one of CODECS or None for the fastest installed one.
+
+        Returns:
+            The codec.
+
+        Raises:
+            InfusionsoftException: If the codec is unknown or its library is not installed.
+        """
+        from infusionsoft.codec import CODECS, default_codec  # Imports only the library of the selected codec
+        if codec is None:
+            return default_codec()
+        if not isinstance(codec, str):
+            return codec
+        codec_class = CODECS.get(codec)
+        if codec_class is None or not codec_class.available():
+            raise InfusionsoftException(f'The JSON codec "{codec}" is unknown or not installed.')
+        return codec_class()
+
+    def create_coalescer(self):
+        """Creates the object sharing identical GET requests in flight.
 
-        # Logging initializer
-        http_client.HTTPConnection.debuglevel = 0
-        logging.basicConfig()
-        logging.getLogger().setLevel(logging.DEBUG)
-        requests_log = logging.getLogger("requests.packages.urllib3")
-        requests_log.setLevel(logging.DEBUG)
-        requests_log.propagate = True
-        logging.disable(logging.DEBUG)
+        Returns:
+            The request coalescer.
+        """
+        from infusionsoft.coalesce import RequestCoalescer
+        return RequestCoalescer()
+
+    def close(self):
+        """Closes the pooled HTTP session and every connection it keeps open, and stops the background refresh.
+        """
+        self.stop_auto_refresh()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def set_debug(self, flag: bool):
         """Enable or disable debug for HTTP requests.
+        Every call of this object is then logged at DEBUG level on the 'infusionsoft.hooks' logger, through hooks
+        kept apart from the hooks it may share with other clients. The level of that logger is set to DEBUG while
+        debug is enabled and restored afterwards. The handlers of the application are left untouched, so one must
+        show DEBUG records, e.g. ``logging.basicConfig()``.
 
         Args:
             flag: True to enable the debug, false to disable it.
         """
-        if flag:
-            logging.disable(logging.NOTSET)
-            http_client.HTTPConnection.debuglevel = 1
-        else:
-            logging.disable(logging.DEBUG)
-            http_client.HTTPConnection.debuglevel = 0
+        if flag and self.debug_hooks is None:
+            debug_hooks = Hooks()
+            debug_hooks.add('after_response', log_request)
+            debug_hooks.add('on_error', log_failure)
+            enable_debug_logging()
+            self.debug_hooks = debug_hooks
+        elif not flag and self.debug_hooks is not None:
+            self.debug_hooks = None
+            disable_debug_logging()
+
+    def emit_hook(self, event, request_event):
+        """Calls the callbacks of an event, registered on the hooks of this object and by :meth:`set_debug`.
+
+        Args:
+            event: One of 'before_request', 'after_response' and 'on_error'.
+            request_event: The RequestEvent passed to the callbacks.
+        """
+        self.hooks.emit(event, request_event)
+        if self.debug_hooks is not None:
+            self.debug_hooks.emit(event, request_event)
+
+    def add_hook(self, event, callback):
+        """Registers a callback called around every request, see :class:`Hooks`.
+
+        Args:
+            event: One of 'before_request', 'after_response' and 'on_error'.
+            callback: Callable receiving the RequestEvent describing the request.
+
+        Returns:
+            The callback.
+        """
+        if callback in self.hooks.callbacks.get(event, ()):
+            return callback
+        return self.hooks.add(event, callback)
+
+    def remove_hook(self, event, callback):
+        """Unregisters a callback, if registered.
+
+        Args:
+            event: One of 'before_request', 'after_response' and 'on_error'.
+            callback: The registered callable.
+        """
+        self.hooks.remove(event, callback)
 
     def is_token_serialized(self):
         """Check whether a token has been serialized previously.
@@ -58,19 +257,40 @@ class Infusionsoft:
         Returns:
             True if the serialized token exists, false otherwise.
         """
-        return exists('token.dat')
+        return self.token_store.exists()
 
     def deserialize_token(self):
         """Deserialize a previously stored token.
         """
-        with open('token.dat', 'rb') as f:
-            token = pickle.load(f)
-        return token
+        return self.token_store.load()
 
     def set_token(self, token) -> None:
         """Set the token for the Infusionsoft object.
+        Starts the background refresh if auto_refresh is enabled.
         """
         self.token = token
+        if self.auto_refresh:
+            self.start_auto_refresh()
+
+    def start_auto_refresh(self):
+        """Starts a daemon thread refreshing the token refresh_margin seconds before its end of life.
+        The thread holds this object weakly, so it also stops once the object is garbage collected.
+        """
+        if self.refresher is not None and self.refresher.is_alive():
+            return
+        self.refresher_stop = threading.Event()
+        weakref.finalize(self, self.refresher_stop.set)
+        self.refresher = threading.Thread(target=_auto_refresh, args=(weakref.ref(self), self.refresher_stop),
+                                          name='infusionsoft-token-refresh', daemon=True)
+        self.refresher.start()
+
+    def stop_auto_refresh(self):
+        """Stops the background refresh thread, if running.
+        """
+        self.refresher_stop.set()
+        if self.refresher is not None and self.refresher is not threading.current_thread():
+            self.refresher.join()
+        self.refresher = None
 
     def get_new_token(self, access_token: str, refresh_token: str, end_of_life: str):
         """Generates a new token with the given parameters.
@@ -86,69 +306,266 @@ class Infusionsoft:
         token = Token(access_token, refresh_token, end_of_life)
         self.serialize_token(token)
 
-    """Serialize token.
-        Args: 
-            token: the token to be serialized.
-    """
     def serialize_token(self, token):
-        with open('token.dat', 'wb') as f:
-            pickle.dump(token, f)
+        """Serialize token.
+
+        Args:
+            token: the token to be serialized.
+        """
+        self.token_store.save(token)
 
     def refresh_token(self):
         """Refreshes an expired token.
+        Concurrent callers wait for the refresh in flight instead of starting their own.
 
         Raises:
             InfusionsoftException: If an error occurs while refreshing the token.
         """
-        url = 'https://api.infusionsoft.com/token'
-        string = f'{self.client_id}:{self.client_secret}'
-        bytes_string = string.encode('ascii')
-        base64_byes = base64.b64encode(bytes_string)
-        base64_string = base64_byes.decode('ascii')
-        headers = {'Authorization': f'Basic {base64_string}', 'Content-type': 'application/x-www-form-urlencoded'}
-        data = {'grant_type': 'refresh_token', 'refresh_token': self.token.refresh_token}
-        r = requests.post(url, data=data, headers=headers)
-        json_res = r.json()
-        if r.status_code == 200:
-            self.token.access_token = json_res.get('access_token')
-            self.token.refresh_token = json_res.get('refresh_token')
-            self.token.end_of_life = str(int(time.time()) + int(json_res.get('expires_in')))
-            self.serialize_token(self.token)
-        else:
-            raise InfusionsoftException(f'An error occurred while refreshing the token: {json_res}')
+        self.refresh_token_once(self.token.access_token)
+
+    def refresh_token_once(self, stale_access_token):
+        """Refreshes the token unless it has already been refreshed since the given access token was read.
+        Only one refresh is in flight at a time, the other callers wait for it and reuse its result. The refresh
+        holds the lock of the token store, so a token refreshed by another process sharing the store is reused too.
+
+        Args:
+            stale_access_token: The access token the caller found expired or rejected.
+
+        Raises:
+            InfusionsoftException: If an error occurs while refreshing the token.
+        """
+        with self.token_lock, self.token_store.lock():
+            if self.token.access_token != stale_access_token:
+                return
+            stored = self.token_store.load()
+            if stored is not None and stored.access_token != stale_access_token \
+                    and not stored.expires_within(self.refresh_margin):
+                self.token = stored
+                return
+            string = f'{self.client_id}:{self.client_secret}'
+            bytes_string = string.encode('ascii')
+            base64_byes = base64.b64encode(bytes_string)
+            base64_string = base64_byes.decode('ascii')
+            headers = {'Authorization': f'Basic {base64_string}', 'Content-type': 'application/x-www-form-urlencoded'}
+            data = {'grant_type': 'refresh_token', 'refresh_token': self.token.refresh_token}
+            r = self.session.post(self.token_url, data=data, headers=headers, timeout=self.timeout)
+            json_res = r.json()
+            if r.status_code == 200:
+                end_of_life = str(int(time.time()) + int(json_res.get('expires_in')))
+                self.token = Token(json_res.get('access_token'), json_res.get('refresh_token'), end_of_life,
+                                   self.token.extra_info)
+                self.serialize_token(self.token)
+            else:
+                raise InfusionsoftException(f'An error occurred while refreshing the token: {json_res}')
 
-    def request(self, method, url, params=None, data=None, json_res=None, headers=None):
-        """Performs a request to the REST endpoint.
+    def request(self, method, url, params=None, data=None, json=None, headers=None):
+        """Performs a request to the REST endpoint through the pooled session.
+        Throttled requests, server errors and connection failures are retried according to the retry policy.
+        The token is refreshed when it is about to expire, and a request rejected with 401 is replayed once after
+        refreshing it. GET answers are served from the response cache when one is configured, and identical GET
+        requests in flight at the same time share one call when coalescing is enabled.
 
         Args:
             method: The HTTP method.
             url: URL of the REST endpoint.
             params: Parameters of the request. Defaults to None.
             data: Data of the request. Defaults to None.
-            json_res: JSON of the request. Defaults to None.
+            json: JSON of the request. Defaults to None.
             headers: Headers of the request. Defaults to None.
 
         Returns:
-            The JSON of the answer or an empty JSON in case of error.
+            The JSON of the answer, or None if the answer has no content.
 
         Raises:
             RequestException
         """
+        if method.lower() != 'get' or data is not None or json is not None:
+            json_response = self._request(method, url, params, data, json, headers)
+            if method.lower() != 'get':
+                self.invalidate_cache(url)
+            return json_response
+        if self.cache is None and self.coalescer is None:
+            return self._request(method, url, params, data, json, headers)
+        from infusionsoft.cache import ResponseCache  # Imported by the users of the cache or coalescing only
+        key = ResponseCache.key(method, url, params)
+        ttl = self.cache.ttl_for(url) if self.cache is not None else 0
+        if ttl:
+            found, json_response = self.cache.get(key)
+            if found:
+                return json_response
+        if self.coalescer is not None:
+            json_response = self.coalescer.do(key, lambda: self._request(method, url, params, data, json, headers))
+        else:
+            json_response = self._request(method, url, params, data, json, headers)
+        if ttl:
+            self.cache.set(key, json_response, ttl)
+        return json_response
+
+    def invalidate_cache(self, url=None):
+        """Removes the cached answers of a resource, of the resources below it and of its collection.
+
+        Args:
+            url: URL of the resource. Defaults to None, which clears the whole cache.
+        """
+        if self.cache is None:
+            return
+        self.cache.invalidate(url)
+        if url is not None:
+            self.cache.invalidate(url.rstrip('/').rsplit('/', 1)[0], subtree=False)
+
+    def stream(self, url, key, params=None, chunk_size=65536):
+        """Performs a GET request and decodes the array of the answer incrementally, while the body is received.
+        Neither the whole body nor the whole list is held in memory, which keeps large pages with many custom fields
+        cheap. The request is retried like :meth:`request`, but its answer is never cached nor shared.
+
+        Args:
+            url: URL of the REST endpoint.
+            key: Key of the JSON answer holding the array, e.g. 'contacts'.
+            params: Parameters of the request. Defaults to None.
+            chunk_size: Number of bytes read from the connection at a time. Defaults to 65536.
+
+        Returns:
+            A generator yielding one element of the array at a time. The request is sent by this call, the body
+            is read while the generator is consumed.
+
+        Raises:
+            ApiException: If the answer is an error.
+        """
+        with start_span(self.tracer, 'request', method='GET', endpoint=endpoint_name(url),
+                        operation=current_operation.get(), offset=(params or {}).get('offset'), stream=True) as span:
+            r = self._send('get', url, params, None, None, stream=True)
+            if span is not None:
+                span.set(status=r.status_code, bytes_in=content_length(r.headers))
+        if r.status_code != 200:
+            try:
+                self._parse_response(r)
+            finally:
+                r.close()
+        return self._iter_body(r, key, chunk_size)
+
+    @staticmethod
+    def _iter_body(r, key, chunk_size):
+        try:
+            yield from iter_json_array(r.iter_content(chunk_size), key)
+        finally:
+            r.close()
+
+    def _request(self, method, url, params, data, json, headers):
+        if json is not None:
+            data = self.codec.dumps(json)
+            headers = {'Content-Type': 'application/json', **(headers or {})}
+        if self.tracer is None:
+            return self._parse_response(self._send(method, url, params, data, headers))
+        with self.tracer.span('request', method=method.upper(), endpoint=endpoint_name(url),
+                              operation=current_operation.get(),
+                              bytes_out=len(data) if isinstance(data, (bytes, str)) else None) as span:
+            r = self._send(method, url, params, data, headers)
+            span.set(status=r.status_code, bytes_in=len(r.content))
+            with self.tracer.span('decode', bytes=len(r.content)):
+                return self._parse_response(r)
+
+    def _send(self, method, url, params, data, headers, stream=False):
+        if not self.hooks and self.debug_hooks is None:
+            return self._send_with_retries(method, url, params, data, headers, stream)
+        event = RequestEvent(method, url, data)
+        self.emit_hook('before_request', event)
+        try:
+            r = self._send_with_retries(method, url, params, data, headers, stream, event)
+        except Exception as e:
+            event.finish(error=e)
+            self.emit_hook('on_error', event)
+            raise
+        event.finish(r.status_code, content_length(r.headers) if stream else len(r.content))
+        self.emit_hook('after_response', event)
+        if r.status_code >= 400:
+            self.emit_hook('on_error', event)
+        return r
+
+    def _send_with_retries(self, method, url, params, data, headers, stream, event=None):
+        if self.token.expires_within(self.refresh_margin):
+            self.refresh_token_once(self.token.access_token)
         payload = {'access_token': self.token.access_token}
         if params:
             payload.update(params)
-        method_to_call = getattr(requests, method)
-        r = method_to_call(url, params=payload, data=data, headers=headers, json=json_res)
+        attempt = 1
+        replayed = False
+        while True:
+            wait = self.rate_limiter.acquire()
+            if event is not None:
+                event.rate_limit_wait += wait
+            if self.tracer is not None and wait > 0:
+                self.tracer.record('rate_limit_wait', wait)
+            try:
+                with start_span(self.tracer, 'send', attempt=attempt) as span:
+                    r = self.session.request(method, url, params=payload, data=data, headers=headers,
+                                             timeout=self.timeout, stream=stream)
+                    if span is not None:
+                        span.set(status=r.status_code, time_to_headers=r.elapsed.total_seconds())
+            except (requests.ConnectionError, requests.Timeout):
+                if not self.retry_policy.should_retry(method, attempt):
+                    if attempt > 1:
+                        self.retry_stats.record_exhausted()
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+            else:
+                self.rate_limiter.update(r.headers)
+                retry_after = retry_after_seconds(r.headers)
+                if r.status_code == 429:
+                    self.rate_limiter.pause(1 if retry_after is None else retry_after)
+                if r.status_code == 401 and not replayed:
+                    replayed = True
+                    r.close()
+                    self.refresh_token_once(payload['access_token'])
+                    payload['access_token'] = self.token.access_token
+                    continue
+                if r.status_code in (200, 201, 204) \
+                        or not self.retry_policy.should_retry(method, attempt, r.status_code):
+                    break
+                r.close()
+                delay = self.retry_policy.backoff(attempt, retry_after)
+            self.retry_stats.record_retry(attempt, delay)
+            if event is not None:
+                event.retries += 1
+            time.sleep(delay)
+            attempt += 1
+        if attempt > 1 and r.status_code not in (200, 201, 204):
+            self.retry_stats.record_exhausted()
+        return r
+
+    def _parse_response(self, r):
         status_code = r.status_code
-        text = r.text
+        if status_code == 204:
+            return None
         try:
-            json_response = r.json()
-            if status_code != 200 and status_code != 201:
-                raise ApiException(status_code, text, json_response)
-            else:
-                return json_response
-        except RequestException:  # Will change to JSONDecodeError in future versions of request
-            raise ApiException(status_code, text, None)
+            json_response = self.codec.loads(r.content)
+        except ValueError:
+            raise ApiException(status_code, r.text, None)
+        if status_code != 200 and status_code != 201:
+            raise ApiException(status_code, r.text, json_response)
+        return json_response
+
+    def paginate(self, url, key, params=None, page_size=None, concurrency=1, stream=False):
+        """Lazily iterates over every record of a paginated list endpoint, one page at a time.
+
+        Args:
+            url: URL of the list endpoint.
+            key: Key of the JSON response holding the records, e.g. 'contacts'.
+            params: Parameters of the request. limit and offset are used as page size and starting offset.
+                Defaults to None.
+            page_size: Number of records per request. Defaults to the limit in params, or 1000.
+            concurrency: Number of pages requested in parallel once the first page returned the total count.
+                Records are still yielded in order. Defaults to 1.
+            stream: Whether to decode every page while it is received instead of loading it whole, see
+                :meth:`stream`. Pages are then requested one at a time. Defaults to False.
+
+        Returns:
+            A generator yielding one record at a time.
+        """
+        operation = current_operation.get()  # Kept for the pages requested later, possibly from other threads
+        if stream:
+            return iter_streamed_records(in_operation(operation, self.stream), url, key, params, page_size)
+        return iter_records(traced_pages(self.tracer, in_operation(operation, self.request), key), url, key, params,
+                            page_size, concurrency)
 
     def request_raw(self, method, url, body=None, headers=None):
         connection = http.client.HTTPSConnection(url)
@@ -160,24 +577,28 @@ class Infusionsoft:
         response = connection.getresponse()
         return response.read().decode()
 
-    # missing return type
     def get_api(self, service):
         """Getter for an object representing the chosen API interface.
-        Uses a cached array so no object is instantiated more than once during a request.
+        The module of the service is looked up in SERVICES and imported on first use, and the object is cached so
+        no object is instantiated more than once.
 
         Args:
-             service: the name of the requested service.
+             service: the key of the requested service in SERVICES.
+
+        Returns:
+            The object representing the service.
+
+        Raises:
+            InfusionsoftException: If the service is unknown.
         """
-        if service in self.cached_objects:
-            obj = self.cached_objects.get(service)
-        else:
+        obj = self.cached_objects.get(service)
+        if obj is None:
             try:
-                module = importlib.import_module(f"infusionsoft-im.api.{service}")
-                class_ = getattr(module, service.capitalize())
-                obj = class_(self)
-                self.cached_objects[service] = obj
-            except (ModuleNotFoundError, AttributeError):
-                raise InfusionsoftException("Unable to find the request API service object.")
+                module_name, class_name = SERVICES[service]
+            except KeyError:
+                raise InfusionsoftException(f'Unable to find the API service object "{service}".')
+            class_ = getattr(importlib.import_module(module_name), class_name)
+            obj = self.cached_objects.setdefault(service, class_(self))
         return obj
 
     def contact(self):
@@ -352,10 +773,19 @@ class Infusionsoft:
         return self.get_api(key)
 
     def users(self):
+        """Getter for the Users endpoint object.
+
+        Returns:
+             The object representing the Users endpoint.
+        """
+        key = 'users'
+        return self.get_api(key)
+
+    def user_info(self):
         """Getter for the UserInfo endpoint object.
 
         Returns:
-             The object representing the Tasks endpoint.
+             The object representing the UserInfo endpoint.
         """
         key = 'userinfo'
         return self.get_api(key)
@@ -394,3 +824,21 @@ class ApiException(Exception):
         self.message = message
         self.json = json_res
         super().__init__(self.message)
+
+
+def _auto_refresh(client_ref, stop):
+    # Body of the background refresh thread, which drops its reference to the client while sleeping
+    while not stop.is_set():
+        client = client_ref()
+        if client is None:
+            return
+        delay = client.token.seconds_left() - client.refresh_margin
+        if delay <= 0:
+            try:
+                client.refresh_token_once(client.token.access_token)
+            except (InfusionsoftException, RequestException) as e:
+                logger.warning('Background token refresh failed: %s', e)
+            delay = AUTO_REFRESH_RETRY_DELAY if client.token.expires_within(client.refresh_margin) else 0
+        del client
+        if delay > 0:
+            stop.wait(delay)
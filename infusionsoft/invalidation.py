@@ -0,0 +1,170 @@
+import threading
+
+from infusionsoft.infusionsoft import ApiException
+
+# Path of the REST collection holding the objects of every REST hook object type
+OBJECT_PATHS = {
+    'contact': 'contacts', 'company': 'companies', 'order': 'orders', 'invoice': 'orders',
+    'opportunity': 'opportunities', 'task': 'tasks', 'note': 'notes', 'product': 'products',
+    'appointment': 'appointments', 'subscription': 'subscriptions', 'affiliate': 'affiliates',
+    'contactGroup': 'tags', 'tag': 'tags',
+}
+
+# Suffixes of the event keys of a tag applied to or removed from contacts, e.g. 'contactGroup.applied'
+MEMBERSHIP_ACTIONS = ('applied', 'removed')
+
+
+class HookInvalidator:
+    """Keeps the response cache and the mirror of a client consistent with Keap from its REST hook events, so that
+    they can be used with long times to live and without polling.
+
+    Every event removes from the cache the answers of the objects it names, of the resources below them and of
+    their collection, and refreshes the records of the mirror: a changed contact, order or tag is fetched again and
+    a deleted one is removed. An applied or removed tag invalidates the tags of the contacts and the contacts of the
+    tag, and refreshes the contacts when the event names them, or else every member of the tag. Only the keys named
+    by the event are touched.
+
+    Example::
+
+        invalidator = HookInvalidator(infusionsoft, mirror)
+        invalidator.attach(receiver)
+    """
+
+    def __init__(self, infusionsoft, mirror=None, refresh_cache=False):
+        """Creates a new HookInvalidator object.
+
+        Args:
+            infusionsoft: The Infusionsoft client, whose response cache is invalidated and which fetches the
+                refreshed records.
+            mirror: The Mirror to refresh. Defaults to None.
+            refresh_cache: Whether the cacheable answers of an object are requested again once invalidated, so that
+                the next read is a hit. Defaults to False.
+        """
+        self.infusionsoft = infusionsoft
+        self.mirror = mirror
+        self.refresh_cache = refresh_cache
+        self.lock = threading.Lock()
+        self.events = 0
+        self.ignored = 0
+        self.invalidated = 0
+        self.refreshed = 0
+        self.deleted = 0
+
+    def attach(self, receiver):
+        """Handles every event of a HookReceiver.
+
+        Args:
+            receiver: The HookReceiver.
+        """
+        receiver.on('*', self.handle)
+
+    def handle(self, event):
+        """Invalidates and refreshes the objects named by an event. Raises on a failed request, so that the
+        receiver retries the event.
+
+        Args:
+            event: The HookEvent.
+        """
+        object_type, _, action = event.event_key.rpartition('.')
+        object_type = event.object_type or object_type.split('.')[0]
+        path = OBJECT_PATHS.get(object_type)
+        with self.lock:
+            self.events += 1
+            if path is None:
+                self.ignored += 1
+        if path is None:
+            return
+        if action in MEMBERSHIP_ACTIONS:
+            self._membership(event, path)
+            return
+        for object_id in dict.fromkeys(event.ids):
+            self.invalidate(path, object_id)
+            if self.mirror is not None and path in ('contacts', 'orders', 'tags'):
+                if action == 'delete':
+                    self._delete(path, object_id)
+                else:
+                    self._refresh(path, object_id)
+
+    def _membership(self, event, path):
+        if path == 'tags':
+            tag_ids = event.ids
+            contact_ids = [contact_id for key in event.object_keys for contact_id in _contact_ids(key)]
+        else:
+            contact_ids = event.ids
+            tag_ids = [key['tag_id'] for key in event.object_keys if key.get('tag_id') is not None]
+        for tag_id in dict.fromkeys(tag_ids):
+            self.invalidate('tags', tag_id)
+        for contact_id in dict.fromkeys(contact_ids):
+            self.invalidate('contacts', contact_id)
+        if self.mirror is None:
+            return
+        if contact_ids:
+            for contact_id in dict.fromkeys(contact_ids):
+                self._refresh('contacts', contact_id)
+        else:
+            for tag_id in dict.fromkeys(tag_ids):
+                self.mirror.refresh_tag(self.infusionsoft, tag_id)
+                with self.lock:
+                    self.refreshed += 1
+
+    def invalidate(self, path, object_id):
+        """Removes the cached answers of an object, of the resources below it and of its collection, then requests
+        the object again if refresh_cache is set and its answers are cacheable.
+
+        Args:
+            path: Path of the collection, e.g. 'contacts'.
+            object_id: The ID of the object.
+        """
+        cache = self.infusionsoft.cache
+        if cache is None:
+            return
+        url = f'{self.infusionsoft.base_url}/{path}/{object_id}'
+        self.infusionsoft.invalidate_cache(url)
+        with self.lock:
+            self.invalidated += 1
+        if self.refresh_cache and cache.ttl_for(url) > 0:
+            try:
+                self.infusionsoft.request('get', url)
+            except ApiException as e:
+                if e.status_code != 404:
+                    raise
+
+    def _refresh(self, path, object_id):
+        try:
+            if path == 'contacts':
+                record = self.infusionsoft.contact().retrieve_contact(object_id, {'optional_properties': 'tag_ids'})
+            elif path == 'orders':
+                record = self.infusionsoft.ecommerce().retrieve_order(object_id)
+            else:
+                record = self.infusionsoft.tags().retrieve_tag(object_id)
+        except ApiException as e:
+            if e.status_code != 404:
+                raise
+            self._delete(path, object_id)  # Deleted since the event was sent
+            return
+        self.mirror.upsert(path, [record])
+        with self.lock:
+            self.refreshed += 1
+
+    def _delete(self, path, object_id):
+        self.mirror.delete(path, object_id)
+        with self.lock:
+            self.deleted += 1
+
+    def snapshot(self):
+        """Returns the current counters.
+
+        Returns:
+            A dictionary with the number of events handled and ignored, of cached objects invalidated and of mirror
+            records refreshed and deleted.
+        """
+        with self.lock:
+            return {'events': self.events, 'ignored': self.ignored, 'invalidated': self.invalidated,
+                    'refreshed': self.refreshed, 'deleted': self.deleted}
+
+
+def _contact_ids(key):
+    # The contacts of a tag membership event, depending on the shape of the object key
+    if key.get('contact_id') is not None:
+        return [key['contact_id']]
+    return [contact['id'] for contact in key.get('contact_details') or key.get('contacts') or [] if 'id' in contact]
@@ -0,0 +1,202 @@
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Series:
+    """Counters and latency histogram of one operation.
+    """
+
+    def __init__(self, buckets):
+        self.statuses = {}
+        self.errors = {}
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.duration_sum = 0.0
+        self.retries = 0
+        self.rate_limit_waits = 0
+        self.rate_limit_wait_sum = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+
+class Metrics:
+    """In-process registry of per-operation counters and latency histograms, fed by the hooks of one or more
+    clients.
+
+    Requests are grouped by operation, the service method that performed them, e.g. 'contact.list_contact', or by
+    HTTP method and endpoint for the requests made directly through the client, e.g. 'GET contacts/{id}'. For each
+    operation the registry counts the answers by status code, the failures without answer by exception type, the
+    retries, the rate-limiter waits and the bytes sent and received, and keeps a histogram of the latencies.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Creates a new Metrics object.
+
+        Args:
+            buckets: Increasing upper bounds in seconds of the latency histogram buckets, an implicit +Inf bucket
+                is added. Defaults to DEFAULT_BUCKETS, from 5 ms to 30 s.
+        """
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def attach(self, hooks):
+        """Starts recording the requests of a client. Attaching twice to the same Hooks object, e.g. to two clients
+        sharing it, records every request once.
+
+        Args:
+            hooks: The client, or its Hooks object.
+        """
+        hooks = getattr(hooks, 'hooks', hooks)
+        for event, callback in (('after_response', self.record), ('on_error', self.record_failure)):
+            if callback not in hooks.callbacks[event]:
+                hooks.add(event, callback)
+
+    def detach(self, hooks):
+        """Stops recording the requests of a client.
+
+        Args:
+            hooks: The client, or its Hooks object.
+        """
+        hooks = getattr(hooks, 'hooks', hooks)
+        hooks.remove('after_response', self.record)
+        hooks.remove('on_error', self.record_failure)
+
+    @staticmethod
+    def operation_name(event):
+        """Names the operation of a request.
+
+        Args:
+            event: The RequestEvent.
+
+        Returns:
+            The service method, or the HTTP method and endpoint when the request was made directly.
+        """
+        return event.operation or f'{event.method} {event.endpoint}'
+
+    def record(self, event):
+        """after_response hook recording a call that received an answer.
+
+        Args:
+            event: The RequestEvent.
+        """
+        with self.lock:
+            series = self._series(event)
+            series.statuses[event.status] = series.statuses.get(event.status, 0) + 1
+
+    def record_failure(self, event):
+        """on_error hook recording a call that received no answer. Error statuses are recorded by :meth:`record`.
+
+        Args:
+            event: The RequestEvent.
+        """
+        if event.status is not None:
+            return
+        error = type(event.error).__name__
+        with self.lock:
+            series = self._series(event)
+            series.errors[error] = series.errors.get(error, 0) + 1
+
+    def _series(self, event):
+        name = self.operation_name(event)
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = _Series(self.buckets)
+        series.count += 1
+        series.bucket_counts[bisect.bisect_left(self.buckets, event.duration)] += 1
+        series.duration_sum += event.duration
+        series.retries += event.retries
+        if event.rate_limit_wait > 0:
+            series.rate_limit_waits += 1
+            series.rate_limit_wait_sum += event.rate_limit_wait
+        series.bytes_out += event.bytes_out or 0
+        series.bytes_in += event.bytes_in or 0
+        return series
+
+    def snapshot(self):
+        """Returns the current values.
+
+        Returns:
+            A dictionary mapping every operation to a dictionary with its number of calls, answers by status code,
+            failures by exception type, total and histogram of the latencies in seconds, retries, rate-limiter
+            waits and their total in seconds, and bytes sent and received. The histogram maps every bucket upper
+            bound to the cumulative number of calls, as in Prometheus.
+        """
+        with self.lock:
+            result = {}
+            for name, series in self.series.items():
+                cumulative = 0
+                histogram = {}
+                for bound, count in zip(self.buckets + (float('inf'),), series.bucket_counts):
+                    cumulative += count
+                    histogram[bound] = cumulative
+                result[name] = {'count': series.count, 'statuses': dict(series.statuses),
+                                'errors': dict(series.errors), 'duration_sum': series.duration_sum,
+                                'duration_histogram': histogram, 'retries': series.retries,
+                                'rate_limit_waits': series.rate_limit_waits,
+                                'rate_limit_wait_sum': series.rate_limit_wait_sum, 'bytes_out': series.bytes_out,
+                                'bytes_in': series.bytes_in}
+            return result
+
+    def to_prometheus(self, prefix='infusionsoft'):
+        """Exports the current values in the Prometheus text exposition format.
+
+        Args:
+            prefix: Prefix of the metric names. Defaults to 'infusionsoft'.
+
+        Returns:
+            The text to serve on a /metrics endpoint, or to write to a file.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, description, samples):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for suffix, labels, value in samples:
+                label_text = ','.join(f'{label}="{_escape(label_value)}"' for label, label_value in labels)
+                lines.append(f'{prefix}_{name}{suffix}{{{label_text}}} {_number(value)}')
+
+        family('requests_total', 'counter', 'Calls answered, by operation and status code.',
+               [('', (('operation', operation), ('status', status)), count)
+                for operation, values in snapshot.items() for status, count in sorted(values['statuses'].items())])
+        family('request_failures_total', 'counter', 'Calls that received no answer, by operation and exception.',
+               [('', (('operation', operation), ('error', error)), count)
+                for operation, values in snapshot.items() for error, count in sorted(values['errors'].items())])
+        duration_samples = []
+        for operation, values in snapshot.items():
+            for bound, count in values['duration_histogram'].items():
+                duration_samples.append(('_bucket', (('operation', operation), ('le', _number(bound))), count))
+            duration_samples.append(('_sum', (('operation', operation),), values['duration_sum']))
+            duration_samples.append(('_count', (('operation', operation),), values['count']))
+        family('request_duration_seconds', 'histogram', 'Latency of the calls, retries and waits included.',
+               duration_samples)
+        for name, key, description in (
+                ('retries_total', 'retries', 'Attempts after the first one.'),
+                ('rate_limit_waits_total', 'rate_limit_waits', 'Calls that waited for the rate limiter.'),
+                ('rate_limit_wait_seconds_total', 'rate_limit_wait_sum', 'Time spent waiting for the rate limiter.'),
+                ('sent_bytes_total', 'bytes_out', 'Size of the request bodies.'),
+                ('received_bytes_total', 'bytes_in', 'Size of the answer bodies.')):
+            family(name, 'counter', description,
+                   [('', (('operation', operation),), values[key]) for operation, values in snapshot.items()])
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Removes every recorded value.
+        """
+        with self.lock:
+            self.series.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
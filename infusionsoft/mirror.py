@@ -0,0 +1,415 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from infusionsoft.sync import COLLECTIONS, CheckpointStore, SyncCollection, SyncEngine, format_time, parse_time
+
+# Collections synchronized by Mirror.sync, the tag memberships of the contacts are requested with them
+MIRRORED_COLLECTIONS = {
+    'contacts': SyncCollection('contact', 'list_contact', 'contacts', order='id',
+                               params={'optional_properties': 'tag_ids'}),
+    'orders': COLLECTIONS['orders'],
+}
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS contacts (id INTEGER PRIMARY KEY, email TEXT, email_domain TEXT, '
+    'given_name TEXT, family_name TEXT, last_updated TEXT, data TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS contacts_email ON contacts (email)',
+    'CREATE INDEX IF NOT EXISTS contacts_email_domain ON contacts (email_domain)',
+    'CREATE INDEX IF NOT EXISTS contacts_last_updated ON contacts (last_updated)',
+    'CREATE TABLE IF NOT EXISTS contact_tags (tag_id INTEGER NOT NULL, contact_id INTEGER NOT NULL, '
+    'date_applied TEXT, PRIMARY KEY (tag_id, contact_id)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS contact_tags_contact ON contact_tags (contact_id, tag_id)',
+    'CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT, category_id INTEGER, data TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS tags_name ON tags (name)',
+    'CREATE TABLE IF NOT EXISTS orders (id INTEGER PRIMARY KEY, contact_id INTEGER, status TEXT, '
+    'last_updated TEXT, data TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS orders_contact ON orders (contact_id)',
+    'CREATE INDEX IF NOT EXISTS orders_last_updated ON orders (last_updated)',
+    'CREATE TABLE IF NOT EXISTS checkpoints (name TEXT PRIMARY KEY, checkpoint TEXT NOT NULL)',
+)
+
+
+class Mirror(CheckpointStore):
+    """Local copy of the contacts, their tags and the orders of a Keap application in a SQLite database, to serve
+    look-ups without calling the API.
+
+    :meth:`sync` fetches the records changed since the previous run with a SyncEngine, whose checkpoints are kept
+    in the same database, and the whole list of tags. Contacts are indexed by email, email domain and modification
+    date, tag memberships both ways and orders by contact and modification date, so the query helpers answer in
+    microseconds. Every thread reads through its own connection and the file is in WAL mode, so reads are not
+    blocked by a running synchronization.
+
+    Applying or removing a tag does not always change the modification date of a contact, :meth:`refresh_tag`
+    fetches the members of a tag again.
+
+    Example::
+
+        mirror = Mirror('keap.db')
+        mirror.sync(infusionsoft)
+        vips = mirror.find_contacts(tag_ids=[42], email_domain='example.com')
+    """
+
+    def __init__(self, path='mirror.db', timeout=30.0):
+        """Creates a new Mirror object, and the tables of the database if needed.
+
+        Args:
+            path: Path of the database, or ':memory:' for a database living as long as the object.
+                Defaults to 'mirror.db' in the current working directory.
+            timeout: Seconds to wait for another connection writing to the database. Defaults to 30.
+        """
+        self.memory = path == ':memory:'
+        self.path = f'file:mirror-{id(self)}?mode=memory&cache=shared' if self.memory else os.path.abspath(path)
+        self.timeout = timeout
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.keeper = self._connect()  # Keeps an in-memory database alive
+        if not self.memory:
+            self.keeper.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            self.keeper.execute(statement)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, uri=self.memory,
+                                     check_same_thread=False)
+        connection.execute('PRAGMA synchronous=NORMAL')
+        if self.memory:
+            connection.execute('PRAGMA read_uncommitted=1')  # Readers do not wait for the table locks of the writer
+        return connection
+
+    @property
+    def connection(self):
+        """The connection of the current thread.
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = self._connect()
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """Context manager holding a write transaction, committed when the block exits without exception.
+
+        Returns:
+            The connection of the current thread.
+        """
+        with self.write_lock:
+            connection = self.connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        """Closes the connection of the current thread and the one keeping the database open.
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+        self.keeper.close()
+
+    def sync(self, infusionsoft, names=None, page_size=1000, lag=120):
+        """Fetches the tags, and the contacts and orders modified since the previous synchronization.
+
+        Args:
+            infusionsoft: The Infusionsoft client.
+            names: Names of the collections, among MIRRORED_COLLECTIONS. Defaults to contacts and orders.
+            page_size: Number of records requested per page. Defaults to 1000.
+            lag: Seconds left for the next run, see SyncEngine. Defaults to 120.
+
+        Returns:
+            A dictionary mapping every synchronized collection to its SyncResult.
+        """
+        self.sync_tags(infusionsoft)
+        engine = SyncEngine(infusionsoft, self, page_size, lag, MIRRORED_COLLECTIONS)
+        return engine.sync_all(self.upsert, names)
+
+    def sync_tags(self, infusionsoft):
+        """Replaces the tags with the current list. Tag memberships are kept.
+
+        Args:
+            infusionsoft: The Infusionsoft client.
+
+        Returns:
+            The number of tags.
+        """
+        tags = list(infusionsoft.tags().iter_tags())
+        with self.transaction() as connection:
+            connection.execute('DELETE FROM tags')
+            self._upsert_tags(connection, tags)
+        return len(tags)
+
+    def refresh_tag(self, infusionsoft, tag_id):
+        """Replaces the members of a tag with the contacts it is currently applied to.
+
+        Args:
+            infusionsoft: The Infusionsoft client.
+            tag_id: The ID of the tag.
+
+        Returns:
+            The number of members.
+        """
+        members = [(tag_id, entry['contact']['id'], entry.get('date_applied'))
+                   for entry in infusionsoft.tags().iter_tagged_contacts(tag_id)]
+        with self.transaction() as connection:
+            connection.execute('DELETE FROM contact_tags WHERE tag_id = ?', (tag_id,))
+            connection.executemany('INSERT OR REPLACE INTO contact_tags (tag_id, contact_id, date_applied) '
+                                   'VALUES (?, ?, ?)', members)
+        return len(members)
+
+    def upsert(self, name, records):
+        """Inserts or replaces records, e.g. as the handler of a SyncEngine. The tag memberships of a contact are
+        replaced when its record has tag_ids.
+
+        Args:
+            name: Name of the collection, 'contacts', 'orders' or 'tags'.
+            records: The records, as returned by Keap.
+
+        Raises:
+            ValueError: If the collection is not mirrored.
+        """
+        upsert = {'contacts': self._upsert_contacts, 'orders': self._upsert_orders, 'tags': self._upsert_tags}.get(name)
+        if upsert is None:
+            raise ValueError(f'The {name} collection is not mirrored.')
+        with self.transaction() as connection:
+            upsert(connection, records)
+
+    def delete(self, name, record_id):
+        """Removes a record, and the tag memberships of a contact or of a tag.
+
+        Args:
+            name: Name of the collection, 'contacts', 'orders' or 'tags'.
+            record_id: The ID of the record.
+
+        Raises:
+            ValueError: If the collection is not mirrored.
+        """
+        if name not in ('contacts', 'orders', 'tags'):
+            raise ValueError(f'The {name} collection is not mirrored.')
+        with self.transaction() as connection:
+            connection.execute(f'DELETE FROM {name} WHERE id = ?', (record_id,))
+            if name == 'contacts':
+                connection.execute('DELETE FROM contact_tags WHERE contact_id = ?', (record_id,))
+            elif name == 'tags':
+                connection.execute('DELETE FROM contact_tags WHERE tag_id = ?', (record_id,))
+
+    def _upsert_contacts(self, connection, records):
+        rows = []
+        memberships = []
+        for record in records:
+            email = _primary_email(record)
+            rows.append((record['id'], email, email.rpartition('@')[2] if email else None, record.get('given_name'),
+                         record.get('family_name'), _normalized_time(record.get('last_updated')),
+                         json.dumps(record, separators=(',', ':'))))
+            if 'tag_ids' in record:
+                memberships.append((record['id'], record['tag_ids'] or []))
+        connection.executemany('INSERT OR REPLACE INTO contacts (id, email, email_domain, given_name, family_name, '
+                               'last_updated, data) VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        for contact_id, tag_ids in memberships:
+            connection.execute(f'DELETE FROM contact_tags WHERE contact_id = ? AND tag_id NOT IN '
+                               f'({",".join("?" * len(tag_ids))})', (contact_id, *tag_ids))
+            connection.executemany('INSERT OR IGNORE INTO contact_tags (tag_id, contact_id) VALUES (?, ?)',
+                                   [(tag_id, contact_id) for tag_id in tag_ids])
+
+    @staticmethod
+    def _upsert_orders(connection, records):
+        connection.executemany(
+            'INSERT OR REPLACE INTO orders (id, contact_id, status, last_updated, data) VALUES (?, ?, ?, ?, ?)',
+            [(record['id'], record.get('contact_id') or (record.get('contact') or {}).get('id'),
+              record.get('status'),
+              _normalized_time(record.get('last_updated') or record.get('modification_date')),
+              json.dumps(record, separators=(',', ':'))) for record in records])
+
+    @staticmethod
+    def _upsert_tags(connection, records):
+        connection.executemany(
+            'INSERT OR REPLACE INTO tags (id, name, category_id, data) VALUES (?, ?, ?, ?)',
+            [(record['id'], record.get('name'), (record.get('category') or {}).get('id'),
+              json.dumps(record, separators=(',', ':'))) for record in records])
+
+    def get_contact(self, contact_id):
+        """Returns a contact.
+
+        Args:
+            contact_id: The ID of the contact.
+
+        Returns:
+            The record of the contact, or None if it is not in the mirror.
+        """
+        row = self.connection.execute('SELECT data FROM contacts WHERE id = ?', (contact_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_contact_ids(self, email=None, email_domain=None, tag_ids=None, any_tag_ids=None, updated_since=None,
+                         limit=None):
+        """Returns the IDs of the contacts matching every given criterion, in increasing order.
+
+        Args:
+            email: Email address of the contacts, case insensitive. Defaults to None.
+            email_domain: Domain of the email address of the contacts, e.g. 'example.com'. Defaults to None.
+            tag_ids: IDs of tags that are all applied to the contacts. Defaults to None.
+            any_tag_ids: IDs of tags of which at least one is applied to the contacts. Defaults to None.
+            updated_since: Modification date, as a datetime or an ISO 8601 string, from which the contacts were
+                modified. Defaults to None.
+            limit: Maximum number of IDs. Defaults to None, for all of them.
+
+        Returns:
+            A list of contact IDs.
+        """
+        sql, args = self._contact_query('id', email, email_domain, tag_ids, any_tag_ids, updated_since, limit)
+        return [row[0] for row in self.connection.execute(sql, args)]
+
+    def find_contacts(self, email=None, email_domain=None, tag_ids=None, any_tag_ids=None, updated_since=None,
+                      limit=None):
+        """Returns the contacts matching every given criterion, in increasing order of ID.
+        See :meth:`find_contact_ids` for the criteria.
+
+        Returns:
+            A list of contact records.
+        """
+        sql, args = self._contact_query('data', email, email_domain, tag_ids, any_tag_ids, updated_since, limit)
+        return [json.loads(row[0]) for row in self.connection.execute(sql, args)]
+
+    @staticmethod
+    def _contact_query(columns, email, email_domain, tag_ids, any_tag_ids, updated_since, limit):
+        conditions = []
+        args = []
+        if email is not None:
+            conditions.append('email = ?')
+            args.append(email.lower())
+        if email_domain is not None:
+            conditions.append('email_domain = ?')
+            args.append(email_domain.lower())
+        for tag_id in tag_ids or ():
+            conditions.append('id IN (SELECT contact_id FROM contact_tags WHERE tag_id = ?)')
+            args.append(tag_id)
+        if any_tag_ids:
+            conditions.append(f'id IN (SELECT contact_id FROM contact_tags WHERE tag_id IN '
+                              f'({",".join("?" * len(any_tag_ids))}))')
+            args.extend(any_tag_ids)
+        if updated_since is not None:
+            conditions.append('last_updated >= ?')
+            args.append(_normalized_time(updated_since))
+        sql = f'SELECT {columns} FROM contacts'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        return sql, args
+
+    def tag_ids_of(self, contact_id):
+        """Returns the tags applied to a contact.
+
+        Args:
+            contact_id: The ID of the contact.
+
+        Returns:
+            A list of tag IDs, in increasing order.
+        """
+        return [row[0] for row in self.connection.execute(
+            'SELECT tag_id FROM contact_tags WHERE contact_id = ? ORDER BY tag_id', (contact_id,))]
+
+    def get_tag(self, tag_id):
+        """Returns a tag.
+
+        Args:
+            tag_id: The ID of the tag.
+
+        Returns:
+            The record of the tag, or None if it is not in the mirror.
+        """
+        row = self.connection.execute('SELECT data FROM tags WHERE id = ?', (tag_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_tags(self, name=None, category_id=None):
+        """Returns the tags with the given name or category.
+
+        Args:
+            name: Name of the tags. Defaults to None.
+            category_id: ID of the category of the tags. Defaults to None.
+
+        Returns:
+            A list of tag records, in increasing order of ID.
+        """
+        conditions = [(column, value) for column, value in (('name', name), ('category_id', category_id))
+                      if value is not None]
+        sql = 'SELECT data FROM tags'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(f'{column} = ?' for column, _ in conditions)
+        return [json.loads(row[0]) for row in self.connection.execute(sql + ' ORDER BY id',
+                                                                      [value for _, value in conditions])]
+
+    def get_order(self, order_id):
+        """Returns an order.
+
+        Args:
+            order_id: The ID of the order.
+
+        Returns:
+            The record of the order, or None if it is not in the mirror.
+        """
+        row = self.connection.execute('SELECT data FROM orders WHERE id = ?', (order_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def orders_of(self, contact_id):
+        """Returns the orders of a contact.
+
+        Args:
+            contact_id: The ID of the contact.
+
+        Returns:
+            A list of order records, in increasing order of ID.
+        """
+        return [json.loads(row[0]) for row in self.connection.execute(
+            'SELECT data FROM orders WHERE contact_id = ? ORDER BY id', (contact_id,))]
+
+    def count(self, name):
+        """Returns the number of records of a collection.
+
+        Args:
+            name: Name of the collection, 'contacts', 'orders', 'tags' or 'contact_tags'.
+
+        Returns:
+            The number of records.
+
+        Raises:
+            ValueError: If the collection is not mirrored.
+        """
+        if name not in ('contacts', 'orders', 'tags', 'contact_tags'):
+            raise ValueError(f'The {name} collection is not mirrored.')
+        return self.connection.execute(f'SELECT COUNT(*) FROM {name}').fetchone()[0]
+
+    def load(self, name):
+        row = self.connection.execute('SELECT checkpoint FROM checkpoints WHERE name = ?', (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, name, checkpoint):
+        with self.transaction() as connection:
+            if checkpoint is None:
+                connection.execute('DELETE FROM checkpoints WHERE name = ?', (name,))
+            else:
+                connection.execute('INSERT OR REPLACE INTO checkpoints (name, checkpoint) VALUES (?, ?)',
+                                   (name, json.dumps(checkpoint)))
+
+
+def _primary_email(contact):
+    addresses = contact.get('email_addresses') or []
+    address = next((address for address in addresses if address.get('field') == 'EMAIL1'),
+                   addresses[0] if addresses else None)
+    email = (address or {}).get('email') or contact.get('email')
+    return email.strip().lower() if email else None
+
+
+def _normalized_time(value):
+    # Dates are stored in UTC with the same format, so that they compare as strings
+    if value is None:
+        return None
+    moment = parse_time(value) if isinstance(value, str) else value
+    return format_time(moment) if moment is not None else None
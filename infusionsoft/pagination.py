@@ -0,0 +1,218 @@
+from collections import deque
+
+from infusionsoft.hooks import endpoint_name
+from infusionsoft.tracing import current_span
+
+DEFAULT_PAGE_SIZE = 1000
+
+
+def _page_params(params, page_size):
+    """Splits the caller parameters into the base query, the page size and the first offset.
+    """
+    query = dict(params) if params else {}
+    limit = int(query.pop('limit', DEFAULT_PAGE_SIZE))
+    if page_size:
+        limit = page_size
+    offset = int(query.pop('offset', 0))
+    return query, limit, offset
+
+
+def _is_last_page(records, limit, offset, count):
+    if len(records) < limit:
+        return True
+    return count is not None and offset + limit >= count
+
+
+def traced_pages(tracer, request, key):
+    """Wraps the callable requesting the pages so that every page is traced as a 'page' span, with its endpoint,
+    offset, limit and number of records. The spans nest below the span open when this function is called, also
+    for the pages prefetched from other threads.
+
+    Args:
+        tracer: The Tracer, or None when tracing is disabled.
+        request: The callable performing the request, usually :meth:`Infusionsoft.request`.
+        key: Key of the JSON response holding the records.
+
+    Returns:
+        The wrapped callable, or the request itself when tracing is disabled.
+    """
+    if tracer is None:
+        return request
+    parent = current_span.get()
+
+    def call(method, url, params=None):
+        with tracer.span('page', parent, endpoint=endpoint_name(url), offset=params.get('offset'),
+                         limit=params.get('limit')) as span:
+            page = request(method, url, params=params)
+            span.set(records=len(page.get(key) or []))
+            return page
+
+    return call
+
+
+def atraced_pages(tracer, request, key):
+    """Asynchronous counterpart of :func:`traced_pages`, for request callables returning awaitables.
+    """
+    if tracer is None:
+        return request
+    parent = current_span.get()
+
+    async def call(method, url, params=None):
+        with tracer.span('page', parent, endpoint=endpoint_name(url), offset=params.get('offset'),
+                         limit=params.get('limit')) as span:
+            page = await request(method, url, params=params)
+            span.set(records=len(page.get(key) or []))
+            return page
+
+    return call
+
+
+def iter_records(request, url, key, params=None, page_size=None, concurrency=1):
+    """Lazily iterates over the records of a paginated list endpoint.
+    Only one page is held in memory: the next one is requested when the current one has been consumed.
+
+    With a concurrency greater than one the total count returned by the first page is used to request the following
+    pages in parallel from a bounded thread pool. Records are still yielded in order and at most concurrency pages
+    are held in memory. Records created or deleted during the scan may shift the offsets, as with any offset scan.
+
+    Args:
+        request:
+            The callable performing the request, usually :meth:`Infusionsoft.request`.
+        url:
+            URL of the list endpoint.
+        key:
+            Key of the JSON response holding the records, e.g. 'contacts'.
+        params:
+            Dictionary of query string parameters. limit and offset are used as page size and starting offset.
+        page_size:
+            Number of records per request. Defaults to the limit in params, or 1000.
+        concurrency:
+            Maximum number of pages requested at the same time. Defaults to 1.
+
+    Returns:
+        A generator yielding one record at a time.
+    """
+    query, limit, offset = _page_params(params, page_size)
+    while True:
+        page = request('get', url, params={**query, 'limit': limit, 'offset': offset})
+        records = page.get(key) or []
+        count = page.get('count')
+        yield from records
+        if _is_last_page(records, limit, offset, count):
+            return
+        offset += limit
+        if concurrency > 1 and count is not None:
+            yield from _prefetch_records(request, url, key, query, limit, range(offset, count, limit), concurrency)
+            return
+
+
+def _prefetch_records(request, url, key, query, limit, offsets, concurrency):
+    from concurrent.futures import ThreadPoolExecutor  # Imported here so that sequential pagination does not pay for it
+    offsets = iter(offsets)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for offset in offsets:
+                pending.append(executor.submit(request, 'get', url, params={**query, 'limit': limit, 'offset': offset}))
+                if len(pending) == concurrency:
+                    break
+            while pending:
+                page = pending.popleft().result()
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(executor.submit(request, 'get', url,
+                                                   params={**query, 'limit': limit, 'offset': offset}))
+                yield from page.get(key) or []
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def aiter_records(request, url, key, params=None, page_size=None, concurrency=1):
+    """Asynchronous counterpart of :func:`iter_records`, for clients whose request method is a coroutine.
+    Pages prefetched in parallel are requested as tasks of the running event loop.
+
+    Returns:
+        An asynchronous generator yielding one record at a time.
+    """
+    import asyncio  # Imported here so that synchronous clients do not pay for importing asyncio
+    query, limit, offset = _page_params(params, page_size)
+    while True:
+        page = await request('get', url, params={**query, 'limit': limit, 'offset': offset})
+        records = page.get(key) or []
+        count = page.get('count')
+        for record in records:
+            yield record
+        if _is_last_page(records, limit, offset, count):
+            return
+        offset += limit
+        if concurrency > 1 and count is not None:
+            break
+    offsets = iter(range(offset, count, limit))
+    pending = deque()
+    try:
+        for offset in offsets:
+            pending.append(asyncio.ensure_future(request('get', url, params={**query, 'limit': limit,
+                                                                               'offset': offset})))
+            if len(pending) == concurrency:
+                break
+        while pending:
+            page = await pending.popleft()
+            offset = next(offsets, None)
+            if offset is not None:
+                pending.append(asyncio.ensure_future(request('get', url, params={**query, 'limit': limit,
+                                                                                   'offset': offset})))
+            for record in page.get(key) or []:
+                yield record
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def iter_streamed_records(stream, url, key, params=None, page_size=None):
+    """Lazily iterates over the records of a paginated list endpoint, decoding every page while it is received.
+    Records are yielded as soon as they are decoded, so not even one page is held in memory. Pages are requested
+    one at a time, since the total count is only known once a page has been read.
+
+    Args:
+        stream:
+            The callable streaming the array of an answer, usually :meth:`Infusionsoft.stream`.
+        url:
+            URL of the list endpoint.
+        key:
+            Key of the JSON response holding the records, e.g. 'contacts'.
+        params:
+            Dictionary of query string parameters. limit and offset are used as page size and starting offset.
+        page_size:
+            Number of records per request. Defaults to the limit in params, or 1000.
+
+    Returns:
+        A generator yielding one record at a time.
+    """
+    query, limit, offset = _page_params(params, page_size)
+    while True:
+        received = 0
+        for record in stream(url, key, params={**query, 'limit': limit, 'offset': offset}):
+            received += 1
+            yield record
+        if received < limit:
+            return
+        offset += limit
+
+
+async def aiter_streamed_records(stream, url, key, params=None, page_size=None):
+    """Asynchronous counterpart of :func:`iter_streamed_records`, for clients whose stream method is an asynchronous
+    generator.
+
+    Returns:
+        An asynchronous generator yielding one record at a time.
+    """
+    query, limit, offset = _page_params(params, page_size)
+    while True:
+        received = 0
+        async for record in stream(url, key, params={**query, 'limit': limit, 'offset': offset}):
+            received += 1
+            yield record
+        if received < limit:
+            return
+        offset += limit
@@ -0,0 +1,175 @@
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+TIME_UNITS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class RateLimiter:
+    """Token bucket limiting the requests sent to Keap, shared by every thread using it.
+
+    The bucket starts from the configured limits and follows the quota and throttle headers returned by Keap
+    (``x-keap-product-throttle-*``, ``x-keap-tenant-throttle-*`` and ``x-keap-product-quota-*``), so the client sends
+    as many requests as the application is allowed to without being throttled.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rate=25.0, burst=None, daily_quota=None):
+        """Creates a new RateLimiter object.
+
+        Args:
+            rate: Requests per second allowed, or None to only follow the throttle headers. Defaults to 25, which is
+                the default Keap product throttle of 1500 requests per minute.
+            burst: Maximum number of requests that can be sent at once after an idle period. Defaults to rate.
+            daily_quota: Requests allowed until the quota resets, or None to only follow the quota headers.
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self.tokens = self.burst
+        self.quota_available = daily_quota
+        self.quota_reset = None
+        self.paused_until = 0.0
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, key, **kwargs):
+        """Getter for the process-wide limiter of a key, created with the given arguments on first use.
+        Clients of the same application should share one limiter since Keap enforces the limits per application.
+
+        Args:
+            key: The key identifying the limiter, usually the application client id.
+            **kwargs: Arguments used to create the limiter if it does not exist yet.
+
+        Returns:
+            The shared limiter.
+        """
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(**kwargs)
+            return cls._shared[key]
+
+    def reserve(self):
+        """Takes one token from the bucket without blocking.
+
+        Returns:
+            The number of seconds the caller has to wait before sending its request.
+        """
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.paused_until - now)
+            if self.rate:
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            self.last = now
+            if self.quota_available is not None:
+                if self.quota_available <= 0 and self.quota_reset is not None:
+                    wait = max(wait, self.quota_reset - time.time())
+                self.quota_available -= 1
+            return wait
+
+    def acquire(self):
+        """Blocks until the caller is allowed to send a request.
+
+        Returns:
+            The number of seconds spent waiting.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Stops every caller for the given time, e.g. after a 429 answer.
+
+        Args:
+            seconds: Number of seconds to wait before the next request.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0.0)
+
+    def update(self, headers):
+        """Adjusts the bucket to the quota and throttle headers of a response.
+
+        Args:
+            headers: The case-insensitive headers of the response.
+        """
+        rates = []
+        available = []
+        for prefix in ('x-keap-product-throttle', 'x-keap-tenant-throttle'):
+            limit = _number(headers.get(f'{prefix}-limit'))
+            seconds = _interval(headers.get(f'{prefix}-interval'), headers.get(f'{prefix}-time-unit'))
+            if limit and seconds:
+                rates.append(limit / seconds)
+            left = _number(headers.get(f'{prefix}-available'))
+            if left is not None:
+                available.append(left)
+        quota_left = _number(headers.get('x-keap-product-quota-available'))
+        quota_reset = _timestamp(headers.get('x-keap-product-quota-expiry-time'))
+        with self.lock:
+            if rates:
+                self.rate = min(rates)
+                self.burst = min(self.burst, max(1.0, self.rate))
+            if available:
+                self.tokens = min(self.tokens, min(available))
+            if quota_left is not None:
+                self.quota_available = quota_left
+            if quota_reset is not None:
+                self.quota_reset = quota_reset
+
+
+def retry_after_seconds(headers):
+    """Reads the Retry-After header of a response, given either in seconds or as an HTTP date.
+
+    Args:
+        headers: The case-insensitive headers of the response.
+
+    Returns:
+        The number of seconds to wait, or None if the header is missing or invalid.
+    """
+    value = headers.get('Retry-After')
+    seconds = _number(value)
+    if seconds is not None:
+        return max(0.0, seconds)
+    if not value:
+        return None
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _interval(interval, time_unit):
+    if not time_unit:
+        return None
+    unit = TIME_UNITS.get(time_unit.lower().rstrip('s'))
+    if unit is None:
+        return None
+    return (_number(interval) or 1) * unit
+
+
+def _timestamp(value):
+    """Converts the quota expiry time, either epoch seconds, epoch milliseconds or ISO 8601, to epoch seconds.
+    """
+    number = _number(value)
+    if number is not None:
+        return number / 1000 if number > 1e11 else number
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
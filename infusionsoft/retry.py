@@ -0,0 +1,126 @@
+import random
+import threading
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('get', 'head', 'options', 'put', 'delete')
+
+
+class RetryPolicy:
+    """Policy deciding which failed requests are sent again and how long to wait before each attempt.
+
+    A 429 answer means the request was not processed, so it is retried whatever the method. Server errors and
+    connection failures are only retried for idempotent methods, since the request may have been applied.
+    """
+
+    def __init__(self, max_attempts=5, backoff_factor=0.5, max_backoff=60.0, jitter=True,
+                 retry_statuses=RETRY_STATUSES, idempotent_methods=IDEMPOTENT_METHODS, respect_retry_after=True):
+        """Creates a new RetryPolicy object.
+
+        Args:
+            max_attempts: Maximum number of attempts for a request, the first one included. 1 disables retries.
+                Defaults to 5.
+            backoff_factor: Delay in seconds before the first retry, doubled at every following attempt.
+                Defaults to 0.5.
+            max_backoff: Maximum delay in seconds between two attempts. Defaults to 60.
+            jitter: Whether to pick a random delay between 0 and the exponential one, so that clients failing at the
+                same time do not retry at the same time. Defaults to True.
+            retry_statuses: HTTP status codes that are retried. Defaults to 429, 500, 502, 503 and 504.
+            idempotent_methods: HTTP methods that are retried after a server error or a connection failure.
+                Defaults to GET, HEAD, OPTIONS, PUT and DELETE.
+            respect_retry_after: Whether to wait for the delay of the Retry-After header when present.
+                Defaults to True.
+        """
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = set(retry_statuses)
+        self.idempotent_methods = {method.lower() for method in idempotent_methods}
+        self.respect_retry_after = respect_retry_after
+
+    def should_retry(self, method, attempt, status_code=None):
+        """Checks whether a failed attempt should be retried.
+
+        Args:
+            method: The HTTP method of the request.
+            attempt: The number of the failed attempt, starting from 1.
+            status_code: The status code of the answer, or None if the connection failed.
+
+        Returns:
+            True if the request should be sent again, false otherwise.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if status_code == 429:
+            return 429 in self.retry_statuses
+        if status_code is not None and status_code not in self.retry_statuses:
+            return False
+        return method.lower() in self.idempotent_methods
+
+    def backoff(self, attempt, retry_after=None):
+        """Computes the delay before the next attempt.
+
+        Args:
+            attempt: The number of the failed attempt, starting from 1.
+            retry_after: The delay in seconds requested by the Retry-After header, if any.
+
+        Returns:
+            The number of seconds to wait.
+        """
+        if retry_after is not None and self.respect_retry_after:
+            return retry_after
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class RetryStats:
+    """Thread-safe counters describing the retries performed by a client.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.retries = 0
+        self.retried_requests = 0
+        self.exhausted = 0
+        self.retry_time = 0.0
+
+    def record_retry(self, attempt, delay):
+        """Records a retry.
+
+        Args:
+            attempt: The number of the failed attempt, starting from 1.
+            delay: The number of seconds waited before the retry.
+        """
+        with self.lock:
+            self.retries += 1
+            if attempt == 1:
+                self.retried_requests += 1
+            self.retry_time += delay
+
+    def record_exhausted(self):
+        """Records a retried request that still failed after its last attempt.
+        """
+        with self.lock:
+            self.exhausted += 1
+
+    def snapshot(self):
+        """Returns the current counters.
+
+        Returns:
+            A dictionary with the number of retries, of requests retried at least once, of retried requests that
+            still failed and the total seconds spent waiting between attempts.
+        """
+        with self.lock:
+            return {'retries': self.retries, 'retried_requests': self.retried_requests, 'exhausted': self.exhausted,
+                    'retry_time': self.retry_time}
+
+    def reset(self):
+        """Resets every counter to zero.
+        """
+        with self.lock:
+            self.retries = 0
+            self.retried_requests = 0
+            self.exhausted = 0
+            self.retry_time = 0.0
@@ -0,0 +1,162 @@
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+NUMBER_END = WHITESPACE + ',]}'
+
+
+class _NeedMore(Exception):
+    pass
+
+
+class JsonArrayParser:
+    """Incremental parser yielding the elements of one array of a JSON object while its body is being received.
+
+    Chunks of the body are fed as they arrive and every complete element of the array is decoded on its own, so
+    neither the whole body nor the whole list is ever held in memory. The other members of the object are decoded
+    and discarded, and parsing stops once the array has been closed.
+    """
+
+    def __init__(self, key, encoding='utf-8'):
+        """Creates a new JsonArrayParser object.
+
+        Args:
+            key: Key of the top-level member holding the array, e.g. 'contacts'.
+            encoding: Encoding of the body. Defaults to 'utf-8'.
+        """
+        self.key = key
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.state = 'start'
+        self.member = None
+
+    @property
+    def done(self):
+        """True once the array has been closed, or the object ended without it.
+        """
+        return self.state == 'done'
+
+    def feed(self, chunk):
+        """Feeds the next chunk of the body.
+
+        Args:
+            chunk: The bytes received.
+
+        Returns:
+            The list of the elements completed by the chunk.
+        """
+        if self.done:
+            return []
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(chunk)
+        self.pos = 0
+        return self._parse()
+
+    def close(self):
+        """Signals the end of the body.
+
+        Returns:
+            The list of the elements completed by the end of the body.
+
+        Raises:
+            ValueError: If the body ended before the array, or the object, was complete.
+        """
+        if self.done:
+            return []
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(b'', final=True)
+        self.pos = 0
+        self.eof = True
+        records = self._parse()
+        if not self.done:
+            raise ValueError(f'Incomplete JSON body while looking for the "{self.key}" array.')
+        return records
+
+    def _parse(self):
+        records = []
+        try:
+            while not self.done:
+                self._step(records)
+        except _NeedMore:
+            pass
+        return records
+
+    def _step(self, records):
+        char = self._next_char()
+        if self.state == 'start':
+            self._expect(char, '{')
+            self.state = 'member'
+        elif self.state == 'member':
+            if char == '}':
+                self.state = 'done'
+            elif char == ',':
+                self.pos += 1
+            else:
+                self.member = self._decode()
+                self.state = 'colon'
+        elif self.state == 'colon':
+            self._expect(char, ':')
+            self.state = 'array' if self.member == self.key else 'value'
+        elif self.state == 'value':
+            self._decode()
+            self.state = 'member'
+        elif self.state == 'array':
+            if char == 'n':
+                self._decode()  # A null array
+                self.state = 'done'
+            else:
+                self._expect(char, '[')
+                self.state = 'element'
+        elif char == ']':
+            self.state = 'done'
+        elif char == ',':
+            self.pos += 1
+        else:
+            records.append(self._decode())
+
+    def _next_char(self):
+        while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+            self.pos += 1
+        if self.pos == len(self.buffer):
+            if self.eof:
+                raise ValueError(f'Incomplete JSON body while looking for the "{self.key}" array.')
+            raise _NeedMore
+        return self.buffer[self.pos]
+
+    def _expect(self, char, expected):
+        if char != expected:
+            raise ValueError(f'Expected "{expected}" at position {self.pos} of the JSON body, found "{char}".')
+        self.pos += 1
+
+    def _decode(self):
+        try:
+            value, end = self.decoder.raw_decode(self.buffer, self.pos)
+        except json.JSONDecodeError:
+            if self.eof:
+                raise
+            raise _NeedMore
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and not self.eof \
+                and (end == len(self.buffer) or self.buffer[end] not in NUMBER_END):
+            raise _NeedMore  # The number may continue in the next chunk, e.g. after '1.' or '2e'
+        self.pos = end
+        return value
+
+
+def iter_json_array(chunks, key, encoding='utf-8'):
+    """Lazily decodes the elements of one array of a JSON object from the chunks of its body.
+
+    Args:
+        chunks: Iterable of the bytes of the body, e.g. ``response.iter_content(65536)``.
+        key: Key of the top-level member holding the array, e.g. 'contacts'.
+        encoding: Encoding of the body. Defaults to 'utf-8'.
+
+    Returns:
+        A generator yielding one element at a time. Nothing is yielded if the object has no such member.
+    """
+    parser = JsonArrayParser(key, encoding)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    yield from parser.close()
@@ -0,0 +1,319 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from abc import ABCMeta, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+from infusionsoft.tracing import start_span
+
+
+class SyncCollection:
+    """How a collection is listed: the service of the client, its list method, the key of the records in the answer,
+    the order requested, if any, the other parameters of the requests and whether the endpoint filters by
+    modification date.
+    """
+
+    def __init__(self, service, method, key, order=None, params=None, windowed=True):
+        """Creates a new SyncCollection object.
+
+        Args:
+            service: Name of the client method returning the service object, e.g. 'contact'.
+            method: Name of the list method of the service, taking the query string parameters, e.g. 'list_contact'.
+            key: Key of the JSON response holding the records, e.g. 'contacts'.
+            order: Value of the order parameter giving a stable order, or None for the default order of the
+                endpoint. Defaults to None.
+            params: Dictionary of other parameters sent with every page, e.g. optional_properties. Defaults to None.
+            windowed: Whether the list method accepts the since and until parameters. Every run of a collection
+                without them fetches it whole. Defaults to True.
+        """
+        self.service = service
+        self.method = method
+        self.key = key
+        self.order = order
+        self.params = params
+        self.windowed = windowed
+
+
+COLLECTIONS = {
+    'contacts': SyncCollection('contact', 'list_contact', 'contacts', order='id'),
+    'orders': SyncCollection('ecommerce', 'list_orders', 'orders'),
+    'transactions': SyncCollection('ecommerce', 'list_transactions', 'transactions'),
+    'notes': SyncCollection('note', 'list_notes', 'notes', windowed=False),  # GET /notes has no since nor until
+    'tasks': SyncCollection('tasks', 'list_tasks', 'tasks'),
+}
+
+
+class CheckpointStore(metaclass=ABCMeta):
+    """Abstract class for defining where the checkpoints of a SyncEngine are persisted.
+    """
+
+    @abstractmethod
+    def load(self, name):
+        """Loads the checkpoint of a collection.
+
+        Args:
+            name: Name of the collection.
+
+        Returns:
+            The JSON serializable checkpoint, or None if the collection was never synchronized.
+        """
+
+    @abstractmethod
+    def save(self, name, checkpoint):
+        """Stores the checkpoint of a collection, replacing the previous one.
+
+        Args:
+            name: Name of the collection.
+            checkpoint: The JSON serializable checkpoint, or None to forget the collection.
+        """
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Checkpoint store keeping the checkpoints in memory, e.g. for tests.
+    """
+
+    def __init__(self):
+        self.checkpoints = {}
+        self.lock = threading.Lock()
+
+    def load(self, name):
+        with self.lock:
+            checkpoint = self.checkpoints.get(name)
+            return json.loads(json.dumps(checkpoint)) if checkpoint is not None else None
+
+    def save(self, name, checkpoint):
+        with self.lock:
+            if checkpoint is None:
+                self.checkpoints.pop(name, None)
+            else:
+                self.checkpoints[name] = json.loads(json.dumps(checkpoint))
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Checkpoint store keeping the checkpoints of every collection in a JSON file.
+
+    Writes are atomic, so a crash while saving leaves the previous checkpoints in place.
+    """
+
+    def __init__(self, path='sync.json'):
+        """Creates a new FileCheckpointStore object.
+
+        Args:
+            path: Path of the JSON file. Defaults to 'sync.json' in the current working directory.
+        """
+        self.path = os.path.abspath(path)
+        self.lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, name):
+        with self.lock:
+            return self._read().get(name)
+
+    def save(self, name, checkpoint):
+        with self.lock:
+            data = self._read()
+            if checkpoint is None:
+                data.pop(name, None)
+            else:
+                data[name] = checkpoint
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.sync-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, sort_keys=True)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+
+class SyncResult:
+    """Report of the synchronization of a collection.
+    """
+
+    def __init__(self, name, since, until):
+        self.name = name
+        self.since = since
+        self.until = until
+        self.records = 0
+        self.pages = 0
+        self.rewinds = 0
+        self.resumed = False
+
+    def __str__(self):
+        return f'{self.name}: {self.records} records in {self.pages} pages from {self.since or "the start"} ' \
+               f'until {self.until}'
+
+
+class SyncEngine:
+    """Incremental synchronization of Keap collections, fetching only the records changed since the previous run.
+
+    Every run of a collection lists the window of modification dates from the end of the previous run, its
+    high-water mark, until now minus a lag covering the clock difference with Keap, with the since and until
+    parameters of the list method. The first run has no lower bound and fetches the whole collection, as does every
+    run of a collection whose endpoint has no such parameters, e.g. notes. The window and the offset reached are
+    saved after every page, so a run that crashed resumes from its last page instead of starting again, and the
+    high-water mark moves to the end of the window once it is complete.
+
+    A record modified while its window is listed leaves the window, which moves the following records one offset
+    down. The total count of every page is compared with the previous one and the offset is moved back by the
+    records that left, so none is skipped. Records may then be handed twice, as may the last page of a run that
+    crashed, and the handler must be idempotent, e.g. an upsert by ID. A modified record is fetched again by the
+    next run anyway.
+
+    Example::
+
+        engine = SyncEngine(infusionsoft, FileCheckpointStore('sync.json'))
+        for result in engine.sync_all(lambda name, records: database.upsert(name, records)).values():
+            print(result)
+    """
+
+    def __init__(self, infusionsoft, checkpoints, page_size=1000, lag=120, collections=None):
+        """Creates a new SyncEngine object.
+
+        Args:
+            infusionsoft: The Infusionsoft client.
+            checkpoints: The CheckpointStore holding the high-water mark of every collection.
+            page_size: Number of records requested per page. Defaults to 1000.
+            lag: Seconds between the end of a window and now, left for the next run so that a record written by
+                Keap with a clock behind ours is not missed. Defaults to 120.
+            collections: Dictionary mapping the collection names to their SyncCollection. Defaults to COLLECTIONS,
+                contacts, orders, transactions, notes and tasks.
+        """
+        self.infusionsoft = infusionsoft
+        self.checkpoints = checkpoints
+        self.page_size = page_size
+        self.lag = lag
+        self.collections = collections if collections is not None else COLLECTIONS
+
+    def sync_all(self, handler, names=None):
+        """Synchronizes several collections, one after the other.
+
+        Args:
+            handler: Function called with the name of the collection and the list of records of every page.
+            names: Names of the collections. Defaults to every collection of the engine.
+
+        Returns:
+            A dictionary mapping every name to its SyncResult.
+        """
+        return {name: self.sync(name, handler) for name in (names if names is not None else self.collections)}
+
+    def sync(self, name, handler):
+        """Fetches the records of a collection modified since its high-water mark, resuming the previous run if it
+        did not complete. The checkpoint is saved after the handler returned, so the records of a page whose
+        handler raised are fetched again.
+
+        Args:
+            name: Name of the collection, e.g. 'contacts'.
+            handler: Function called with the name of the collection and the list of records of every page.
+
+        Returns:
+            The SyncResult.
+
+        Raises:
+            KeyError: If the collection is unknown.
+            ApiException: If a page could not be fetched. The run resumes from that page next time.
+        """
+        collection = self.collections[name]
+        list_method = getattr(getattr(self.infusionsoft, collection.service)(), collection.method)
+        checkpoint = self.checkpoints.load(name) or {}
+        window = checkpoint.get('window')
+        resumed = window is not None
+        if window is None:
+            until = format_time(datetime.now(timezone.utc) - timedelta(seconds=self.lag))
+            since = checkpoint.get('high_water') if collection.windowed else None
+            window = {'since': since, 'until': until, 'offset': 0, 'count': None}
+        result = SyncResult(name, window['since'], window['until'])
+        result.resumed = resumed
+        with start_span(self.infusionsoft.tracer, 'sync', collection=name, since=window['since'],
+                        until=window['until'], resumed=resumed) as job:
+            while True:
+                params = dict(collection.params or {}, limit=self.page_size, offset=window['offset'])
+                if collection.windowed:
+                    params['until'] = window['until']
+                if window['since'] is not None:
+                    params['since'] = window['since']
+                if collection.order is not None:
+                    params['order'] = collection.order
+                page = list_method(params)
+                records = page.get(collection.key) or []
+                count = page.get('count')
+                if count is not None and window['count'] is not None and count < window['count'] \
+                        and window['offset']:
+                    # Records listed before the offset left the window, the next ones moved down
+                    window['offset'] = max(0, window['offset'] - (window['count'] - count))
+                    window['count'] = count
+                    result.rewinds += 1
+                    continue
+                if records:
+                    handler(name, records)
+                result.records += len(records)
+                result.pages += 1
+                window['offset'] += len(records)
+                window['count'] = count
+                if len(records) < self.page_size or (count is not None and window['offset'] >= count):
+                    break
+                self.checkpoints.save(name, {'high_water': window['since'], 'window': window})
+            self.checkpoints.save(name, {'high_water': window['until']})
+            if job is not None:
+                job.set(records=result.records, pages=result.pages, rewinds=result.rewinds)
+        return result
+
+    def high_water(self, name):
+        """Returns the high-water mark of a collection.
+
+        Args:
+            name: Name of the collection.
+
+        Returns:
+            The end of the last complete window, or None if the collection was never synchronized.
+        """
+        return (self.checkpoints.load(name) or {}).get('high_water')
+
+    def reset(self, name):
+        """Forgets the checkpoint of a collection, so that the next run fetches it whole.
+
+        Args:
+            name: Name of the collection.
+        """
+        self.checkpoints.save(name, None)
+
+
+def format_time(moment):
+    """Formats a date for the since and until parameters of Keap, e.g. '2024-01-15T08:00:00.000Z'.
+
+    Args:
+        moment: The timezone aware datetime.
+
+    Returns:
+        The date in UTC, with milliseconds.
+    """
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def parse_time(value):
+    """Parses a date as written by Keap, e.g. '2024-01-15T08:00:00.000+0000', or any ISO 8601 date.
+
+    Args:
+        value: The date.
+
+    Returns:
+        The timezone aware datetime, UTC when the date has no offset, or None if the date is invalid.
+    """
+    value = value.strip().replace('Z', '+00:00')
+    value = re.sub(r'([+-]\d\d)(\d\d)$', r'\1:\2', value)
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
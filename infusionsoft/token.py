@@ -30,6 +30,46 @@ class Token:
         """
         return int(self.end_of_life) < int(time.time())
 
+    def seconds_left(self):
+        """Computes the remaining lifetime of the token.
+
+        Returns:
+            The number of seconds before the token expires, negative if it is already expired.
+        """
+        return float(self.end_of_life) - time.time()
+
+    def expires_within(self, seconds):
+        """Checks whether the token expires in the given time.
+
+        Args:
+            seconds: The number of seconds to check.
+
+        Returns:
+            True if the token is expired or expires in less than the given seconds, false otherwise.
+        """
+        return self.seconds_left() < seconds
+
+    def to_dict(self):
+        """Converts the token to a JSON serializable dictionary.
+
+        Returns:
+            The dictionary representing the token.
+        """
+        return {'access_token': self.access_token, 'refresh_token': self.refresh_token,
+                'end_of_life': self.end_of_life, 'extra_info': self.extra_info}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a token from a dictionary produced by :meth:`to_dict`.
+
+        Args:
+            data: The dictionary representing the token.
+
+        Returns:
+            The token.
+        """
+        return cls(data['access_token'], data['refresh_token'], data['end_of_life'], data.get('extra_info'))
+
     def __str__(self):
         return f'Access Token: {self.access_token}\nRefresh Token: {self.refresh_token}\nEnd Of Life: {self.end_of_life}'
 
@@ -0,0 +1,224 @@
+import json
+import os
+import tempfile
+import threading
+from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where the file store only locks between threads
+    fcntl = None
+
+from infusionsoft.token import Token
+
+
+class TokenStore(metaclass=ABCMeta):
+    """Abstract class for defining where the token of an Infusionsoft object is persisted.
+
+    A store may be shared by several threads and processes using the same Keap application. The refresh of the
+    token is performed while holding :meth:`lock`, so only one of them refreshes it and the others read the new one.
+    """
+
+    @abstractmethod
+    def load(self):
+        """Loads the stored token.
+
+        Returns:
+            The stored token, or None if no token has been stored yet.
+        """
+
+    @abstractmethod
+    def save(self, token):
+        """Stores a token, replacing the previous one.
+
+        Args:
+            token: The token to be stored.
+        """
+
+    @abstractmethod
+    def lock(self):
+        """Context manager holding an exclusive lock shared by every user of the store.
+        """
+
+    def exists(self):
+        """Checks whether a token has been stored.
+
+        Returns:
+            True if a token has been stored, false otherwise.
+        """
+        return self.load() is not None
+
+
+class MemoryTokenStore(TokenStore):
+    """Token store keeping the token in memory, shared by the threads of a single process.
+    """
+
+    def __init__(self, token=None):
+        """Creates a new MemoryTokenStore object.
+
+        Args:
+            token: The initial token. Defaults to None.
+        """
+        self.data = token.to_dict() if token is not None else None
+        self.rlock = threading.RLock()
+
+    def load(self):
+        with self.rlock:
+            return Token.from_dict(self.data) if self.data is not None else None
+
+    def save(self, token):
+        with self.rlock:
+            self.data = token.to_dict()
+
+    @contextmanager
+    def lock(self):
+        with self.rlock:
+            yield
+
+
+class FileTokenStore(TokenStore):
+    """Token store keeping the token in a JSON file shared by the processes of a host.
+
+    Writes are atomic, so a reader never sees a partial file, and :meth:`lock` takes an exclusive ``flock`` on a
+    companion lock file. The parsed token is cached and only read again when the file changes.
+
+    When the JSON file does not exist yet, the token pickled by older versions in ``legacy_path`` is read once and
+    written to the JSON file.
+    """
+
+    def __init__(self, path='token.json', legacy_path=None):
+        """Creates a new FileTokenStore object.
+
+        Args:
+            path: Path of the JSON file. Defaults to 'token.json' in the current working directory.
+            legacy_path: Path of the pickled token written by older versions, e.g. 'token.dat'. Defaults to None.
+        """
+        self.path = os.path.abspath(path)
+        self.legacy_path = os.path.abspath(legacy_path) if legacy_path is not None else None
+        self.lock_path = f'{self.path}.lock'
+        self.rlock = threading.RLock()
+        self.local = threading.local()
+        self.cached_stat = None
+        self.cached_data = None
+
+    def load(self):
+        with self.rlock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return self._migrate()
+            key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if key != self.cached_stat:
+                with open(self.path, encoding='utf-8') as f:
+                    self.cached_data = json.load(f)
+                self.cached_stat = key
+            return Token.from_dict(self.cached_data)
+
+    def save(self, token):
+        data = token.to_dict()
+        directory = os.path.dirname(self.path)
+        with self.rlock:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.token-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.cached_stat = None
+
+    def _migrate(self):
+        if self.legacy_path is None or not os.path.exists(self.legacy_path):
+            return None
+        import pickle
+        with open(self.legacy_path, 'rb') as f:
+            token = pickle.load(f)
+        self.save(token)
+        return token
+
+    @contextmanager
+    def lock(self):
+        with self.rlock:
+            if fcntl is None or getattr(self.local, 'locked', False):
+                yield
+                return
+            with open(self.lock_path, 'a') as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                self.local.locked = True
+                try:
+                    yield
+                finally:
+                    self.local.locked = False
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SQLiteTokenStore(TokenStore):
+    """Token store keeping tokens in a SQLite database shared by the processes of a host.
+
+    Several applications can share the same database using different keys. :meth:`lock` holds a write transaction,
+    which SQLite makes exclusive across processes.
+    """
+
+    def __init__(self, path='token.db', key='default', timeout=30.0):
+        """Creates a new SQLiteTokenStore object.
+
+        Args:
+            path: Path of the database. Defaults to 'token.db' in the current working directory.
+            key: Key of the token in the database, e.g. the application client id. Defaults to 'default'.
+            timeout: Seconds to wait for another process holding the lock. Defaults to 30.
+        """
+        self.path = path
+        self.key = key
+        self.timeout = timeout
+        self.local = threading.local()
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS tokens (key TEXT PRIMARY KEY, token TEXT NOT NULL)')
+
+    def _connect(self):
+        import sqlite3  # Imported here so that the users of the other stores do not pay for it
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    @contextmanager
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            yield connection
+            return
+        connection = self._connect()
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def load(self):
+        with self._connection() as connection:
+            row = connection.execute('SELECT token FROM tokens WHERE key = ?', (self.key,)).fetchone()
+        return Token.from_dict(json.loads(row[0])) if row else None
+
+    def save(self, token):
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO tokens (key, token) VALUES (?, ?)',
+                               (self.key, json.dumps(token.to_dict())))
+
+    @contextmanager
+    def lock(self):
+        if getattr(self.local, 'connection', None) is not None:
+            yield
+            return
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        self.local.connection = connection
+        try:
+            yield
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        finally:
+            self.local.connection = None
+            connection.close()
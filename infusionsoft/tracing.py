@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Innermost open span of the current thread or task
+current_span = ContextVar('infusionsoft_span', default=None)
+
+
+class Span:
+    """A timed step of a traced operation, e.g. a bulk job, a page, a call or an attempt, with its attributes.
+    """
+
+    def __init__(self, name, parent=None, attributes=None):
+        """Creates a new Span object, started now.
+
+        Args:
+            name: Name of the step, e.g. 'request'.
+            parent: The enclosing span, None for the root span of a new trace. Defaults to None.
+            attributes: Dictionary of JSON serializable attributes, e.g. the endpoint. Defaults to None.
+        """
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes) if attributes else {}
+        self.tracer = None
+        self.error = None
+        self.start = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        """Adds attributes to the span.
+
+        Args:
+            **attributes: The JSON serializable attributes.
+        """
+        self.attributes.update(attributes)
+
+    def end(self, duration=None):
+        """Ends the span.
+
+        Args:
+            duration: Seconds the step lasted. Defaults to the time elapsed since the span started.
+        """
+        self.duration = duration if duration is not None else time.perf_counter() - self.started
+
+    def to_dict(self):
+        """Builds a dictionary representation of the span.
+
+        Returns:
+            A JSON serializable dictionary.
+        """
+        return {'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_id': self.parent_id, 'name': self.name,
+                'start': self.start, 'duration': self.duration, 'attributes': self.attributes, 'error': self.error}
+
+
+class Tracer:
+    """Creates nested spans and hands the finished ones to an exporter.
+
+    The open span is kept in a context variable, so the spans opened by a call nest below the span that encloses it,
+    including in the threads of the bulk operations. A client traces its calls only when it is given a tracer, so
+    tracing costs nothing otherwise.
+    """
+
+    def __init__(self, exporter):
+        """Creates a new Tracer object.
+
+        Args:
+            exporter: Object whose export method receives every finished Span, e.g. a FileSpanExporter.
+        """
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name, parent=None, **attributes):
+        """Context manager timing a step. An exception raised inside is recorded on the span and propagated.
+
+        Args:
+            name: Name of the step.
+            parent: The enclosing span. Defaults to the open span of the current context.
+            **attributes: The JSON serializable attributes of the span.
+
+        Returns:
+            The open Span.
+        """
+        span = Span(name, parent if parent is not None else current_span.get(), attributes)
+        span.tracer = self
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+            self.exporter.export(span)
+
+    def record(self, name, duration, **attributes):
+        """Records a step that already happened, e.g. a wait measured by the rate limiter.
+
+        Args:
+            name: Name of the step.
+            duration: Seconds the step lasted, ending now.
+            **attributes: The JSON serializable attributes of the span.
+        """
+        span = Span(name, current_span.get(), attributes)
+        span.start -= duration
+        span.end(duration)
+        self.exporter.export(span)
+
+
+def start_span(tracer, name, parent=None, **attributes):
+    """Opens a span when tracing is enabled.
+
+    Args:
+        tracer: The Tracer, or None when tracing is disabled.
+        name: Name of the step.
+        parent: The enclosing span. Defaults to the open span of the current context.
+        **attributes: The JSON serializable attributes of the span.
+
+    Returns:
+        A context manager giving the open Span, or None when tracing is disabled.
+    """
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, parent, **attributes)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class FileSpanExporter:
+    """Exporter appending every finished span to a file, as one JSON object per line.
+    """
+
+    def __init__(self, path):
+        """Creates a new FileSpanExporter object.
+
+        Args:
+            path: Path of the file, created if needed.
+        """
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def export(self, span):
+        """Writes a finished span.
+
+        Args:
+            span: The Span.
+        """
+        line = json.dumps(span.to_dict(), default=str) + '\n'
+        with self.lock:
+            self.file.write(line)
+
+    def close(self):
+        """Flushes and closes the file.
+        """
+        with self.lock:
+            self.file.close()
+
+
+class MemorySpanExporter:
+    """Exporter keeping the finished spans in a list, e.g. to inspect them in a notebook.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def export(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+
+def _timed_connect(connection, connect):
+    parent = current_span.get()
+    if parent is None or parent.tracer is None:
+        return connect()
+    with parent.tracer.span('connect', host=connection.host, port=connection.port):
+        return connect()
+
+
+class _TracedHTTPConnection(HTTPConnection):
+    def connect(self):
+        return _timed_connect(self, super().connect)
+
+
+class _TracedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        return _timed_connect(self, super().connect)
+
+
+class _TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TracedHTTPConnection
+
+
+class _TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TracedHTTPSConnection
+
+
+class TracedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter timing the opening of new connections, DNS resolution, TCP and TLS handshakes included, as
+    'connect' spans below the attempt that opened them.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TracedHTTPConnectionPool,
+                                                   'https': _TracedHTTPSConnectionPool}
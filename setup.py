@@ -1,7 +1,7 @@
 from distutils.core import setup
 setup(
   name = 'infusionsoft-im',
-  packages = ['infusionsoft'],
+  packages = ['infusionsoft', 'infusionsoft.api'],
   version = '0.2',
   license='MIT',
   description = 'Infusionsoft REST API wrapper written in Python.',
@@ -15,6 +15,10 @@ setup(
           'beautifulsoup4',
           'requests'
       ],
+  extras_require={
+          'async': ['aiohttp'],
+          'fast': ['orjson'],
+      },
   classifiers=[
     'Development Status :: 3 - Alpha',
     'Intended Audience :: Developers',
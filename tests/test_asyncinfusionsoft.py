@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+import pytest
+
+from infusionsoft import AsyncInfusionsoft, InfusionsoftException
+from infusionsoft.fakeserver import FakeKeapServer
+
+
+def test_client_reused_by_successive_event_loops():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        client = server.client(AsyncInfusionsoft)
+
+        async def count():
+            return (await client.contact().list_contact())['count']
+
+        assert asyncio.run(count()) == 5
+        assert asyncio.run(count()) == 5
+        asyncio.run(client.close())
+
+
+def test_client_rejects_a_second_running_loop():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        client = server.client(AsyncInfusionsoft)
+        started = threading.Event()
+        release = threading.Event()
+
+        async def hold():
+            await client.contact().list_contact()
+            started.set()
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+            await client.close()
+
+        thread = threading.Thread(target=asyncio.run, args=(hold(),))
+        thread.start()
+        try:
+            assert started.wait(10)
+            with pytest.raises(InfusionsoftException):
+                asyncio.run(client.contact().list_contact())
+        finally:
+            release.set()
+            thread.join()
+
+
+def test_concurrent_calls_share_the_pool():
+    async def run():
+        async with server.client(AsyncInfusionsoft, max_concurrency=4) as client:
+            pages = await asyncio.gather(*(client.contact().retrieve_contact(contact_id)
+                                           for contact_id in range(1, 21)))
+            return [page['id'] for page in pages]
+
+    with FakeKeapServer(seed=1, volumes={'contacts': 20}) as server:
+        assert asyncio.run(run()) == list(range(1, 21))
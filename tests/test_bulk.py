@@ -0,0 +1,74 @@
+import asyncio
+
+from infusionsoft import AsyncInfusionsoft
+from infusionsoft.fakeserver import FakeKeapServer
+
+TAG_ID = 1
+CONTACT_IDS = list(range(1, 51))
+
+
+def make_server():
+    return FakeKeapServer(seed=1, volumes={'contacts': 50, 'tags': 5})
+
+
+def tagged(server):
+    return set(server.tagged.get(TAG_ID, {}))
+
+
+def test_bulk_tag_sync():
+    with make_server() as server:
+        tags = server.client().tags()
+        result = tags.bulk_apply_tag(TAG_ID, CONTACT_IDS + [999], batch_size=20)
+        assert sorted(result.succeeded) == CONTACT_IDS
+        assert list(result.failed) == [999]
+        assert tagged(server) >= set(CONTACT_IDS)
+        result = tags.bulk_remove_tag(TAG_ID, CONTACT_IDS, batch_size=20)
+        assert sorted(result.succeeded) == CONTACT_IDS and result.ok
+        assert not tagged(server) & set(CONTACT_IDS)
+
+
+def test_bulk_tag_async():
+    with make_server() as server:
+        async def run():
+            async with server.client(AsyncInfusionsoft) as client:
+                tags = client.tags()
+                applied = await tags.bulk_apply_tag(TAG_ID, CONTACT_IDS + [999], batch_size=20, concurrency=2)
+                applied_on_server = tagged(server)
+                removed = await tags.bulk_remove_tag(TAG_ID, CONTACT_IDS, batch_size=20, concurrency=2)
+                return applied, applied_on_server, removed
+
+        applied, applied_on_server, removed = asyncio.run(run())
+        assert sorted(applied.succeeded) == CONTACT_IDS
+        assert list(applied.failed) == [999]
+        assert applied_on_server >= set(CONTACT_IDS)
+        assert sorted(removed.succeeded) == CONTACT_IDS
+        assert not tagged(server) & set(CONTACT_IDS)
+        assert server.stats()['requests']['DELETE tags/{id}/contacts'] == 3
+
+
+def upsert_records(count):
+    return [{'email_addresses': [{'email': f'bulk.{number}@example.com', 'field': 'EMAIL1'}],
+             'given_name': f'Bulk {number}'} for number in range(count)]
+
+
+def test_bulk_upsert_sync_rejects_unserializable_records(tmp_path):
+    reject_file = tmp_path / 'rejects.jsonl'
+    with make_server() as server:
+        records = upsert_records(20) + [{'given_name': 'Broken', 'tag_ids': {1, 2}}]
+        report = server.client().contact().bulk_upsert_contacts(records, concurrency=4,
+                                                                reject_file=str(reject_file))
+        assert (report.processed, report.succeeded, report.failed) == (21, 20, 1)
+        assert len(server.records['contacts']) == 70
+    rejects = reject_file.read_text(encoding='utf-8').splitlines()
+    assert len(rejects) == 1 and 'Broken' in rejects[0]
+
+
+def test_bulk_upsert_async():
+    with make_server() as server:
+        async def run():
+            async with server.client(AsyncInfusionsoft) as client:
+                return await client.contact().bulk_upsert_contacts(upsert_records(20), concurrency=4)
+
+        report = asyncio.run(run())
+        assert (report.processed, report.succeeded, report.failed) == (20, 20, 0)
+        assert len(server.records['contacts']) == 70
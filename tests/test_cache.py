@@ -0,0 +1,61 @@
+from infusionsoft.cache import ResponseCache
+from infusionsoft.fakeserver import FakeKeapServer
+
+
+def test_tags_of_a_contact_are_not_cached():
+    cache = ResponseCache()
+    assert cache.ttl_for('https://api.infusionsoft.com/crm/rest/v1/tags') == 600
+    assert cache.ttl_for('https://api.infusionsoft.com/crm/rest/v1/tags/12') == 600
+    assert cache.ttl_for('https://api.infusionsoft.com/crm/rest/v1/contacts/12/tags') == 0
+    assert cache.ttl_for('https://api.infusionsoft.com/crm/rest/v1/tags/12/contacts') == 0
+
+
+def test_tag_removal_is_seen_by_caching_client():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5, 'tags': 5}) as server:
+        client = server.client(cache=ResponseCache())
+        client.tags().bulk_apply_tag(2, [1])
+        tag_ids = {tag['tag']['id'] for tag in client.contact().list_applied_tags(1)['tags']}
+        assert 2 in tag_ids
+        client.tags().bulk_remove_tag(2, [1])
+        fresh = server.client().contact().list_applied_tags(1)
+        assert client.contact().list_applied_tags(1) == fresh
+        assert 2 not in {tag['tag']['id'] for tag in fresh['tags']}
+
+
+def test_key_ignores_access_token_and_parameter_order():
+    assert ResponseCache.key('GET', 'u', {'a': 1, 'access_token': 'x', 'b': 2}) == \
+        ResponseCache.key('get', 'u', {'b': 2, 'a': 1, 'access_token': 'y'})
+    assert ResponseCache.key('get', 'u', {'a': 1}) != ResponseCache.key('get', 'u', {'a': '1'})
+
+
+def test_lru_eviction_and_expiry():
+    cache = ResponseCache(maxsize=2)
+    cache.set('a', 1, 60)
+    cache.set('b', 2, 60)
+    cache.get('a')
+    cache.set('c', 3, 60)
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    cache.set('d', 4, -1)
+    assert cache.get('d') == (False, None)
+    assert cache.snapshot() == {'hits': 2, 'misses': 2, 'evictions': 2, 'size': 1}
+
+
+def test_invalidate_resource_subtree_and_collection():
+    cache = ResponseCache()
+    for url in ('/tags', '/tags/1', '/tags/1/contacts', '/tags/10', '/tags/2'):
+        cache.set(ResponseCache.key('get', url), url, 60)
+    assert cache.invalidate('/tags/1') == 2
+    assert cache.invalidate('/tags', subtree=False) == 1
+    assert sorted(key[1] for key in cache.entries) == ['/tags/10', '/tags/2']
+
+
+def test_writes_invalidate_cached_answers():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5, 'tags': 5}) as server:
+        client = server.client(cache=ResponseCache())
+        tags = client.tags().list_tags()
+        assert client.tags().list_tags() is tags
+        assert client.cache.snapshot()['hits'] == 1
+        client.tags().create_tag({'name': 'new'})
+        assert client.tags().list_tags()['count'] == tags['count'] + 1
+        assert client.cache.ttl_for(f'{server.url}/contacts/1') == 0
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from infusionsoft.cassette import Cassette, CassetteMissException, scrub_body, scrub_url
+from infusionsoft.fakeserver import FakeKeapServer
+
+
+def record(server, path):
+    with Cassette(str(path), mode='record') as cassette:
+        client = server.client(cassette=cassette)
+        first = client.contact().retrieve_contact(1)
+        time.sleep(0.3)
+        second = client.contact().retrieve_contact(2)
+        client.close()
+    return first, second
+
+
+def test_replay_answers_without_network_and_scrubs_secrets(tmp_path):
+    path = tmp_path / 'calls.jsonl.gz'
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        first, second = record(server, path)
+        access_token = server.client().token.access_token
+        client = server.client(cassette=Cassette(str(path), timing=0))
+    with Cassette(str(path)) as cassette:
+        assert len(cassette) == 2
+    assert client.contact().retrieve_contact(2) == second
+    assert client.contact().retrieve_contact(1) == first
+    with pytest.raises(CassetteMissException):
+        client.contact().retrieve_contact(1)
+    assert access_token not in path.read_bytes().decode('latin-1')
+
+
+def test_replay_reproduces_recorded_gaps(tmp_path):
+    path = tmp_path / 'calls.jsonl'
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        record(server, path)
+        timings = {}
+        for schedule in (True, False):
+            client = server.client(cassette=Cassette(str(path), schedule=schedule))
+            start = time.monotonic()
+            client.contact().retrieve_contact(1)
+            client.contact().retrieve_contact(2)
+            timings[schedule] = time.monotonic() - start
+    assert timings[True] >= 0.3
+    assert timings[False] < 0.25
+
+
+def test_scrubbing():
+    assert scrub_url('https://x/a?b=2&access_token=t&a=1') == 'https://x/a?a=1&b=2'
+    assert scrub_body('grant_type=refresh_token&refresh_token=r', 'application/x-www-form-urlencoded') == \
+        'grant_type=refresh_token&refresh_token=REDACTED'
+    assert scrub_body('{"client_secret": "s", "id": 1}', 'application/json') == '{"client_secret":"REDACTED","id":1}'
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from infusionsoft.coalesce import AsyncRequestCoalescer
+
+
+def test_async_leader_cancellation_does_not_cancel_followers():
+    async def run():
+        coalescer = AsyncRequestCoalescer()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'answer'
+
+        leader = asyncio.ensure_future(coalescer.do('key', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(coalescer.do('key', fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, len(calls), coalescer.snapshot(), coalescer.calls
+
+    result, calls, snapshot, in_flight = asyncio.run(run())
+    assert (result, calls) == ('answer', 1)
+    assert snapshot == {'calls_made': 1, 'calls_saved': 1}
+    assert not in_flight
+
+
+def test_async_call_cancelled_when_every_caller_is():
+    async def run():
+        coalescer = AsyncRequestCoalescer()
+        finished = []
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+
+        caller = asyncio.ensure_future(coalescer.do('key', fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.1)
+        return finished, coalescer.calls
+
+    finished, in_flight = asyncio.run(run())
+    assert not finished and not in_flight
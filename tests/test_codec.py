@@ -0,0 +1,54 @@
+import pytest
+
+from infusionsoft import Infusionsoft, InfusionsoftException
+from infusionsoft.codec import CODECS, OrjsonCodec, StdlibCodec, UjsonCodec, default_codec
+from infusionsoft.fakeserver import FakeKeapServer
+
+DOCUMENT = {'id': 12, 'name': 'Zoë', 'tags': [1, 2.5, None, True], 'nested': {'empty': []}}
+
+INSTALLED = [codec for codec in CODECS.values() if codec.available()]
+
+
+@pytest.mark.parametrize('codec_class', INSTALLED, ids=lambda codec: codec.name)
+def test_round_trip(codec_class):
+    codec = codec_class()
+    data = codec.dumps(DOCUMENT)
+    assert isinstance(data, bytes)
+    assert codec.loads(data) == DOCUMENT
+    assert codec.loads(data.decode('utf-8')) == DOCUMENT
+    assert StdlibCodec().loads(data) == DOCUMENT
+
+
+@pytest.mark.parametrize('codec_class', INSTALLED, ids=lambda codec: codec.name)
+def test_invalid_document_raises_value_error(codec_class):
+    with pytest.raises(ValueError):
+        codec_class().loads(b'{"id": ')
+
+
+def test_default_codec_prefers_the_fastest_installed():
+    expected = next(codec for codec in (OrjsonCodec, UjsonCodec, StdlibCodec) if codec.available())
+    assert type(default_codec()) is expected
+    assert StdlibCodec.available()
+
+
+def test_client_resolves_codecs():
+    assert isinstance(Infusionsoft.create_codec('json'), StdlibCodec)
+    codec = StdlibCodec()
+    assert Infusionsoft.create_codec(codec) is codec
+    with pytest.raises(InfusionsoftException):
+        Infusionsoft.create_codec('yaml')
+    missing = [name for name, codec in CODECS.items() if not codec.available()]
+    for name in missing:
+        with pytest.raises(InfusionsoftException):
+            Infusionsoft.create_codec(name)
+
+
+@pytest.mark.parametrize('name', [codec.name for codec in INSTALLED])
+def test_client_answers_are_codec_independent(name):
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        expected = server.client(codec='json').contact().list_contact({'limit': 5})
+        client = server.client(codec=name)
+        assert client.contact().list_contact({'limit': 5}) == expected
+        created = client.contact().create_contact({'given_name': 'Zoë', 'email_addresses': [
+            {'email': 'zoe@example.com', 'field': 'EMAIL1'}]})
+        assert created['given_name'] == 'Zoë'
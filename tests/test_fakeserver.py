@@ -0,0 +1,13 @@
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.sync import MemoryCheckpointStore, SyncEngine
+
+
+def test_seeded_records_fall_in_sync_window():
+    with FakeKeapServer(seed=3, volumes={'contacts': 1500, 'orders': 300}) as server:
+        engine = SyncEngine(server.client(), MemoryCheckpointStore())
+        received = {}
+        results = engine.sync_all(lambda name, records: received.setdefault(name, []).extend(records),
+                                  ['contacts', 'orders'])
+        assert results['contacts'].records == 1500
+        assert results['orders'].records == 300
+        assert len({record['id'] for record in received['contacts']}) == 1500
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+
+import pytest
+import requests
+
+from infusionsoft.hookreceiver import HookEvent, HookReceiver, MemoryEventQueue, SQLiteEventQueue
+
+DELIVERY = {'event_key': 'contact.edit', 'object_type': 'contact',
+            'object_keys': [{'id': 12, 'apiUrl': '', 'timestamp': '2024-01-10T10:00:00Z'}, {'id': 13}]}
+
+
+@pytest.fixture
+def served():
+    receiver = HookReceiver(path='/hooks/secret', retry_delay=0.01)
+    server = receiver.make_server('127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with receiver:
+        yield receiver, f'http://127.0.0.1:{server.server_port}/hooks/secret'
+    server.shutdown()
+    server.server_close()
+
+
+def test_verification_echoes_the_secret(served):
+    receiver, url = served
+    secrets = []
+    receiver.on_verify = secrets.append
+    response = requests.post(url, headers={'X-Hook-Secret': 'abc'})
+    assert response.status_code == 200
+    assert response.headers['X-Hook-Secret'] == 'abc'
+    assert secrets == ['abc']
+    receiver.immediate = False
+    assert 'X-Hook-Secret' not in requests.post(url, headers={'X-Hook-Secret': 'def'}).headers
+    assert secrets == ['abc', 'def']
+    assert receiver.received == 0
+
+
+def test_deliveries_are_dispatched_by_event_key(served):
+    receiver, url = served
+    contacts = []
+    everything = []
+    receiver.on('contact.*', contacts.append)
+    receiver.on('*')(everything.append)
+    assert requests.post(url, data=json.dumps(DELIVERY)).status_code == 200
+    assert requests.post(url, data=json.dumps({'event_key': 'order.add', 'object_keys': [{'id': 1}]})).ok
+    assert receiver.drain(5)
+    assert [event.ids for event in contacts] == [[12, 13]]
+    assert sorted(event.event_key for event in everything) == ['contact.edit', 'order.add']
+    assert receiver.processed == 2
+
+
+def test_invalid_requests_are_rejected(served):
+    receiver, url = served
+    assert requests.post(url.replace('secret', 'other'), data=json.dumps(DELIVERY)).status_code == 404
+    assert requests.get(url).status_code == 405
+    assert requests.post(url, data=b'{"object_type": "contact"}').status_code == 400
+    assert requests.post(url, data=b'not json').status_code == 400
+    assert requests.post(url, data=b'x' * (1024 * 1024 + 1)).status_code == 413
+    assert receiver.received == 0
+
+
+def test_failing_handler_is_retried_then_set_aside():
+    attempts = []
+
+    def flaky(event):
+        attempts.append(event.event_key)
+        if event.event_key == 'contact.delete' or len(attempts) < 2:
+            raise RuntimeError('down')
+
+    with HookReceiver(workers=1, max_attempts=3, retry_delay=0.01) as receiver:
+        receiver.on('*', flaky)
+        receiver.receive('/', {}, json.dumps(DELIVERY).encode())
+        assert receiver.drain(5)
+        receiver.receive('/', {}, json.dumps(dict(DELIVERY, event_key='contact.delete')).encode())
+        assert receiver.drain(5)
+    assert attempts == ['contact.edit'] * 2 + ['contact.delete'] * 3
+    assert (receiver.processed, receiver.failed) == (1, 1)
+    (event, error), = receiver.queue.dead_letters()
+    assert event.event_key == 'contact.delete'
+    assert error == "RuntimeError('down')"
+
+
+def test_memory_queue_delays_retries():
+    queue = MemoryEventQueue()
+    queue.put(HookEvent('contact.add'))
+    item = queue.get(timeout=1)
+    queue.retry(item, 0.2)
+    assert queue.get(timeout=0.05) is None
+    assert queue.get(timeout=1).attempts == 1
+
+
+def test_sqlite_queue_survives_a_restart(tmp_path):
+    queue = SQLiteEventQueue(tmp_path / 'hooks.db', visibility_timeout=0.2, poll_interval=0.01)
+    queue.put(HookEvent.from_dict(DELIVERY))
+    queue.put(HookEvent('tag.add'))
+    taken = queue.get(timeout=1)
+    assert taken.event.ids == [12, 13]
+
+    # Another process sees the event taken by the first one again once its visibility timeout elapsed
+    reopened = SQLiteEventQueue(tmp_path / 'hooks.db', visibility_timeout=0.2, poll_interval=0.01)
+    assert reopened.get(timeout=1).event.event_key == 'tag.add'
+    assert reopened.get(timeout=0.05) is None
+    item = reopened.get(timeout=1)
+    assert item.event.event_key == 'contact.edit'
+    reopened.dead(item, 'failed')
+    assert len(reopened) == 1
+    assert [(event.event_key, error) for event, error in reopened.dead_letters()] == [('contact.edit', 'failed')]
+
+
+def test_asgi_application():
+    receiver = HookReceiver()
+    received = []
+    receiver.on('contact.edit', received.append)
+    body = json.dumps(DELIVERY).encode()
+
+    async def call(scope, messages, sent):
+        async def receive():
+            return await messages.get()
+
+        async def send(message):
+            sent.append(message)
+
+        await receiver.asgi(scope, receive, send)
+
+    async def run():
+        lifespan_messages = asyncio.Queue()
+        lifespan = []
+        task = asyncio.create_task(call({'type': 'lifespan'}, lifespan_messages, lifespan))
+        await lifespan_messages.put({'type': 'lifespan.startup'})
+        http_messages = asyncio.Queue()
+        for message in ({'body': body[:10], 'more_body': True}, {'body': body[10:]}):
+            http_messages.put_nowait(message)
+        response = []
+        http = {'type': 'http', 'method': 'POST', 'path': '/', 'headers': [(b'content-type', b'application/json')]}
+        await call(http, http_messages, response)
+        assert await asyncio.to_thread(receiver.drain, 5)
+        await lifespan_messages.put({'type': 'lifespan.shutdown'})
+        await task
+        return lifespan, response
+
+    lifespan, response = asyncio.run(run())
+    assert lifespan == [{'type': 'lifespan.startup.complete'}, {'type': 'lifespan.shutdown.complete'}]
+    assert response[0]['status'] == 200
+    assert [event.ids for event in received] == [[12, 13]]
+    assert not receiver.threads
@@ -0,0 +1,37 @@
+import logging
+
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.hooks import Hooks, logger
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_set_debug_logs_only_its_client_and_restores_level():
+    handler = RecordingHandler()
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+    try:
+        with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+            hooks = Hooks()
+            debugged = server.client(hooks=hooks)
+            other = server.client(hooks=hooks)
+            debugged.set_debug(True)
+            assert logger.level == logging.DEBUG
+            other.contact().list_contact()
+            assert not handler.records and not hooks
+            debugged.contact().list_contact()
+            assert len(handler.records) == 1
+            debugged.set_debug(False)
+            assert logger.level == logging.WARNING
+            debugged.contact().list_contact()
+            assert len(handler.records) == 1
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ('sqlite3', 'pickle', 'orjson', 'ujson', 'aiohttp', 'asyncio', 'concurrent.futures', 'infusionsoft.cache',
+            'infusionsoft.coalesce', 'infusionsoft.codec', 'infusionsoft.tokenstore', 'infusionsoft.bulk')
+
+
+def loaded_modules(code, tmp_path):
+    script = f'{code}\nimport sys\nprint(",".join(m for m in {DEFERRED!r} if m in sys.modules))'
+    environment = {**os.environ, 'PYTHONPATH': ROOT}
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            env=environment, cwd=tmp_path)
+    return set(filter(None, result.stdout.strip().split(',')))
+
+
+def test_import_defers_optional_subsystems(tmp_path):
+    assert loaded_modules('import infusionsoft', tmp_path) == set()
+
+
+def test_client_loads_only_what_it_uses(tmp_path):
+    loaded = loaded_modules('import infusionsoft\n'
+                            'from infusionsoft.tokenstore import MemoryTokenStore\n'
+                            'client = infusionsoft.Infusionsoft("id", "secret", token_store=MemoryTokenStore(), '
+                            'codec="json")\n'
+                            'client.set_token(infusionsoft.Token("x", "y", 9999999999))\n'
+                            'client.contact()', tmp_path)
+    assert loaded == {'infusionsoft.tokenstore', 'infusionsoft.codec'}
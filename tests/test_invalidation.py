@@ -0,0 +1,90 @@
+import pytest
+
+from infusionsoft.cache import ResponseCache
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.hookreceiver import HookEvent, HookReceiver
+from infusionsoft.invalidation import HookInvalidator
+from infusionsoft.mirror import Mirror
+
+
+@pytest.fixture
+def keap():
+    with FakeKeapServer(seed=1, volumes={'contacts': 10, 'tags': 3, 'orders': 5}) as server:
+        client = server.client(cache=ResponseCache(default_ttl=600))
+        mirror = Mirror(':memory:')
+        mirror.sync(client)
+        # Changes made in Keap, i.e. not seen by the caching client
+        yield server, client, server.client(), mirror
+        mirror.close()
+
+
+def test_changed_contact_is_invalidated_and_refreshed(keap):
+    server, client, keap_app, mirror = keap
+    name = client.contact().retrieve_contact(3)['given_name']
+    keap_app.contact().update_contact(3, {'given_name': 'Zed'})
+    assert client.contact().retrieve_contact(3)['given_name'] == name
+
+    invalidator = HookInvalidator(client, mirror)
+    invalidator.handle(HookEvent('contact.edit', 'contact', [{'id': 3}, {'id': 3}]))
+    assert client.contact().retrieve_contact(3)['given_name'] == 'Zed'
+    assert mirror.get_contact(3)['given_name'] == 'Zed'
+    assert invalidator.snapshot() == {'events': 1, 'ignored': 0, 'invalidated': 1, 'refreshed': 1, 'deleted': 0}
+
+
+def test_deleted_objects_leave_the_mirror(keap):
+    server, client, keap_app, mirror = keap
+    keap_app.contact().delete_contact(4)
+    keap_app.contact().delete_contact(5)
+    invalidator = HookInvalidator(client, mirror)
+    invalidator.handle(HookEvent('contact.delete', 'contact', [{'id': 4}]))
+    # An edit of a contact deleted since is a deletion too
+    invalidator.handle(HookEvent('contact.edit', 'contact', [{'id': 5}]))
+    assert mirror.get_contact(4) is None
+    assert mirror.get_contact(5) is None
+    assert mirror.count('contacts') == 8
+    assert invalidator.snapshot()['deleted'] == 2
+
+
+def test_tag_memberships_are_refreshed(keap):
+    server, client, keap_app, mirror = keap
+    invalidator = HookInvalidator(client, mirror)
+    members = set(mirror.find_contact_ids(tag_ids=[1]))
+    assert members
+    added = next(contact_id for contact_id in range(1, 11) if contact_id not in members)
+    keap_app.tags().bulk_apply_tag(1, [added])
+    invalidator.handle(HookEvent('contactGroup.applied', None, [{'id': 1, 'contact_details': [{'id': added}]}]))
+    assert added in mirror.find_contact_ids(tag_ids=[1])
+
+    keap_app.tags().bulk_remove_tag(1, sorted(members))
+    invalidator.handle(HookEvent('contactGroup.removed', None, [{'id': 1}]))
+    assert mirror.find_contact_ids(tag_ids=[1]) == [added]
+
+
+def test_refresh_cache_makes_the_next_read_a_hit(keap):
+    server, client, keap_app, mirror = keap
+    invalidator = HookInvalidator(client, refresh_cache=True)
+    keap_app.ecommerce().retrieve_order(1)
+    invalidator.handle(HookEvent('order.edit', 'order', [{'id': 1}]))
+    server.reset_stats()
+    client.ecommerce().retrieve_order(1)
+    assert server.stats()['requests'] == {}
+
+
+def test_unknown_objects_are_ignored(keap):
+    server, client, keap_app, mirror = keap
+    invalidator = HookInvalidator(client, mirror)
+    server.reset_stats()
+    invalidator.handle(HookEvent('leadsource.add', None, [{'id': 1}]))
+    assert invalidator.snapshot()['ignored'] == 1
+    assert server.stats()['requests'] == {}
+
+
+def test_attached_to_a_receiver(keap):
+    server, client, keap_app, mirror = keap
+    keap_app.contact().update_contact(2, {'family_name': 'Hooked'})
+    receiver = HookReceiver(workers=1)
+    HookInvalidator(client, mirror).attach(receiver)
+    with receiver:
+        receiver.receive('/', {}, b'{"event_key": "contact.edit", "object_keys": [{"id": 2}]}')
+        assert receiver.drain(5)
+    assert mirror.get_contact(2)['family_name'] == 'Hooked'
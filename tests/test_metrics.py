@@ -0,0 +1,40 @@
+import pytest
+
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.hooks import Hooks
+from infusionsoft.infusionsoft import ApiException
+from infusionsoft.metrics import Metrics
+
+
+def test_attach_twice_records_every_request_once():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        hooks = Hooks()
+        metrics = Metrics()
+        first = server.client(hooks=hooks, metrics=metrics)
+        second = server.client(hooks=hooks, metrics=metrics)
+        metrics.attach(first)
+        first.contact().list_contact()
+        second.contact().retrieve_contact(1)
+        snapshot = metrics.snapshot()
+        assert snapshot['contact.list_contact']['count'] == 1
+        assert snapshot['contact.retrieve_contact']['statuses'] == {200: 1}
+        metrics.detach(hooks)
+        first.contact().list_contact()
+        assert metrics.snapshot()['contact.list_contact']['count'] == 1
+
+
+def test_prometheus_export():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        metrics = Metrics(buckets=(0.5, 10.0))
+        client = server.client(metrics=metrics)
+        client.contact().list_contact()
+        with pytest.raises(ApiException):
+            client.contact().retrieve_contact(999999)
+        text = metrics.to_prometheus()
+    lines = text.splitlines()
+    assert '# TYPE infusionsoft_requests_total counter' in lines
+    assert 'infusionsoft_requests_total{operation="contact.list_contact",status="200"} 1' in lines
+    assert 'infusionsoft_request_duration_seconds_bucket{operation="contact.list_contact",le="+Inf"} 1' in lines
+    assert 'infusionsoft_request_duration_seconds_count{operation="contact.list_contact"} 1' in lines
+    assert 'infusionsoft_requests_total{operation="contact.retrieve_contact",status="404"} 1' in lines
+    assert text.endswith('\n')
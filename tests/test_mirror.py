@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.mirror import Mirror
+
+CONTACTS = [
+    {'id': 1, 'given_name': 'Ada', 'email_addresses': [{'email': 'Ada@Example.com', 'field': 'EMAIL1'}],
+     'last_updated': '2024-01-10T10:00:00.000+0000', 'tag_ids': [1, 2]},
+    {'id': 2, 'given_name': 'Bob', 'email_addresses': [{'email': 'bob@other.org', 'field': 'EMAIL2'}],
+     'last_updated': '2024-01-10T12:00:00+02:00', 'tag_ids': [2]},
+    {'id': 3, 'given_name': 'Cy', 'email_addresses': [], 'last_updated': '2024-03-01T00:00:00.000+0000',
+     'tag_ids': [3]},
+]
+
+
+@pytest.fixture
+def mirror():
+    mirror = Mirror(':memory:')
+    mirror.upsert('contacts', CONTACTS)
+    mirror.upsert('tags', [{'id': 1, 'name': 'VIP', 'category': {'id': 7}}, {'id': 2, 'name': 'Lead'},
+                           {'id': 3, 'name': 'VIP', 'category': {'id': 8}}])
+    mirror.upsert('orders', [{'id': 10, 'contact': {'id': 1}, 'status': 'PAID'},
+                             {'id': 11, 'contact_id': 1, 'status': 'DRAFT'}, {'id': 12, 'contact_id': 2}])
+    yield mirror
+    mirror.close()
+
+
+def test_contact_queries(mirror):
+    assert mirror.get_contact(1)['given_name'] == 'Ada'
+    assert mirror.get_contact(99) is None
+    assert mirror.find_contact_ids(email='ADA@example.COM') == [1]
+    assert mirror.find_contact_ids(email_domain='other.org') == [2]
+    assert mirror.find_contact_ids(tag_ids=[2]) == [1, 2]
+    assert mirror.find_contact_ids(tag_ids=[1, 2]) == [1]
+    assert mirror.find_contact_ids(any_tag_ids=[1, 3]) == [1, 3]
+    assert mirror.find_contact_ids(tag_ids=[2], email_domain='example.com') == [1]
+    assert mirror.find_contact_ids(any_tag_ids=[1, 2, 3], limit=2) == [1, 2]
+    assert [contact['given_name'] for contact in mirror.find_contacts(tag_ids=[2])] == ['Ada', 'Bob']
+
+
+def test_updated_since_compares_dates_across_time_zones(mirror):
+    # Bob was modified at 10:00 UTC, written with a +02:00 offset
+    assert mirror.find_contact_ids(updated_since='2024-01-10T10:00:00Z') == [1, 2, 3]
+    assert mirror.find_contact_ids(updated_since='2024-01-10T10:00:01Z') == [3]
+
+
+def test_tag_and_order_queries(mirror):
+    assert mirror.tag_ids_of(1) == [1, 2]
+    assert [tag['id'] for tag in mirror.find_tags(name='VIP')] == [1, 3]
+    assert [tag['id'] for tag in mirror.find_tags(name='VIP', category_id=8)] == [3]
+    assert mirror.get_tag(2)['name'] == 'Lead'
+    assert [order['id'] for order in mirror.orders_of(1)] == [10, 11]
+    assert mirror.get_order(12)['contact_id'] == 2
+    assert mirror.count('orders') == 3
+
+
+def test_upsert_replaces_memberships_and_delete_removes_them(mirror):
+    mirror.upsert('contacts', [dict(CONTACTS[0], tag_ids=[3])])
+    assert mirror.tag_ids_of(1) == [3]
+    mirror.upsert('contacts', [{'id': 2, 'given_name': 'Bob'}])
+    assert mirror.tag_ids_of(2) == [2]
+    mirror.delete('tags', 3)
+    assert mirror.tag_ids_of(1) == []
+    mirror.delete('contacts', 2)
+    assert mirror.get_contact(2) is None
+    assert mirror.count('contact_tags') == 0
+    with pytest.raises(ValueError):
+        mirror.upsert('notes', [])
+    with pytest.raises(ValueError):
+        mirror.count('sqlite_master')
+
+
+def test_threads_read_through_their_own_connection(tmp_path):
+    mirror = Mirror(tmp_path / 'mirror.db')
+    mirror.upsert('contacts', CONTACTS)
+    found = []
+    thread = threading.Thread(target=lambda: found.append(mirror.find_contact_ids(tag_ids=[2])))
+    thread.start()
+    thread.join()
+    assert found == [[1, 2]]
+    mirror.close()
+
+
+def test_sync_against_fake_server(tmp_path):
+    with FakeKeapServer(seed=1, volumes={'contacts': 50, 'tags': 5, 'orders': 20}) as server:
+        client = server.client()
+        client.tags().bulk_apply_tag(2, list(range(1, 11)))
+        mirror = Mirror(tmp_path / 'mirror.db')
+        results = mirror.sync(client, page_size=20)
+        assert results['contacts'].records == 50
+        assert results['orders'].records == 20
+        assert {name: mirror.count(name) for name in ('contacts', 'orders', 'tags')} == \
+               {'contacts': 50, 'orders': 20, 'tags': 5}
+
+        members = sorted(entry['contact']['id'] for entry in client.tags().iter_tagged_contacts(2))
+        assert mirror.find_contact_ids(tag_ids=[2]) == members
+        contact = client.contact().retrieve_contact(3, {'optional_properties': 'tag_ids'})
+        assert mirror.get_contact(3)['email_addresses'] == contact['email_addresses']
+        assert mirror.tag_ids_of(3) == sorted(contact['tag_ids'])
+
+        client.tags().bulk_remove_tag(2, [1, 2])
+        assert mirror.refresh_tag(client, 2) == len(members) - 2
+        assert 1 not in mirror.find_contact_ids(tag_ids=[2])
+
+        assert mirror.sync(client, page_size=20)['contacts'].records == 0
+        mirror.close()
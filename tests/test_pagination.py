@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+
+from infusionsoft import AsyncInfusionsoft
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.pagination import aiter_records, iter_records
+
+RECORDS = list(range(95))
+
+
+def page_request(sent):
+    def request(method, url, params=None):
+        sent.append(params['offset'])
+        records = RECORDS[params['offset']:params['offset'] + params['limit']]
+        return {'records': [{'id': record} for record in records], 'count': len(RECORDS)}
+
+    return request
+
+
+def test_pages_are_requested_lazily():
+    sent = []
+    records = iter_records(page_request(sent), 'u', 'records', {'limit': 10, 'other': 'x'})
+    assert sent == []
+    assert [next(records) for _ in range(10)] == [{'id': record} for record in range(10)]
+    assert sent == [0]
+    next(records)
+    assert sent == [0, 10]
+    assert [record['id'] for record in records] == RECORDS[11:]
+    assert sent == list(range(0, 100, 10))
+
+
+def test_starting_offset_and_page_size():
+    sent = []
+    records = list(iter_records(page_request(sent), 'u', 'records', {'offset': 90, 'limit': 1}, page_size=3))
+    assert [record['id'] for record in records] == RECORDS[90:]
+    assert sent == [90, 93]
+
+
+def test_iter_methods_against_fake_server():
+    with FakeKeapServer(seed=1, volumes={'contacts': 250, 'tags': 30}) as server:
+        client = server.client()
+        contacts = list(client.contact().iter_contact(page_size=100))
+        assert [contact['id'] for contact in contacts] == [contact['id'] for contact in
+                                                           client.contact().list_contact({'limit': 1000})['contacts']]
+        assert len(list(client.tags().iter_tags(page_size=7))) == 30
+
+
+def test_async_iter_methods():
+    async def run():
+        async with server.client(AsyncInfusionsoft) as client:
+            return [contact['id'] async for contact in client.contact().iter_contact(page_size=40)]
+
+    with FakeKeapServer(seed=1, volumes={'contacts': 100}) as server:
+        ids = asyncio.run(run())
+        assert ids == [contact['id'] for contact in server.client().contact().list_contact()['contacts']]
+
+
+def test_prefetch_keeps_order_and_bounds_pages_in_flight():
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'max_in_flight': 0}
+    sent = []
+    request = page_request(sent)
+
+    def slow_request(method, url, params=None):
+        with lock:
+            state['in_flight'] += 1
+            state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        time.sleep(0.01 * (params['offset'] % 3))
+        try:
+            return request(method, url, params)
+        finally:
+            with lock:
+                state['in_flight'] -= 1
+
+    records = list(iter_records(slow_request, 'u', 'records', page_size=5, concurrency=4))
+    assert [record['id'] for record in records] == RECORDS
+    assert sorted(sent) == list(range(0, 95, 5))
+    assert 1 < state['max_in_flight'] <= 4
+
+
+def test_prefetch_stops_when_iteration_stops():
+    sent = []
+    records = iter_records(page_request(sent), 'u', 'records', page_size=5, concurrency=3)
+    assert [next(records)['id'] for _ in range(7)] == list(range(7))
+    records.close()
+    assert len(sent) <= 1 + 3 + 1
+
+
+def test_async_prefetch_keeps_order():
+    sent = []
+    request = page_request(sent)
+
+    async def async_request(method, url, params=None):
+        await asyncio.sleep(0.01 * (params['offset'] % 3))
+        return request(method, url, params)
+
+    async def run():
+        return [record['id'] async for record in aiter_records(async_request, 'u', 'records', page_size=5,
+                                                               concurrency=4)]
+
+    assert asyncio.run(run()) == RECORDS
+    assert sorted(sent) == list(range(0, 95, 5))
+
+
+def test_prefetch_against_fake_server():
+    with FakeKeapServer(seed=1, volumes={'contacts': 250}, latency=0.01) as server:
+        client = server.client()
+        expected = [contact['id'] for contact in client.contact().iter_contact(page_size=20)]
+        assert [contact['id'] for contact in client.contact().iter_contact(page_size=20, concurrency=5)] == expected
@@ -0,0 +1,64 @@
+import time
+from email.utils import formatdate
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.ratelimit import RateLimiter, retry_after_seconds
+
+
+def headers(**values):
+    return CaseInsensitiveDict({name.replace('_', '-'): str(value) for name, value in values.items()})
+
+
+def test_throttle_headers_set_the_rate():
+    limiter = RateLimiter(rate=25)
+    limiter.update(headers(x_keap_product_throttle_limit=600, x_keap_product_throttle_interval=1,
+                           x_keap_product_throttle_time_unit='minutes',
+                           x_keap_tenant_throttle_limit=20, x_keap_tenant_throttle_time_unit='second'))
+    assert limiter.rate == 10
+
+
+def test_available_headers_drain_the_bucket():
+    limiter = RateLimiter(rate=10)
+    limiter.update(headers(x_keap_product_throttle_available=0))
+    assert limiter.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_quota_expiry_formats():
+    for expiry in (time.time() + 30, (time.time() + 30) * 1000,
+                   time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() + 30))):
+        limiter = RateLimiter(rate=None)
+        limiter.update(headers(x_keap_product_quota_available=0, x_keap_product_quota_expiry_time=expiry))
+        assert 28 < limiter.reserve() <= 30
+
+
+def test_invalid_headers_are_ignored():
+    limiter = RateLimiter(rate=5)
+    limiter.update(headers(x_keap_product_throttle_limit='abc', x_keap_product_throttle_time_unit='fortnight',
+                           x_keap_product_quota_expiry_time='soon'))
+    assert (limiter.rate, limiter.quota_available, limiter.quota_reset) == (5, None, None)
+
+
+def test_retry_after_in_seconds_or_http_date():
+    assert retry_after_seconds(headers(retry_after='1.5')) == 1.5
+    assert retry_after_seconds(headers(retry_after='-3')) == 0
+    assert 8 < retry_after_seconds(headers(retry_after=formatdate(time.time() + 10, usegmt=True))) <= 10
+    assert retry_after_seconds(headers(retry_after='later')) is None
+    assert retry_after_seconds(headers()) is None
+
+
+def test_pause_stops_every_caller():
+    limiter = RateLimiter(rate=None)
+    limiter.pause(0.2)
+    assert limiter.reserve() == pytest.approx(0.2, abs=0.05)
+
+
+def test_client_follows_server_throttle():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}, rate_limit=20) as server:
+        client = server.client()
+        for _ in range(30):
+            client.contact().retrieve_contact(1)
+        assert client.rate_limiter.rate == 20
+        assert server.stats()['statuses'].get(429, 0) <= 2
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from infusionsoft import AsyncInfusionsoft
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.infusionsoft import ApiException
+from infusionsoft.retry import RetryPolicy
+
+
+def test_should_retry():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry('POST', 1, 429)
+    assert policy.should_retry('get', 1, 503)
+    assert policy.should_retry('get', 2, None)
+    assert not policy.should_retry('post', 1, 503)
+    assert not policy.should_retry('post', 1, None)
+    assert not policy.should_retry('get', 1, 404)
+    assert not policy.should_retry('get', 3, 503)
+
+
+def test_backoff():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=3, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [0.5, 1, 2, 3, 3]
+    assert policy.backoff(1, retry_after=7) == 7
+    assert RetryPolicy(respect_retry_after=False, jitter=False).backoff(1, retry_after=7) == 0.5
+    assert all(0 <= RetryPolicy(backoff_factor=1).backoff(3) <= 4 for _ in range(100))
+
+
+def test_throttled_and_failed_requests_are_retried():
+    with FakeKeapServer(seed=2, volumes={'contacts': 5}, throttle_rate=0.3, error_rate=0.2, retry_after=0) as server:
+        client = server.client(retry_policy=RetryPolicy(max_attempts=20, backoff_factor=0.001))
+        for _ in range(30):
+            assert client.contact().retrieve_contact(1)['id'] == 1
+        stats = client.retry_stats.snapshot()
+        assert stats['retries'] > 0 and stats['exhausted'] == 0
+        assert stats['retries'] == sum(count for status, count in server.stats()['statuses'].items() if status != 200)
+
+
+def test_failed_post_is_not_retried():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}, error_rate=1.0) as server:
+        client = server.client(retry_policy=RetryPolicy(backoff_factor=0.001))
+        with pytest.raises(ApiException):
+            client.contact().create_contact({'given_name': 'Jane'})
+        assert client.retry_stats.snapshot()['retries'] == 0
+
+
+def test_async_client_retries():
+    async def run():
+        async with server.client(AsyncInfusionsoft, retry_policy=RetryPolicy(max_attempts=20,
+                                                                               backoff_factor=0.001)) as client:
+            for _ in range(10):
+                await client.contact().retrieve_contact(1)
+            return client.retry_stats.snapshot()
+
+    with FakeKeapServer(seed=3, volumes={'contacts': 5}, throttle_rate=0.5, retry_after=0) as server:
+        stats = asyncio.run(run())
+    assert stats['retries'] > 0 and stats['exhausted'] == 0
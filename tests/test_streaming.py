@@ -0,0 +1,68 @@
+import json
+
+import asyncio
+
+import pytest
+
+from infusionsoft import AsyncInfusionsoft
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.streaming import JsonArrayParser, iter_json_array
+
+FIXTURES = [
+    {'contacts': [1.5, 2, -3.25e-2, 4E+3, 0, -0.0, 17]},
+    {'count': 2.75, 'contacts': [{'id': 1, 'score': 1.5e10, 'name': 'Zoë 😀'}, {'id': -20, 'tags': []}],
+     'next': 'x'},
+    {'previous': None, 'contacts': [True, False, None, 'a,]}"\\', [1, [2.5]], {}], 'total': -12.5},
+    {'contacts': []},
+    {'contacts': None},
+    {'other': [1.25, 3]},
+]
+
+
+def decode(body, key, offsets):
+    parser = JsonArrayParser(key)
+    records = []
+    start = 0
+    for offset in offsets:
+        records += parser.feed(body[start:offset])
+        start = offset
+    records += parser.feed(body[start:])
+    return records + parser.close()
+
+
+@pytest.mark.parametrize('fixture', FIXTURES)
+def test_every_split_decodes_like_json(fixture):
+    body = json.dumps(fixture, ensure_ascii=False).encode('utf-8')
+    expected = fixture.get('contacts') or []
+    for offset in range(len(body) + 1):
+        assert decode(body, 'contacts', [offset]) == expected, body[:offset]
+    assert decode(body, 'contacts', range(1, len(body))) == expected
+
+
+def test_numbers_split_after_dot_exponent_and_sign():
+    for chunks in ([b'{"contacts": [1.', b'5, 2]}'], [b'{"contacts": [1e', b'3]}'], [b'{"contacts": [2E-', b'1]}'],
+                   [b'{"contacts": [-', b'7]}'], [b'{"total": 1.', b'5, "contacts": [3]}']):
+        assert list(iter_json_array(chunks, 'contacts')) == json.loads(b''.join(chunks))['contacts']
+
+
+def test_truncated_body_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"contacts": [1, 2'], 'contacts'))
+
+
+def test_stops_reading_once_array_is_closed():
+    chunks = iter([b'{"contacts": [1, 2]', b', "garbage": ['])
+    assert list(iter_json_array(chunks, 'contacts')) == [1, 2]
+
+
+def test_streamed_iteration_against_fake_server():
+    async def run():
+        async with server.client(AsyncInfusionsoft) as client:
+            return [contact async for contact in client.contact().iter_contact(page_size=20, stream=True)]
+
+    with FakeKeapServer(seed=1, volumes={'contacts': 55}) as server:
+        client = server.client()
+        expected = list(client.contact().iter_contact(page_size=20))
+        assert len(expected) == 55
+        assert list(client.contact().iter_contact(page_size=20, stream=True)) == expected
+        assert asyncio.run(run()) == expected
@@ -0,0 +1,24 @@
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.sync import MemoryCheckpointStore, SyncEngine
+
+
+class RecordingNotes:
+    def __init__(self, note):
+        self.note = note
+        self.sent = []
+
+    def list_notes(self, params=None):
+        self.sent.append(dict(params))
+        return self.note.list_notes(params)
+
+
+def test_notes_are_listed_whole_without_window():
+    with FakeKeapServer(seed=1, volumes={'contacts': 20, 'notes': 30}) as server:
+        client = server.client()
+        notes = RecordingNotes(client.note())
+        client.note = lambda: notes
+        engine = SyncEngine(client, MemoryCheckpointStore(), page_size=10)
+        assert engine.sync('notes', lambda name, records: None).records == 30
+        assert engine.high_water('notes') is not None
+        assert engine.sync('notes', lambda name, records: None).records == 30
+        assert notes.sent and not any('since' in params or 'until' in params for params in notes.sent)
@@ -0,0 +1,58 @@
+import gc
+import threading
+import time
+
+from infusionsoft import AsyncInfusionsoft
+from infusionsoft.fakeserver import FakeKeapServer
+
+
+def test_background_refresh_before_end_of_life():
+    with FakeKeapServer(seed=1, volumes={'contacts': 1}, token_lifetime=3600) as server:
+        client = server.client(refresh_margin=3600 - 1)
+        stale = client.token.access_token
+        deadline = time.time() + 10
+        while client.token.access_token == stale and time.time() < deadline:
+            time.sleep(0.05)
+        assert client.token.access_token != stale
+        client.close()
+        assert client.refresher is None
+
+
+def test_concurrent_expired_callers_share_one_refresh():
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        client = server.client(auto_refresh=False)
+        client.token.end_of_life = str(int(time.time()) - 1)
+        server.reset_stats()
+        barrier = threading.Barrier(16)
+        failures = []
+
+        def call():
+            barrier.wait()
+            try:
+                client.contact().retrieve_contact(1)
+            except Exception as e:
+                failures.append(e)
+
+        workers = [threading.Thread(target=call) for _ in range(16)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert not failures
+        assert server.stats()['token_refreshes'] == 1
+
+
+def test_refresh_thread_stops_with_discarded_client():
+    with FakeKeapServer(seed=1, volumes={'contacts': 1}) as server:
+        client = server.client()
+        refresher = client.refresher
+        assert refresher.is_alive()
+        del client
+        gc.collect()
+        refresher.join(5)
+        assert not refresher.is_alive()
+
+
+def test_async_client_has_no_refresh_thread():
+    with FakeKeapServer(seed=1, volumes={'contacts': 1}) as server:
+        assert server.client(AsyncInfusionsoft).refresher is None
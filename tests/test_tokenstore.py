@@ -0,0 +1,54 @@
+import asyncio
+import pickle
+import threading
+
+from infusionsoft import AsyncInfusionsoft
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.token import Token
+from infusionsoft.tokenstore import FileTokenStore
+
+
+def test_file_store_imports_legacy_pickle_once(tmp_path):
+    token = Token('access', 'refresh', '2000000000')
+    with open(tmp_path / 'token.dat', 'wb') as f:
+        pickle.dump(token, f)
+    store = FileTokenStore(tmp_path / 'token.json', legacy_path=tmp_path / 'token.dat')
+    assert store.exists()
+    assert store.load().to_dict() == token.to_dict()
+    assert (tmp_path / 'token.json').exists()
+    (tmp_path / 'token.dat').unlink()
+    assert FileTokenStore(tmp_path / 'token.json').load().access_token == 'access'
+
+
+def test_file_store_without_legacy_path(tmp_path):
+    with open(tmp_path / 'token.dat', 'wb') as f:
+        pickle.dump(Token('access', 'refresh', '2000000000'), f)
+    assert FileTokenStore(tmp_path / 'token.json').load() is None
+
+
+def test_async_refresh_uses_store_off_the_loop(tmp_path):
+    threads = []
+
+    class RecordingStore(FileTokenStore):
+        def load(self):
+            threads.append(threading.get_ident())
+            return super().load()
+
+        def save(self, token):
+            threads.append(threading.get_ident())
+            super().save(token)
+
+    async def run():
+        store = RecordingStore(tmp_path / 'token.json')
+        async with server.client(AsyncInfusionsoft, token_store=store) as client:
+            del threads[:]
+            stale = client.token.access_token
+            await client.refresh_token_once(stale)
+            await client.refresh_token_once(stale)
+            assert client.token.access_token != stale
+            assert FileTokenStore(tmp_path / 'token.json').load().access_token == client.token.access_token
+
+    with FakeKeapServer(seed=1, volumes={'contacts': 1}) as server:
+        asyncio.run(run())
+        assert server.stats()['token_refreshes'] == 1
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from infusionsoft import AsyncInfusionsoft
+from infusionsoft.fakeserver import FakeKeapServer
+from infusionsoft.tracing import FileSpanExporter, MemorySpanExporter, Tracer, start_span
+
+
+def children(spans, parent, name=None):
+    return [span for span in spans if span.parent_id == parent.span_id and (name is None or span.name == name)]
+
+
+def test_spans_nest_and_record_errors():
+    exporter = MemorySpanExporter()
+    tracer = Tracer(exporter)
+    with pytest.raises(KeyError):
+        with tracer.span('job', kind='test') as job:
+            with tracer.span('step') as step:
+                step.set(records=3)
+            tracer.record('wait', 0.5)
+            raise KeyError('missing')
+    step, wait, job = exporter.spans
+    assert step.parent_id == wait.parent_id == job.span_id
+    assert step.trace_id == wait.trace_id == job.trace_id
+    assert job.parent_id is None
+    assert step.attributes == {'records': 3}
+    assert wait.duration == 0.5
+    assert job.error == "KeyError('missing')"
+    assert step.error is None
+
+
+def test_disabled_tracing_opens_no_span():
+    with start_span(None, 'request') as span:
+        assert span is None
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    exporter = FileSpanExporter(tmp_path / 'spans.jsonl')
+    tracer = Tracer(exporter)
+    with tracer.span('job'):
+        with tracer.span('step', endpoint='contacts'):
+            pass
+    exporter.close()
+    step, job = [json.loads(line) for line in (tmp_path / 'spans.jsonl').read_text().splitlines()]
+    assert step['parent_id'] == job['span_id']
+    assert step['attributes'] == {'endpoint': 'contacts'}
+    assert job['duration'] >= step['duration'] >= 0
+
+
+def test_client_traces_calls_pages_and_bulk_jobs():
+    exporter = MemorySpanExporter()
+    with FakeKeapServer(seed=1, volumes={'contacts': 30, 'tags': 3}) as server:
+        client = server.client(tracer=Tracer(exporter))
+        client.contact().list_contact({'limit': 5})
+        list(client.contact().iter_contact(page_size=10))
+        client.tags().bulk_apply_tag(1, list(range(1, 21)), batch_size=5)
+    spans = exporter.spans
+    roots = [span for span in spans if span.parent_id is None]
+    assert [span.name for span in roots] == ['request', 'page', 'page', 'page', 'bulk_apply_tag']
+
+    call = roots[0]
+    assert call.attributes['endpoint'] == 'contacts'
+    assert call.attributes['operation'] == 'contact.list_contact'
+    assert call.attributes['status'] == 200
+    send, = children(spans, call, 'send')
+    assert send.attributes['attempt'] == 1
+    assert len(children(spans, send, 'connect')) == 1
+    assert len(children(spans, call, 'decode')) == 1
+
+    assert [page.attributes['offset'] for page in roots[1:4]] == [0, 10, 20]
+    for page in roots[1:4]:
+        request, = children(spans, page, 'request')
+        assert request.attributes['operation'] == 'contact.iter_contact'
+
+    job = roots[4]
+    assert job.attributes['succeeded'] == 20
+    batches = children(spans, job, 'batch')
+    assert len(batches) == 4
+    for batch in batches:
+        request, = children(spans, batch, 'request')
+        assert request.attributes['endpoint'] == 'tags/{id}/contacts'
+
+
+def test_async_client_traces_calls():
+    exporter = MemorySpanExporter()
+
+    async def run():
+        async with server.client(AsyncInfusionsoft, tracer=Tracer(exporter)) as client:
+            await client.contact().retrieve_contact(1)
+
+    with FakeKeapServer(seed=1, volumes={'contacts': 5}) as server:
+        asyncio.run(run())
+    call, = [span for span in exporter.spans if span.parent_id is None]
+    assert call.name == 'request'
+    assert call.attributes['endpoint'] == 'contacts/{id}'
+    assert call.attributes['status'] == 200
+    assert len(children(exporter.spans, call, 'send')) == 1
+    assert all(span.trace_id == call.trace_id for span in exporter.spans)